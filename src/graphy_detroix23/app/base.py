@@ -3,45 +3,160 @@
 /src/graphy_detroix23/app/base.py
 """
 
+import pathlib
+import sys
+import time
+from typing import Callable, Iterator
+
 import pyxel
 
-from graphy_detroix23.modules import defaults, sound
-from graphy_detroix23.app import graph_toy, mouse, buttons
- 
+from graphy_detroix23.modules import backend, defaults, profiler, sonification, sound, tables
+from graphy_detroix23.app import graph_toy, importers, mouse, buttons, storage, tasks
+
+class FrameScheduler:
+    """
+    # `FrameScheduler`, fixed-timestep simulation decoupled from the drawing.
+    The time elapsed between frames is accumulated, and consumed by simulation steps of `step` seconds:
+    the simulation keeps its pace when frames drop.
+    - At most `max_steps` run per frame. Beyond, the late time is dropped, so slow steps cannot pile up.
+    - A draw longer than the frame `period` skips the draws of the next frames, at most `max_skip` in a row,
+    so the input and the simulation stay responsive when drawing is the bottleneck.
+    """
+    step: float
+    period: float
+    max_steps: int
+    max_skip: int
+    # Time not yet simulated, in seconds.
+    accumulator: float
+    # Totals of the steps dropped by the guard, and of the draws skipped.
+    dropped: int
+    skipped: int
+    # Time source, in seconds.
+    clock: Callable[[], float]
+    _last: float | None
+    _skip: int
+
+    def __init__(
+        self,
+        fps: int,
+        rate: int | None = None,
+        max_steps: int = 4,
+        max_skip: int = 3,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """
+        Simulate `rate` steps per second, by default as many as the frames.
+        """
+        self.step = 1.0 / (fps if rate is None else rate)
+        self.period = 1.0 / fps
+        self.max_steps = max_steps
+        self.max_skip = max_skip
+        self.accumulator = 0.0
+        self.dropped = 0
+        self.skipped = 0
+        self.clock = clock
+        self._last = None
+        self._skip = 0
+
+    def steps(self) -> int:
+        """
+        Once per frame: get the number of simulation steps to run.
+        """
+        now: float = self.clock()
+        if self._last is None:
+            self._last = now
+            return 1
+        self.accumulator += now - self._last
+        self._last = now
+
+        # Tolerance for the rounding of the frame times, or steady frames would alternate 0 and 2 steps.
+        count: int = int(self.accumulator / self.step + 1e-3)
+        if count > self.max_steps:
+            self.dropped += count - self.max_steps
+            count = self.max_steps
+            self.accumulator %= self.step
+        else:
+            self.accumulator -= count * self.step
+        return count
+
+    def should_draw(self) -> bool:
+        """
+        Once per frame: whether to draw, or to skip after a slow draw.
+        """
+        if self._skip > 0:
+            self._skip -= 1
+            self.skipped += 1
+            return False
+        return True
+
+    def drawn(self, duration: float) -> None:
+        """
+        Report the `duration` of a draw, in seconds.
+        """
+        self._skip = min(int(duration / self.period), self.max_skip)
+
+
 class App:
     """
     # Main `App`.
     Encloses the full application state and window.
+    Headless, there is no window nor audio: frames are run by `render`, and saved as PNG.
     """
     graph: graph_toy.GraphToy
     mouse_handler: mouse.Mouse
     background_color: int
     widgets: list[buttons.Button]
+    executor: tasks.Executor
+    # Printing tasks, one at a time: the tables do not interleave on the standard output.
+    printer: tasks.Executor
+    # Sonification of the graph, and the next traversal mode.
+    player: sonification.Player
+    composer: sonification.Composer
+    sonification_mode: sonification.Mode
+    # Saved graph, loaded at start and written by Ctrl+S.
+    # Other formats (edge list, CSV, GraphML) are imported at start and saved as `.graphy`.
+    graph_file: pathlib.Path
+    # Chrome trace written when the recording, started by F4, is stopped.
+    trace_file: pathlib.Path
+    # Simulation steps and drawing of each frame.
+    scheduler: FrameScheduler
 
     def __init__(
         self,
         width: int,
         height: int,
-        fps: int
+        fps: int,
+        graph_file: pathlib.Path = pathlib.Path("graph" + storage.SUFFIX),
+        trace_file: pathlib.Path = pathlib.Path("trace.json"),
+        headless: bool = False,
     ) -> None:
         """
         Initialize the application and default settings.
+        `headless` uses an offscreen screen, with the sprites of the resource file, instead of a window.
         """
+        if headless:
+            backend.use(backend.Headless(width, height, fps))
+        self.graph_file = graph_file
+        self.trace_file = trace_file
+        self.scheduler = FrameScheduler(fps, clock=backend.current.clock)
+        self.executor = tasks.Executor()
+        self.printer = tasks.Executor(workers=1)
+        self.player = sonification.Player()
+        self.composer = sonification.Composer()
+        self.sonification_mode = sonification.Mode.BFS
         self.graph = graph_toy.GraphToy(self)
         self.mouse_handler = mouse.Mouse(self)
         self.background_color = pyxel.COLOR_BLACK
         self.widgets = self.load_widgets()
 
-        pyxel.init(
+        backend.current.start(
             width,
             height,
-            title="Graphy",
-            fps=fps,
-            quit_key=pyxel.KEY_ESCAPE,
+            fps,
+            "Graphy",
+            defaults.RESOURCE_FILE,
         )
 
-        pyxel.load(str(defaults.RESOURCE_FILE))
-
         self.first()
 
     def load_widgets(self) -> list[buttons.Button]:
@@ -53,7 +168,12 @@ class App:
                 (10.0, 10.0),
                 (140.0, 30.0),
                 ["Print dict."],
-                lambda _: print(f"\nDictionary:\n{self.graph.display_dict()}"),
+                lambda button: self.print_lines(
+                    button, 
+                    "Dictionary:", 
+                    lambda snapshot: snapshot.dictionary_lines(), 
+                    separator=", \n",
+                ),
                 color=pyxel.COLOR_PEACH,
                 color_clicked=pyxel.COLOR_WHITE,
                 #sound="T120 L4 Q10 V8 <<B",
@@ -67,7 +187,11 @@ class App:
                 (10.0, 45.0),
                 (140.0, 30.0),
                 ["Print adjacency."],
-                lambda _: print(f"\nAdjacency matrix:\n{self.graph.display_adjacency()}"),
+                lambda button: self.print_lines(
+                    button, 
+                    "Adjacency matrix:", 
+                    lambda snapshot: snapshot.adjacency_lines(),
+                ),
                 color=pyxel.COLOR_ORANGE,
                 color_clicked=pyxel.COLOR_WHITE,
                 sound=sound.MML(channel=0, tempo=120, division=4, length=10, velocity=8, notes=[
@@ -102,12 +226,137 @@ class App:
                 font=defaults.FONT_BIG_BLUE,
                 margin=(10.0, 10.0),
             ),
+            buttons.Button(
+                (10.0, 175.0),
+                (140.0, 30.0),
+                ["Layout."],
+                lambda _: self.graph.toggle_layout(),
+                color=pyxel.COLOR_LIME,
+                color_clicked=pyxel.COLOR_WHITE,
+                sound=sound.MML(channel=0, tempo=120, division=4, length=10, velocity=8, notes=[
+                    sound.Note("E")
+                ]),
+                font=defaults.FONT_BIG_BLUE,
+                margin=(10.0, 10.0),
+            ),
+            buttons.Button(
+                (10.0, 210.0),
+                (140.0, 30.0),
+                [f"Play {self.sonification_mode.name}."],
+                self.sonify,
+                color=pyxel.COLOR_PINK,
+                color_clicked=pyxel.COLOR_WHITE,
+                font=defaults.FONT_BIG_BLUE,
+                margin=(10.0, 10.0),
+                # Clicked again to stop, while the traversal runs.
+                blocking=False,
+            ),
+            buttons.Button(
+                (10.0, 245.0),
+                (140.0, 30.0),
+                ["Path."],
+                lambda _: self.graph.toggle_path_mode(),
+                color=pyxel.COLOR_ORANGE,
+                color_clicked=pyxel.COLOR_WHITE,
+                sound=sound.MML(channel=0, tempo=120, division=4, length=10, velocity=8, notes=[
+                    sound.Note("F")
+                ]),
+                font=defaults.FONT_BIG_BLUE,
+                margin=(10.0, 10.0),
+            ),
+            buttons.Button(
+                (10.0, 280.0),
+                (140.0, 30.0),
+                ["Components."],
+                lambda _: self.graph.toggle_components(),
+                color=pyxel.COLOR_PURPLE,
+                color_clicked=pyxel.COLOR_WHITE,
+                sound=sound.MML(channel=0, tempo=120, division=4, length=10, velocity=8, notes=[
+                    sound.Note("G")
+                ]),
+                font=defaults.FONT_BIG_BLUE,
+                margin=(10.0, 10.0),
+            ),
         ]
  
+    def print_lines(
+        self,
+        button: buttons.Button,
+        title: str,
+        lines: Callable[[graph_toy.GraphSnapshot], Iterator[str]],
+        separator: str = "\n",
+    ) -> None:
+        """
+        Print the `lines` of a snapshot of the graph from the `printer`, showing progress on the `button`.
+        Printing waits for the previous one to end.
+        """
+        snapshot: graph_toy.GraphSnapshot = self.graph.snapshot()
+
+        def work(task: tasks.Task[int]) -> int:
+            sys.stdout.write(f"\n{title}\n")
+            writer: tables.Writer = tables.Writer(lines(snapshot), sys.stdout, separator)
+            while writer.step():
+                # Both tables have about one line per node.
+                task.progress = min(writer.written / max(snapshot.card, 1), 1.0)
+            return writer.written
+
+        button.task = self.printer.submit(work)
+
+    def sonify(self, button: buttons.Button) -> None:
+        """
+        Stop the sonification, or start it with the next traversal mode, from the selected node.
+        The traversal runs on a snapshot in a worker, streaming phrases to the `player`, its progress on the `button`.
+        """
+        if self.player.playing:
+            self.player.stop()
+            self.graph.sounding = None
+            return
+
+        snapshot: graph_toy.GraphSnapshot = self.graph.snapshot()
+        if snapshot.card == 0:
+            return
+        start: int = 0
+        if self.graph.selected is not None:
+            start = snapshot.names.index(self.graph.selected.get_name())
+
+        mode: sonification.Mode = self.sonification_mode
+        modes: list[sonification.Mode] = list(sonification.Mode)
+        self.sonification_mode = modes[(modes.index(mode) + 1) % len(modes)]
+        button.text = [f"Play {self.sonification_mode.name}."]
+
+        composer: sonification.Composer = self.composer
+        stream: sonification.Stream = self.player.start()
+
+        def work(task: tasks.Task[int]) -> int:
+            steps: int = 0
+            phrases: Iterator[sonification.Phrase] = composer.phrases(
+                sonification.traverse(mode, snapshot.rows, start),
+                snapshot.rows,
+                snapshot.names,
+            )
+            for phrase in phrases:
+                if not stream.put(phrase):
+                    return steps
+                steps += len(phrase.nodes)
+                task.progress = min(steps / snapshot.card, 1.0)
+            stream.put(None)
+            return steps
+
+        button.task = self.executor.submit(work)
+
     def first(self) -> None:
         """
         First actions, taken 1 time only, just before the start of the game loop.
+        Loads the `graph_file` if it exists, else a default graph.
         """
+        if self.graph_file.is_file():
+            if self.graph_file.suffix == storage.SUFFIX:
+                storage.load(self.graph, self.graph_file)
+            else:
+                print(importers.import_file(self.graph, self.graph_file, layout=True))
+                self.graph_file = self.graph_file.with_suffix(storage.SUFFIX)
+            return
+
         self.graph.add("A")
         self.graph.add("B")
         for _ in range(10):
@@ -123,41 +372,119 @@ class App:
     def run(self) -> None:
         """
         Starts, runs the application.
+        Workers are stopped at the end.
         """
-        pyxel.mouse(False)
-        pyxel.run(self.update, self.draw)
+        backend.current.mouse(False)
+        try:
+            backend.current.run(self.update, self.draw)
+        finally:
+            self.player.stop()
+            self.executor.shutdown()
+            self.printer.shutdown()
 
     def update(self) -> None:
         """
         Application general periodic updating, in the game loop. 
+        F3 shows the profiler overlay, F4 starts and stops a trace.
+        Ctrl+S saves, Ctrl+Z undoes the latest mouse edit and Ctrl+Y redoes it.
         """
-        self.graph.update()
+        profiler.PROFILER.begin_frame()
+        self.executor.drain()
+        self.printer.drain()
+
+        if backend.current.btnp(pyxel.KEY_F3):
+            profiler.PROFILER.toggle_overlay()
+        if backend.current.btnp(pyxel.KEY_F4):
+            if profiler.PROFILER.tracing:
+                count: int = profiler.PROFILER.stop_trace(self.trace_file)
+                print(f"\nTrace of {count} events written to {self.trace_file}.")
+            else:
+                profiler.PROFILER.start_trace()
+
+        if backend.current.btn(pyxel.KEY_CTRL) and backend.current.btnp(pyxel.KEY_S):
+            storage.save(self.graph, self.graph_file)
+            print(f"\nSaved to {self.graph_file}.")
+        if backend.current.btn(pyxel.KEY_CTRL) and backend.current.btnp(pyxel.KEY_Z):
+            self.graph.undo()
+        if backend.current.btn(pyxel.KEY_CTRL) and backend.current.btnp(pyxel.KEY_Y):
+            self.graph.redo()
+
+        with profiler.PROFILER.scope("GraphToy.update"):
+            self.graph.update()
 
         for widget in self.widgets:
-            widget.update()
+            with profiler.PROFILER.scope(f"Button.update {widget.text[0]}"):
+                widget.update()
+
+        # The layout budget is shared by the steps of the frame: late frames do not run it several times.
+        deadline: float = time.perf_counter() + self.graph.layout_budget
+        for _ in range(self.scheduler.steps()):
+            with profiler.PROFILER.scope("App.simulate"):
+                self.simulate(deadline)
+
+        sound.SCHEDULER.flush()
+
+    def simulate(self, deadline: float | None = None) -> None:
+        """
+        One simulation step, `scheduler.step` seconds long: sonification, and layout until `deadline`.
+        """
+        if self.player.playing:
+            self.graph.sounding = self.player.update()
+        self.graph.simulate(deadline)
 
     def draw(self) -> None:
         """
         Application general periodic drawing, in the game loop. 
+        Skipped after a slow draw, the previous frame stays on screen.
+        """
+        if not self.scheduler.should_draw():
+            profiler.PROFILER.count("skipped draw")
+            profiler.PROFILER.end_frame()
+            return
+        start: float = backend.current.clock()
+        self.draw_frame()
+        self.scheduler.drawn(backend.current.clock() - start)
+        profiler.PROFILER.end_frame()
+        profiler.PROFILER.draw()
+
+    def draw_frame(self) -> None:
         """
-        pyxel.cls(self.background_color)
+        Draw the graph, the buttons and the cursor on the screen.
+        """
+        backend.current.screen.cls(self.background_color)
 
-        self.graph.draw()
+        with profiler.PROFILER.scope("GraphToy.draw"):
+            self.graph.draw()
 
-        for widget in self.widgets:
-            widget.draw()
+        with profiler.PROFILER.scope("Button.draw"):
+            for widget in self.widgets:
+                widget.draw()
+
+        with profiler.PROFILER.scope("Mouse.draw"):
+            self.mouse_handler.draw()
 
-        self.mouse_handler.draw()
+    def render(self, path: pathlib.Path, frames: int = 1, scale: int = 1) -> None:
+        """
+        Run `frames` frames, then draw the last one and save it to `path`, as PNG.
+        Meant for the headless mode: the drawing is not skipped, whatever the time taken.
+        """
+        for _ in range(frames):
+            self.update()
+            backend.current.tick()
+        self.draw_frame()
+        backend.current.save(path, scale)
 
 
 def main() -> None:
     """
     Default launch.
+    The first command line argument is the graph file.
     """
     app = App(
         width=700, 
         height=500, 
         fps=30,
+        graph_file=pathlib.Path(sys.argv[1] if len(sys.argv) > 1 else "graph" + storage.SUFFIX),
     )
     
     app.run()
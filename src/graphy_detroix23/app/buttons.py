@@ -4,11 +4,12 @@
 """
 
 import math
-from typing import Callable, Self
+from typing import Any, Callable, Self
 
 import pyxel
 
-from graphy_detroix23.modules import sound
+from graphy_detroix23.modules import backend, graphics, sound
+from graphy_detroix23.app import tasks
 
 class Button:
     """
@@ -24,6 +25,10 @@ class Button:
     sound: sound.MML | None
     font: pyxel.Font | None
     margin: tuple[float, float]
+    # Background task started by the `action`, if any.
+    task: tasks.Task[Any] | None
+    # Whether clicks are ignored while the `task` runs. Else the `action` may stop it.
+    blocking: bool
     # Duration in frames.
     _click_time: int
     _click_effect_duration: int
@@ -38,7 +43,8 @@ class Button:
         color_clicked: int = pyxel.COLOR_WHITE,
         sound: sound.MML | None = None,
         font: pyxel.Font | None = None,
-        margin: tuple[float, float] = (0.0, 0.0)
+        margin: tuple[float, float] = (0.0, 0.0),
+        blocking: bool = True,
     ) -> None:
         """
         Create a `Button`.
@@ -55,9 +61,18 @@ class Button:
         self.sound = sound
         self.font = font      
         self.margin = margin
+        self.task = None
+        self.blocking = blocking
         self._click_time = 0
         self._click_effect_duration = 6
 
+    @property
+    def busy(self) -> bool:
+        """
+        Whether the background `task` is still running.
+        """
+        return self.task is not None and not self.task.delivered
+
     def draw(self) -> None:
         """
         Draw the button to the screen.
@@ -65,25 +80,36 @@ class Button:
         scale: float = 4.0 * math.log(self._click_time + 1)
 
         if 2 * self._click_time > 0:
-            pyxel.dither(min((self._click_time + 1) / self._click_effect_duration, 1.0))
-            pyxel.rect(
+            graphics.dither(min((self._click_time + 1) / self._click_effect_duration, 1.0))
+            graphics.rect(
                 self.position[0] - scale,
                 self.position[1] - scale,
                 self.size[0] + 2 * scale,
                 self.size[1] + 2 * scale,
                 self.color_clicked,
             )
-            pyxel.dither(1.0)
+            graphics.dither(1.0)
 
-        pyxel.rectb(
+        graphics.rectb(
             self.position[0] - scale,
             self.position[1] - scale,
             self.size[0] + 2 * scale,
             self.size[1] + 2 * scale,
             self.color,
         )
+        if self.busy and self.task is not None:
+            # Progress bar, blinking until some progress is reported.
+            if self.task.progress > 0.0 or (backend.current.frame_count // 8) % 2 == 0:
+                graphics.rect(
+                    self.position[0],
+                    self.position[1] + self.size[1] - 3,
+                    max(self.size[0] * self.task.progress, 3.0),
+                    3,
+                    self.color,
+                )
+
         for index in range(len(self.text)):
-            pyxel.text(
+            graphics.text(
                 self.position[0] + self.margin[0],
                 self.position[1] + self.margin[1] + index * 12,
                 self.text[index],
@@ -94,11 +120,12 @@ class Button:
     def update(self) -> None:
         """
         Update the button: listen to click and execute the `action`.
+        Clicks are ignored while busy, if `blocking`.
         """
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
+        if backend.current.btnp(pyxel.MOUSE_BUTTON_LEFT) and not (self.blocking and self.busy):
             if (
-                pyxel.mouse_x > self.position[0] and pyxel.mouse_x < self.position[0] + self.size[0]
-                and pyxel.mouse_y > self.position[1] and pyxel.mouse_y < self.position[1] + self.size[1]
+                backend.current.mouse_x > self.position[0] and backend.current.mouse_x < self.position[0] + self.size[0]
+                and backend.current.mouse_y > self.position[1] and backend.current.mouse_y < self.position[1] + self.size[1]
             ):
                 self.action(self)
                 self._click_time = self._click_effect_duration
@@ -3,39 +3,155 @@
 /src/graphy_detroix23/app/graph_toy.py
 """
 
-from typing import TYPE_CHECKING
+import itertools
+import math
+import time
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Sequence
 
 import pyxel
 
 if TYPE_CHECKING:
     from graphy_detroix23.app import base
-from graphy_detroix23.modules import defaults, graphics, sound
+from graphy_detroix23.modules import (
+    adjacency,
+    analysis,
+    arrays,
+    backend,
+    components,
+    defaults,
+    detail,
+    graphics,
+    history,
+    layout,
+    names,
+    sound,
+    spatial,
+    tables,
+)
 from graphy_detroix23.app import mouse, node_toy
 
 class GraphToy:
     """
     # `GraphToy` is the main character.
     """
-    parent: 'base.App'
-    _register: dict[str, node_toy.NodeToy]
+    # Colors of the strongly connected components with a cycle.
+    COMPONENT_COLORS: list[int] = [
+        pyxel.COLOR_RED,
+        pyxel.COLOR_ORANGE,
+        pyxel.COLOR_YELLOW,
+        pyxel.COLOR_LIME,
+        pyxel.COLOR_GREEN,
+        pyxel.COLOR_CYAN,
+        pyxel.COLOR_PINK,
+        pyxel.COLOR_PURPLE,
+    ]
+    # Transparent color of the retained layer, the background.
+    LAYER_COLKEY: int = pyxel.COLOR_BLACK
+
+    parent: 'base.App | None'
+    # Nodes by id, and ids by name.
+    _register: dict[int, node_toy.NodeToy]
+    _ids: dict[str, int]
+    # Ids, and the names of the nodes added without one.
+    _names: names.Allocator
+    # Spatial index of the nodes, for hit-testing.
+    _spatial: spatial.SpatialHash[node_toy.NodeToy]
+    # Weighted arcs, kept up to date by the nodes.
+    arcs: adjacency.Adjacency[node_toy.NodeToy]
+    # Vectorized backend: spacial state of the nodes, indexed by `arcs` slots. `None` for pure Python.
+    node_arrays: arrays.NodeArrays | None
+    # Arcs as (origin slots, end slots) arrays, for the vectorized culling, and when they were built.
+    _arc_arrays: tuple[Any, Any, int] | None
+    _arcs_version: int
     selected: node_toy.NodeToy | None
     arc_origin: node_toy.NodeToy | None
-    _last_added: str | None
     show_weights: bool
+    # Items skipped by the last `draw`, outside of the viewport.
+    culled_nodes: int
+    culled_arcs: int
+    # Live force-directed layout.
+    forces: layout.Layout
+    layout_enabled: bool
+    # Time spent on the layout per frame, whatever its number of simulation steps, in seconds.
+    layout_budget: float
+    _layout_nodes: list[node_toy.NodeToy]
+    # Node sounding in the sonification, by name, highlighted.
+    sounding: str | None
+    # Shortest paths and reachability over `arcs` slots.
+    paths: analysis.Analysis
+    # Path tool: left clicks pick two nodes, the shortest path between them is highlighted.
+    path_mode: bool
+    path_ends: list[node_toy.NodeToy]
+    path: list[node_toy.NodeToy]
+    path_distance: float | None
+    _path_version: int
+    # Live strongly connected components, updated only while shown.
+    strong_components: components.Components
+    components_enabled: bool
+    # Retained rendering: the graph but the selected node is drawn in `_layer`, only once `invalidate`d.
+    retained: bool
+    _layer: pyxel.Image | None
+    _layer_dirty: bool
+    # Level of detail of the last `draw_graph`, from the density on screen.
+    detail_level: detail.Detail
+    # Geometries of the arrows, by (origin, end) nodes.
+    arrows: graphics.ArrowCache
+    # Edits made with the mouse, for undo and redo. Edits through the methods are not recorded.
+    edits: history.History
+    # Position of the selected node when it was picked, for its move record.
+    _drag_from: tuple[float, float] | None
 
     sound_node_creation: sound.Incrementing
     sound_node_removal: sound.Incrementing
     sound_node_connection: sound.Incrementing
     sound_node_disconnection: sound.Incrementing
+    # Looped each frame while a node is held, or an arc drawn.
+    sound_node_holding: list[sound.MML]
+    sound_arc_drawing: list[sound.MML]
 
 
-    def __init__(self, parent: 'base.App') -> None:
+    def __init__(self, parent: 'base.App | None' = None, vectorized: bool | None = None) -> None:
+        """
+        Create an empty graph.
+        Without `parent` app, as in tests and benchmarks, the mouse state is not updated.
+        `vectorized` enables the `numpy` backend, by default if `numpy` is installed.
+        """
         self.parent = parent
         self._register = dict()
+        self._ids = dict()
+        self._names = names.Allocator()
+        self._spatial = spatial.SpatialHash()
+        self.arcs = adjacency.Adjacency()
+        if vectorized is None:
+            vectorized = arrays.AVAILABLE
+        self.node_arrays = arrays.NodeArrays() if vectorized else None
+        self._arc_arrays = None
+        self._arcs_version = 0
         self.selected = None
         self.arc_origin = None
-        self._last_added = None
         self.show_weights = True
+        self.culled_nodes = 0
+        self.culled_arcs = 0
+        self.forces = layout.VectorLayout() if vectorized else layout.ForceLayout()
+        self.layout_enabled = False
+        self.layout_budget = 0.008
+        self._layout_nodes = list()
+        self.sounding = None
+        self.paths = analysis.Analysis(self.arcs.row, self.arcs.column)
+        self.path_mode = False
+        self.path_ends = list()
+        self.path = list()
+        self.path_distance = None
+        self._path_version = -1
+        self.strong_components = components.Components(self.arcs.row, self.arcs.column, self.arcs.slots)
+        self.components_enabled = False
+        self.retained = True
+        self._layer = None
+        self._layer_dirty = True
+        self.detail_level = detail.Detail.FULL
+        self.arrows = graphics.ArrowCache()
+        self.edits = history.History()
+        self._drag_from = None
 
         self.sound_node_creation = sound.Incrementing(
             channel=0, 
@@ -81,12 +197,47 @@ class GraphToy:
             velocity=32,
             notes=[sound.Note("B", octave=-2, signature=sound.Signature.FLAT)]
         )
+        self.sound_node_holding = [
+            sound.MML(
+                channel=0, tempo=120, division=4, length=30, velocity=8, notes=[note], kind="holding", interval=0,
+            )
+            for note in (
+                sound.Note("F"),
+                sound.Note("A"),
+                sound.Note("C"),
+                sound.Note("E", signature=sound.Signature.FLAT),
+            )
+        ]
+        self.sound_arc_drawing = [
+            sound.MML(
+                channel=0, tempo=80, division=1, length=100, velocity=8, notes=[note], kind="arc drawing", interval=0,
+            )
+            for note in (
+                sound.Note("C"),
+                sound.Note("E"),
+                sound.Note("G"),
+                sound.Note("B", octave=-1, signature=sound.Signature.FLAT),
+            )
+        ]
 
     def __getitem__(self, name: str) -> node_toy.NodeToy:
         """
         Return a `node_toy.NodeToy` named `name`. Raise if it doesn't exist.
         """
-        return self._register[name]
+        return self._register[self._ids[name]]
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Check if a node named `name` exists.
+        """
+        return name in self._ids
+
+    def get(self, name: str) -> node_toy.NodeToy | None:
+        """
+        Return the `node_toy.NodeToy` named `name`, or `None`.
+        """
+        identifier: int | None = self._ids.get(name)
+        return None if identifier is None else self._register[identifier]
 
     @property
     def card(self) -> int:
@@ -95,11 +246,82 @@ class GraphToy:
         """
         return len(self._register)
 
+    def nodes(self) -> list[node_toy.NodeToy]:
+        """
+        Get all the nodes, in the order they were added.
+        """
+        return [node for node in self._register.values()]
+
+    def clear(self) -> None:
+        """
+        Remove every node.
+        """
+        self.remove_many([name for name in self._ids])
+        self._names.clear()
+        self.edits.clear()
+
+    def toggle_layout(self) -> None:
+        """
+        Toggle on or off the live force-directed layout.
+        """
+        self.layout_enabled = not self.layout_enabled
+        if self.layout_enabled:
+            self.forces.heat()
+
+    def toggle_components(self) -> None:
+        """
+        Toggle on or off the strongly connected components, colored.
+        """
+        self.components_enabled = not self.components_enabled
+        if self.components_enabled:
+            self.strong_components.rebuild()
+            self.strong_components.take_changed()
+            for slot in self.arcs.slots():
+                self.color_component(slot)
+        else:
+            self.strong_components.dirty = True
+            for node in self._register.values():
+                node.component_color = None
+            self.invalidate()
+
+    def color_component(self, slot: int) -> None:
+        """
+        Color the node at `slot` by its component, if it is in a cycle.
+        """
+        if slot not in self.strong_components.component:
+            return
+        identifier: int = self.strong_components.component[slot]
+        cyclic: bool = len(self.strong_components.members[identifier]) > 1 or slot in self.strong_components.loops
+        self.arcs.item(slot).component_color = (
+            self.COMPONENT_COLORS[identifier % len(self.COMPONENT_COLORS)] if cyclic else None
+        )
+        self.invalidate()
+
+    def components_step(self) -> None:
+        """
+        Rebuild the components after bulk edits, and update the colors of the changed nodes.
+        """
+        self.strong_components.refresh()
+        for slot in self.strong_components.take_changed():
+            self.color_component(slot)
+
+    def toggle_path_mode(self) -> None:
+        """
+        Toggle on or off the path tool, instead of the selection.
+        """
+        self.path_mode = not self.path_mode
+        self.path_ends = list()
+        self.path = list()
+        self.path_distance = None
+        if self.selected is not None:
+            self.set_selection(None)
+
     def toggle_weight_visibility(self) -> None:
         """
         Toggle on or off the `show_weight` boolean.
         """
         self.show_weights = not self.show_weights
+        self.invalidate()
 
     def add(
         self, 
@@ -108,29 +330,262 @@ class GraphToy:
     ) -> None:
         """
         Add a new `Node` with a `name` and no neighbors to the `_register`.
+        Raise a `ValueError` if the `name` is taken.
         """
-        self._last_added = name
+        if name in self._ids:
+            raise ValueError(f"A node named {name!r} already exists.")
+        self._insert(self._names.allocate(), name, position)
+
+    def _insert(self, identifier: int, name: str, position: tuple[float, float]) -> node_toy.NodeToy:
         node = node_toy.NodeToy(name)
         node.position = position
-        self._register[name] = node
+        self._register[identifier] = node
+        self._ids[name] = identifier
+        slot: int = self.arcs.add(node)
+        if self.node_arrays is not None:
+            node.attach(self.node_arrays, slot)
+        if self.components_enabled:
+            self.strong_components.node_added(slot)
+        self._spatial.insert(node, node.position, node.radius)
+        node.owner = self
+        self._arcs_version += 1
+        self.invalidate()
+        self.forces.heat()
+        return node
     
     def add_continuing(
         self, 
         position: tuple[float, float] = (0.0, 0.0)
+    ) -> node_toy.NodeToy:
+        """
+        Add a new `Node` and no neighbors to the `_register`, and return it.
+        Its name is generated from its id: `A`, ..., `Z`, `AA`, ... Ids of removed nodes are reused.
+        """
+        identifier: int = self._names.allocate()
+        name: str = self._names.name(identifier)
+        # Ids whose name was given to another node.
+        taken: list[int] = list()
+        while name in self._ids:
+            taken.append(identifier)
+            identifier = self._names.allocate()
+            name = self._names.name(identifier)
+        for other in taken:
+            self._names.release(other)
+
+        return self._insert(identifier, name, position)
+
+    def add_many(self, positions: Iterable[tuple[float, float]]) -> list[node_toy.NodeToy]:
+        """
+        Add a node at each of the `positions`, named as by `add_continuing`.
+        """
+        return [self.add_continuing(position) for position in positions]
+
+    def link_many(
+        self,
+        nodes: Sequence[node_toy.NodeToy],
+        origins: Sequence[int],
+        ends: Sequence[int],
+        weights: Sequence[float],
     ) -> None:
         """
-        Add a new `Node` and no neighbors to the `_register`.  
-        Name is the following ASCII character after `_last_added`.
+        Add the arcs from `nodes[origins[i]]` to `nodes[ends[i]]` of weight `weights[i]`, in bulk.
+        Nothing is notified per arc: derived state is updated once, like `remove_many`.
+        Fastest with the arcs grouped by origin, as saved.
+        Raise a `ValueError`, before adding any, if the lengths differ or an index is out of `nodes`.
         """
-        name: str = "A" if self._last_added is None else chr(ord(self._last_added) + 1)
-        self.add(name, position)
+        if not len(origins) == len(ends) == len(weights):
+            raise ValueError("Origins, ends and weights differ in length.")
+        for indices in (origins, ends):
+            if indices and (min(indices) < 0 or max(indices) >= len(nodes)):
+                raise ValueError(f"An arc index is out of the {len(nodes)} nodes.")
+        # Raises before any change too, if a node is not in the graph.
+        slots: list[int] = [self.arcs.index(node) for node in nodes]
+        origin_slots: list[int] = list(map(slots.__getitem__, origins))
+        end_slots: list[int] = list(map(slots.__getitem__, ends))
+
+        targets: list[node_toy.NodeToy] = list(map(nodes.__getitem__, ends))
+        start: int = 0
+        for origin, run in itertools.groupby(origins):
+            stop: int = start + len(list(run))
+            nodes[origin].link(zip(targets[start:stop], weights[start:stop]))
+            start = stop
+        self.arcs.extend(origin_slots, end_slots, weights)
+
+        self.paths.clear()
+        if self.components_enabled:
+            self.strong_components.rebuild()
+        self._arcs_version += 1
+        self.invalidate()
+        self.forces.heat()
+
+    def add_named(self, records: Iterable[tuple[str, tuple[float, float], float]]) -> list[node_toy.NodeToy]:
+        """
+        Add a node for each record (name, position, radius), in bulk, and return them.
+        Raise a `ValueError`, before adding any, if a name is taken or repeated.
+        Derived state is updated once, like `remove_many`.
+        """
+        records = list(records)
+        taken: set[str] = set()
+        for name, _, _ in records:
+            if name in self._ids or name in taken:
+                raise ValueError(f"A node named {name!r} already exists.")
+            taken.add(name)
+
+        added: list[node_toy.NodeToy] = list()
+        for name, position, radius in records:
+            node = node_toy.NodeToy(name)
+            node.position = position
+            node.radius = radius
+            identifier: int = self._names.allocate()
+            self._register[identifier] = node
+            self._ids[name] = identifier
+            self._spatial.insert(node, position, radius)
+            node.owner = self
+            added.append(node)
+
+        slots: list[int] = [self.arcs.add(node) for node in added]
+        if self.node_arrays is not None:
+            node_toy.NodeToy.attach_many(added, self.node_arrays, slots)
+        if self.components_enabled:
+            self.strong_components.rebuild()
+        self._arcs_version += 1
+        self.invalidate()
+        self.forces.heat()
+        return added
 
     def remove(self, name: str) -> node_toy.NodeToy | None:
         """
-        Remove a `Node` `name` from the `_register`.   
+        Remove a `Node` `name` from the `_register`, with its incoming and outgoing arcs.
         Returns the removed `Node` or `None` if didn't existed.
+        O(degree): the incoming arcs are found by the columns of `arcs`.
+        """
+        node: node_toy.NodeToy | None = self._detach(name)
+        if node is not None:
+            slot: int = self.arcs.index(node)
+            self.paths.forget(slot)
+            self.arcs.remove(node)
+            if self.components_enabled:
+                self.strong_components.node_removed(slot)
+            self._arcs_version += 1
+            self.invalidate()
+            self.forces.heat()
+
+        return node
+
+    def remove_many(self, names: Iterable[str]) -> list[node_toy.NodeToy]:
         """
-        return self._register.pop(name, None)
+        Remove the nodes `names`, like `remove`, and returns them.
+        Derived state is updated once: the analysis is cleared and the components rebuilt.
+        """
+        removed: list[node_toy.NodeToy] = list()
+        for name in names:
+            node: node_toy.NodeToy | None = self._detach(name)
+            if node is not None:
+                self.arcs.remove(node)
+                removed.append(node)
+
+        if removed:
+            self.paths.clear()
+            if self.components_enabled:
+                self.strong_components.rebuild()
+            self._arcs_version += 1
+            self.invalidate()
+            self.forces.heat()
+
+        return removed
+
+    def _detach(self, name: str) -> node_toy.NodeToy | None:
+        """
+        Take the node `name` out of the register, the spatial index, the selection and the arcs of its neighbors.
+        It stays in `arcs`, for the caller.
+        """
+        identifier: int | None = self._ids.pop(name, None)
+        if identifier is None:
+            return None
+        node: node_toy.NodeToy = self._register.pop(identifier)
+        self._names.release(identifier)
+
+        if node is self.selected:
+            self.set_selection(None)
+        if node is self.arc_origin:
+            self.set_arc_origin(None)
+        if node in self.path_ends:
+            self.path_ends = list()
+        self._spatial.remove(node)
+        self.forget_arrows(node)
+        node.unlink(self.arcs.predecessors(node))
+        node.detach()
+        node.owner = None
+        return node
+
+    def arc_set(self, origin: node_toy.NodeToy, end: node_toy.NodeToy, weight: float) -> None:
+        """
+        Called by `origin` when its arc to `end` is added or updated.
+        """
+        if end.owner is self:
+            self.arcs.set(origin, end, weight)
+            self.paths.touch(self.arcs.index(origin), self.arcs.index(end))
+            if self.components_enabled:
+                self.strong_components.arc_added(self.arcs.index(origin), self.arcs.index(end))
+            self._arcs_version += 1
+            self.invalidate()
+            self.forces.heat()
+
+    def arc_removed(self, origin: node_toy.NodeToy, end: node_toy.NodeToy) -> None:
+        """
+        Called by `origin` when its arc to `end` is removed.
+        """
+        self.arrows.forget((origin, end))
+        if origin in self.arcs and end in self.arcs:
+            self.paths.touch(self.arcs.index(origin), self.arcs.index(end))
+            self.arcs.unset(origin, end)
+            if self.components_enabled:
+                self.strong_components.arc_removed(self.arcs.index(origin), self.arcs.index(end))
+        self._arcs_version += 1
+        self.invalidate()
+        self.forces.heat()
+
+    def move(self, node: node_toy.NodeToy, position: tuple[float, float]) -> None:
+        """
+        Set the `position` of a `node` and keep the spatial index in sync.
+        """
+        node.position = position
+        self._spatial.move(node, position, node.radius)
+        self.forget_arrows(node)
+        # The selected node is drawn out of the layer.
+        if node is not self.selected:
+            self.invalidate()
+
+    def forget_arrows(self, node: node_toy.NodeToy) -> None:
+        """
+        Drop the cached geometries of the arcs from and to `node`.
+        """
+        if node not in self.arcs:
+            return
+        for end in self.arcs.successors(node):
+            self.arrows.forget((node, end))
+        for origin in self.arcs.predecessors(node):
+            self.arrows.forget((origin, node))
+
+    def arrow(self, origin: node_toy.NodeToy, end: node_toy.NodeToy) -> graphics.Arrow:
+        """
+        Get the geometry of the arrow of the arc from `origin` to `end`, cached.
+        """
+        return self.arrows.get(
+            (origin, end),
+            origin.position[0],
+            origin.position[1],
+            end.position[0],
+            end.position[1],
+            end.radius,
+            origin.ARC_SHIFT,
+        )
+
+    def invalidate(self) -> None:
+        """
+        Redraw the retained layer at the next `draw`.
+        """
+        self._layer_dirty = True
 
     def default_position(self, radius: float) -> None:
         """
@@ -138,13 +593,13 @@ class GraphToy:
         """
         angle: float = 0.0
         increment: float = 360.0 / len(self._register) 
-        center: tuple[float, float] = (pyxel.width / 2, pyxel.height / 2)
+        center: tuple[float, float] = (backend.current.width / 2, backend.current.height / 2)
 
         for node in self._register.values():
-            node.position = (
+            self.move(node, (
                 pyxel.cos(angle) * radius + center[0],
                 pyxel.sin(angle) * radius + center[1],
-            )
+            ))
             angle += increment
 
     def set_selection(self, node: node_toy.NodeToy | None) -> None:
@@ -157,11 +612,13 @@ class GraphToy:
             self.selected.is_selected = False
 
         if node is None:
-            self.parent.mouse_handler.state = mouse.State.SELECT
+            self.set_mouse_state(mouse.State.SELECT)
         else:
-            self.parent.mouse_handler.state = mouse.State.HOLD
+            self.set_mouse_state(mouse.State.HOLD)
             node.is_selected = True
 
+        if node is not self.selected:
+            self.invalidate()
         self.selected = node
 
         return
@@ -173,23 +630,23 @@ class GraphToy:
         """ 
         self.arc_origin = node
         if node is None:
-            self.parent.mouse_handler.state = mouse.State.SELECT
+            self.set_mouse_state(mouse.State.SELECT)
         else:
-            self.parent.mouse_handler.state = mouse.State.DRAW
+            self.set_mouse_state(mouse.State.DRAW)
+
+    def set_mouse_state(self, state: mouse.State) -> None:
+        """
+        Set the state of the mouse of the `parent` app, if any.
+        """
+        if self.parent is not None:
+            self.parent.mouse_handler.state = state
 
     def select_node(self, position: tuple[float, float]) -> node_toy.NodeToy | None:
         """
         Return a `node_toy.NodeToy` if there is one under on `position`, `None` else.
+        If several overlap, the first added wins.
         """
-        for node in self._register.values():
-            # Check if in radius.
-            if ((position[0] - node.position[0]) ** 2 
-                + (position[1] - node.position[1]) ** 2 
-                <= node.radius ** 2
-            ):
-                return node
-             
-        return None 
+        return self._spatial.pick(position)
 
     def node_selection(self) -> None:
         """
@@ -197,39 +654,77 @@ class GraphToy:
         """
         # Selection
         if self.selected is None:
-            if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-                self.set_selection(self.select_node((pyxel.mouse_x, pyxel.mouse_y)))
+            if backend.current.btnp(pyxel.MOUSE_BUTTON_LEFT):
+                self.set_selection(self.select_node((backend.current.mouse_x, backend.current.mouse_y)))
+                self._drag_from = None if self.selected is None else self.selected.position
         
         else:
-            notes: list[str] = ["F", "A", "C", "E-"]
-            pyxel.play(0, f"T120 L4 Q30 V8 {notes[int(pyxel.frame_count / 2) % 4]}")
-            if pyxel.btnr(pyxel.MOUSE_BUTTON_LEFT):
+            self.sound_node_holding[(backend.current.frame_count // 2) % 4].play()
+            if backend.current.btnr(pyxel.MOUSE_BUTTON_LEFT):
+                # The whole drag is one move.
+                if self._drag_from is not None and self._drag_from != self.selected.position:
+                    self.edits.record(
+                        history.Move(self.selected.get_name(), self._drag_from, self.selected.position)
+                    )
+                self._drag_from = None
                 self.set_selection(None)
         
         # Moving the selection.
         if self.selected is not None:
-            self.selected.position = (
-                graphics.clip(pyxel.mouse_x, minimum=0.0, maximum=pyxel.width), 
-                graphics.clip(pyxel.mouse_y, minimum=0.0, maximum=pyxel.height)
+            self.forces.heat(5.0)
+            self.move(self.selected, (
+                graphics.clip(backend.current.mouse_x, minimum=0.0, maximum=backend.current.width), 
+                graphics.clip(backend.current.mouse_y, minimum=0.0, maximum=backend.current.height)
+            ))
+
+    def path_tool(self) -> None:
+        """
+        Handles left mouse click to pick the ends of a shortest path.
+        The path is searched again after arcs changes.
+        """
+        if backend.current.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            node: node_toy.NodeToy | None = self.select_node((backend.current.mouse_x, backend.current.mouse_y))
+            if node is None or len(self.path_ends) == 2:
+                self.path_ends = list()
+            if node is not None:
+                self.path_ends.append(node)
+            self._path_version = -1
+
+        if self._path_version == self._arcs_version:
+            return
+        self._path_version = self._arcs_version
+        self.path = list()
+        self.path_distance = None
+        if len(self.path_ends) == 2:
+            found: tuple[float, list[int]] | None = self.paths.shortest_path(
+                self.arcs.index(self.path_ends[0]),
+                self.arcs.index(self.path_ends[1]),
             )
+            if found is not None:
+                self.path_distance, slots = found
+                self.path = [self.arcs.item(slot) for slot in slots]
 
     def arcs_tool(self) -> None:
         """
         Handles right mouse click to create new connection between `NodeToy`s.
         """
         if self.arc_origin is None:
-            if pyxel.btnp(pyxel.MOUSE_BUTTON_RIGHT):
-                self.set_arc_origin(self.select_node((pyxel.mouse_x, pyxel.mouse_y)))
+            if backend.current.btnp(pyxel.MOUSE_BUTTON_RIGHT):
+                self.set_arc_origin(self.select_node((backend.current.mouse_x, backend.current.mouse_y)))
 
         else:
-            if pyxel.btnr(pyxel.MOUSE_BUTTON_RIGHT):
-                end: node_toy.NodeToy | None = self.select_node((pyxel.mouse_x, pyxel.mouse_y))
+            if backend.current.btnr(pyxel.MOUSE_BUTTON_RIGHT):
+                end: node_toy.NodeToy | None = self.select_node((backend.current.mouse_x, backend.current.mouse_y))
                 if end is not None:
                     if end in self.arc_origin.get_next():
+                        self.edits.record(
+                            history.Arc(self.arc_origin.get_name(), end.get_name(), self.arc_origin.get_next()[end], None)
+                        )
                         self.arc_origin.remove_next(end)
                         self.sound_node_disconnection.play()
                     else:
                         self.arc_origin.set_next(end, 1.0)
+                        self.edits.record(history.Arc(self.arc_origin.get_name(), end.get_name(), None, 1.0))
                         self.sound_node_connection.play()
 
                 else:
@@ -239,34 +734,168 @@ class GraphToy:
             
             else:
                 # Drawing.
-                notes: list[str] = ["C", "E", "G", "<B-"]
-                pyxel.play(0, f"T80 L1 Q100 V8 {notes[int(pyxel.frame_count / 2) % 4]}")
+                self.sound_arc_drawing[(backend.current.frame_count // 2) % 4].play()
 
     def node_creation(self) -> None:
         """
         Handles middle mouse button to create a new node, named automatically.
         """
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_MIDDLE):
-            selection: node_toy.NodeToy | None = self.select_node((pyxel.mouse_x, pyxel.mouse_y))
+        if backend.current.btnp(pyxel.MOUSE_BUTTON_MIDDLE):
+            selection: node_toy.NodeToy | None = self.select_node((backend.current.mouse_x, backend.current.mouse_y))
             if selection is None:
-                self.add_continuing((pyxel.mouse_x, pyxel.mouse_y))
+                node: node_toy.NodeToy = self.add_continuing((backend.current.mouse_x, backend.current.mouse_y))
+                self.edits.record(history.Node(node.get_name(), node.position, node.radius, True))
                 self.sound_node_creation.play()
 
             else:
+                self.edits.record(self.removal_record(selection))
                 self.remove(selection.get_name())
                 self.sound_node_removal.play()
 
+    def removal_record(self, node: node_toy.NodeToy) -> history.Node:
+        """
+        Get the record of the removal of `node`, with its arcs: O(degree).
+        """
+        return history.Node(
+            node.get_name(),
+            node.position,
+            node.radius,
+            False,
+            tuple(
+                (end.get_name(), weight) for end, weight in node.get_next().items()
+                if isinstance(end, node_toy.NodeToy) and end.owner is self
+            ),
+            tuple(
+                (origin.get_name(), origin.get_next()[node]) for origin in self.arcs.predecessors(node)
+                if origin is not node
+            ),
+        )
+
+    def undo(self) -> bool:
+        """
+        Revert the latest recorded edit. Returns whether there was one.
+        Ignored while a node is held or an arc drawn.
+        """
+        if self.selected is not None or self.arc_origin is not None:
+            return False
+        record: history.Record | None = self.edits.undo()
+        if record is not None:
+            self._replay(record, False)
+        return record is not None
+
+    def redo(self) -> bool:
+        """
+        Apply again the latest undone edit. Returns whether there was one.
+        """
+        if self.selected is not None or self.arc_origin is not None:
+            return False
+        record: history.Record | None = self.edits.redo()
+        if record is not None:
+            self._replay(record, True)
+        return record is not None
+
+    def _replay(self, record: history.Record, forward: bool) -> None:
+        """
+        Apply a `record`, or revert it if not `forward`. Nodes missing since are skipped.
+        """
+        if isinstance(record, history.Move):
+            moved: node_toy.NodeToy | None = self.get(record.name)
+            if moved is not None:
+                self.move(moved, record.after if forward else record.before)
+
+        elif isinstance(record, history.Arc):
+            origin: node_toy.NodeToy | None = self.get(record.origin)
+            end: node_toy.NodeToy | None = self.get(record.end)
+            weight: float | None = record.after if forward else record.before
+            if origin is None or end is None:
+                return
+            if weight is None:
+                origin.remove_next(end)
+            else:
+                origin.set_next(end, weight)
+
+        elif record.added != forward:
+            self.remove(record.name)
+
+        elif record.name not in self:
+            self.add(record.name, record.position)
+            node: node_toy.NodeToy = self[record.name]
+            if node.radius != record.radius:
+                node.radius = record.radius
+                self.move(node, record.position)
+            node.batch_next([(self[name], weight) for name, weight in record.outgoing if name in self])
+            for name, weight in record.incoming:
+                other: node_toy.NodeToy | None = self.get(name)
+                if other is not None:
+                    other.set_next(node, weight)
+
     def update(self) -> None:
         """
-        Update positions, nodes, mouse.
+        Once per frame: the mouse tools, and the updates following the edits.
         """
-        self.node_selection()
+        if self.path_mode:
+            self.path_tool()
+        else:
+            self.node_selection()
         self.arcs_tool()
         self.node_creation()
+        if self.components_enabled:
+            self.components_step()
+
+    def simulate(self, deadline: float | None = None) -> None:
+        """
+        One fixed simulation step: the layout, if enabled, until `deadline`.
+        """
+        if self.layout_enabled:
+            self.layout_step(deadline)
+
+    def layout_step(self, deadline: float | None = None) -> None:
+        """
+        Relax the positions with the force-directed layout until `deadline`, by default `layout_budget` from now.
+        The steps of a frame share one `deadline`: the ones after it do nothing.
+        The selected node stays pinned.
+        """
+        if deadline is None:
+            deadline = time.perf_counter() + self.layout_budget
+        elif time.perf_counter() >= deadline:
+            return
+
+        if not self.forces.in_sweep:
+            if self.forces.settled:
+                return
+
+            # Indexed by slot order, to avoid hashing nodes.
+            slots: list[int] = self.arcs.slots()
+            self._layout_nodes = [self.arcs.item(slot) for slot in slots]
+            position: dict[int, int] = {slot: index for index, slot in enumerate(slots)}
+            arcs: list[tuple[int, int]] = [
+                (index, position[end])
+                for index, slot in enumerate(slots)
+                for end in self.arcs.row(slot)
+            ]
+
+            self.forces.begin(
+                (
+                    self.node_arrays.positions[slots] 
+                    if self.node_arrays is not None 
+                    else [node.position for node in self._layout_nodes]
+                ),
+                arcs,
+                (backend.current.width / 2, backend.current.height / 2),
+            )
+
+        nodes: list[node_toy.NodeToy] = self._layout_nodes
+        moved: range = self.forces.run(deadline, lambda index: nodes[index] is self.selected)
+        for index in moved:
+            # Skip the nodes removed since the start of the sweep.
+            if nodes[index].owner is self and nodes[index] is not self.selected:
+                self.move(nodes[index], (self.forces.positions[index][0], self.forces.positions[index][1]))
         
     def draw(self) -> None:
         """
         Draw all the nodes of the graph.
+        When `retained`, the graph is redrawn in a layer only after changes, and composited with one blit.
+        The selected node and its arcs are drawn on top, each frame.
         """
         # Drawing arc
         if self.arc_origin is not None:
@@ -275,87 +904,368 @@ class GraphToy:
             graphics.jagged_line(
                 self.arc_origin.position[0],
                 self.arc_origin.position[1],
-                pyxel.mouse_x,
-                pyxel.mouse_y,
+                backend.current.mouse_x,
+                backend.current.mouse_y,
                 jag=jag,
                 color=pyxel.COLOR_LIME,
-                shift=pyxel.frame_count % int(jag * 2)
+                shift=backend.current.frame_count % int(jag * 2)
             )
 
-            
+        if not self.retained:
+            self.draw_graph()
+            self.draw_highlights()
+            return
+
+        if self._layer is None or (self._layer.width, self._layer.height) != (backend.current.width, backend.current.height):
+            self._layer = pyxel.Image(backend.current.width, backend.current.height)
+            self._layer_dirty = True
+        if self._layer_dirty:
+            with graphics.drawing_on(self._layer):
+                self._layer.cls(self.LAYER_COLKEY)
+                self.draw_graph(self.selected)
+            self._layer_dirty = False
+
+        graphics.blt(0, 0, self._layer, 0, 0, self._layer.width, self._layer.height, self.LAYER_COLKEY)
+        if self.selected is not None:
+            self.draw_selected(self.selected)
+        self.draw_highlights()
+
+    def draw_graph(self, exclude: node_toy.NodeToy | None = None) -> None:
+        """
+        Draw the visible arcs and nodes, except the node `exclude` and its arcs.
+        The `detail_level` is chosen from how much of the viewport they cover.
+        """
+        viewport: tuple[float, float, float, float] = self.viewport()
+        # Arcs, with a margin for the arrow head and the shift.
+        margin: float = graphics.SPRITE_ARROW.size[0]
+        arcs_viewport: tuple[float, float, float, float] = (
+            viewport[0] - margin,
+            viewport[1] - margin,
+            viewport[2] + margin,
+            viewport[3] + margin,
+        )
+        if self.node_arrays is not None:
+            self.draw_vectorized(viewport, arcs_viewport, exclude)
+            return
+
+        self.culled_arcs = 0
+        arcs: list[tuple[node_toy.NodeToy, node_toy.NodeToy, float]] = list()
         for node in self._register.values():
-            node.draw(self.show_weights)
+            if node is not exclude:
+                crossing, culled = node.visible_arcs(arcs_viewport, exclude)
+                arcs.extend((node, neighbor, weight) for neighbor, weight in crossing)
+                self.culled_arcs += culled
+
+        nodes: list[node_toy.NodeToy] = [
+            node for node in self._spatial.query_rect(viewport)
+            if node is not exclude and graphics.rectangles_overlap(node.bounds(), viewport)
+        ]
+        self.culled_nodes = self.card - len(nodes)
+        nodes_area: float = 0.0
+        for node in nodes:
+            bounds: tuple[float, float, float, float] = node.bounds()
+            nodes_area += (bounds[2] - bounds[0]) * (bounds[3] - bounds[1])
+        self.detail_level = detail.level(detail.coverage(nodes_area, len(arcs), viewport), self.detail_level)
+
+        if self.detail_level >= detail.Detail.CLUSTERS:
+            self.draw_clusters(
+                detail.cells(node.position for node in nodes),
+                detail.links((origin.position, end.position) for origin, end, _ in arcs),
+            )
+            return
+
+        # Arcs, then nodes.
+        text: bool = self.detail_level == detail.Detail.FULL
+        lines: bool = self.detail_level >= detail.Detail.LINES
+        for origin, end, weight in arcs:
+            if origin.is_selected:
+                graphics.dither(0.8)
+            origin.draw_arc(end, weight, self.show_weights and text, lines)
+            if origin.is_selected:
+                graphics.dither(1.0)
+        for node in nodes:
+            node.draw(text)
+
+    def draw_clusters(
+        self,
+        cells: dict[tuple[int, int], int],
+        links: Iterable[tuple[int, int, int, int]],
+    ) -> None:
+        """
+        Draw the nodes aggregated in `cells` {cell: nodes count}, a disc growing with the count,
+        and the `links` between cells as lines. At most one item per cell or pair of cells.
+        """
+        for x1, y1, x2, y2 in links:
+            start: tuple[float, float] = detail.center((x1, y1))
+            end: tuple[float, float] = detail.center((x2, y2))
+            graphics.line(start[0], start[1], end[0], end[1], pyxel.COLOR_LIGHT_BLUE)
+        for key, count in cells.items():
+            position: tuple[float, float] = detail.center(key)
+            graphics.circ(
+                position[0],
+                position[1],
+                min(detail.CELL / 2, 1.0 + math.log2(count)),
+                pyxel.COLOR_WHITE,
+            )
+
+    def draw_selected(self, node: node_toy.NodeToy) -> None:
+        """
+        Draw a `node` with its outgoing and incoming arcs.
+        """
+        node.draw_arcs(self.show_weights)
+        for predecessor in self.arcs.predecessors(node):
+            weight: float | None = predecessor.get_next().get(node)
+            if weight is not None and predecessor is not node:
+                predecessor.draw_arc(node, weight, self.show_weights)
+        node.draw()
+
+    def draw_highlights(self) -> None:
+        """
+        Circle the node `sounding` and the path ends, draw the path, and the components status.
+        """
+        for origin, end in zip(self.path, self.path[1:]):
+            graphics.line(origin.position[0], origin.position[1], end.position[0], end.position[1], pyxel.COLOR_ORANGE)
+        for node in self.path_ends:
+            self.circle(node, pyxel.COLOR_ORANGE)
+        if self.path_distance is not None and self.path:
+            graphics.text(
+                self.path[-1].position[0] + 12,
+                self.path[-1].position[1] - 12,
+                f"{self.path_distance:g}",
+                pyxel.COLOR_ORANGE,
+            )
+
+        if self.sounding is not None:
+            sounding: node_toy.NodeToy | None = self.get(self.sounding)
+            if sounding is not None:
+                self.circle(sounding, pyxel.COLOR_YELLOW)
+
+        if self.components_enabled:
+            graphics.text(
+                160,
+                10,
+                "DAG" if self.strong_components.is_dag else f"{self.strong_components.cycles} cyclic components",
+                pyxel.COLOR_WHITE,
+            )
+
+    def circle(self, node: node_toy.NodeToy, color: int) -> None:
+        """
+        Draw a circle around a `node`.
+        """
+        bounds: tuple[float, float, float, float] = node.bounds()
+        graphics.circb(node.position[0], node.position[1], (bounds[2] - bounds[0]) / 2 + 2, color)
+
+    def arc_arrays(self) -> tuple[Any, Any]:
+        """
+        Get the arcs as (origin slots, end slots) `numpy` arrays, rebuilt only after changes.
+        """
+        assert arrays.numpy is not None
+        if self._arc_arrays is None or self._arc_arrays[2] != self._arcs_version:
+            numpy: Any = arrays.numpy
+            # CSR positions follow the slot order: mapped back to slots.
+            slots: Any = numpy.array(self.arcs.slots(), dtype=numpy.int64)
+            pointers, indices, _ = self.arcs.to_csr()
+            self._arc_arrays = (
+                numpy.repeat(slots, numpy.diff(numpy.frombuffer(pointers, dtype=numpy.int64))),
+                slots[numpy.frombuffer(indices, dtype=numpy.int64)],
+                self._arcs_version,
+            )
+
+        return self._arc_arrays[0], self._arc_arrays[1]
+
+    def draw_vectorized(
+        self,
+        viewport: tuple[float, float, float, float],
+        arcs_viewport: tuple[float, float, float, float],
+        exclude: node_toy.NodeToy | None = None,
+    ) -> None:
+        """
+        Draw with the culling done as batched `numpy` operations on `node_arrays`.
+        """
+        assert self.node_arrays is not None
+        positions: Any = self.node_arrays.positions
+        excluded: int = -1 if exclude is None else self.arcs.index(exclude)
+
+        # Arcs.
+        origins, ends = self.arc_arrays()
+        if exclude is not None:
+            kept: Any = (origins != excluded) & (ends != excluded)
+            origins, ends = origins[kept], ends[kept]
+        crossing: Any = arrays.segments_in_rectangle(positions[origins], positions[ends], arcs_viewport)
+        self.culled_arcs = int(len(crossing) - crossing.sum())
+        origins, ends = origins[crossing], ends[crossing]
+
+        # Nodes.
+        sizes: Any = (
+            node_toy.NodeToy.SPRITE_SIZE[0] 
+            * (self.node_arrays.radii / node_toy.NodeToy.SPRITE_SIZE[0] * self.node_arrays.scales) 
+        )
+        visible: Any = self.node_arrays.visible(viewport, sizes / 2)
+        if exclude is not None:
+            visible = visible[visible != excluded]
+        self.culled_nodes = self.card - len(visible)
+        self.detail_level = detail.level(
+            detail.coverage(float((sizes[visible] ** 2).sum()), len(origins), viewport),
+            self.detail_level,
+        )
+
+        if self.detail_level >= detail.Detail.CLUSTERS:
+            keys, counts = detail.cells_array(positions[visible])
+            self.draw_clusters(
+                {(x, y): count for (x, y), count in zip(keys.tolist(), counts.tolist())},
+                map(tuple, detail.links_array(positions[origins], positions[ends]).tolist()),
+            )
+            return
+
+        text: bool = self.detail_level == detail.Detail.FULL
+        lines: bool = self.detail_level >= detail.Detail.LINES
+        # Arrow geometries all at once, then only blits and lines.
+        geometries: list[Any] = (
+            [None] * len(origins)
+            if lines
+            else graphics.arrow_geometries(
+                positions[origins], positions[ends], self.node_arrays.radii[ends], node_toy.NodeToy.ARC_SHIFT,
+            )
+        )
+        for origin, end, geometry in zip(origins.tolist(), ends.tolist(), geometries):
+            node: node_toy.NodeToy = self.arcs.item(origin)
+            weight: float | None = self.arcs.weight(origin, end)
+            if weight is None:
+                continue
+            if node.is_selected:
+                graphics.dither(0.8)
+            node.draw_arc(self.arcs.item(end), weight, self.show_weights and text, lines, geometry)
+            if node.is_selected:
+                graphics.dither(1.0)
+
+        for slot in visible.tolist():
+            self.arcs.item(slot).draw(text)
+
+    def viewport(self) -> tuple[float, float, float, float]:
+        """
+        Visible rectangle of the screen: (x min, y min, x max, y max).
+        """
+        return (0.0, 0.0, float(backend.current.width), float(backend.current.height))
     
     def display_register(self) -> str:
         """
         Get a formatted string of the `_register`.
         """
-        return "GraphToy._register: \n" + ", \n".join([f"{name}: {node.display('  ')}" for name, node in self._register.items()])
+        return "GraphToy._register: \n" + ", \n".join([f"{name}: {self._register[identifier].display('  ')}" for name, identifier in self._ids.items()])
         
-    def display_adjacency(self) -> str:
+    def _row_reader(self, heads: list[node_toy.NodeToy]) -> tables.Row:
         """
-        Get a formatted string of the adjacency matrix.
+        Get a reader of the outgoing arcs of `heads[index]`, indexed by position in `heads`.
+        Removed nodes are skipped.
+        """
+        position: dict[node_toy.NodeToy, int] = {node: index for index, node in enumerate(heads)}
+
+        def row(index: int) -> dict[int, float]:
+            arcs: dict[int, float] = dict()
+            if heads[index] not in self.arcs:
+                return arcs
+
+            for end, weight in self.arcs.row(self.arcs.index(heads[index])).items():
+                column: int | None = position.get(self.arcs.item(end))
+                if column is not None:
+                    arcs[column] = weight
+
+            return arcs
+
+        return row
+
+    def adjacency_lines(
+        self,
+        rows: range | None = None,
+        columns: range | None = None,
+    ) -> Iterator[str]:
+        """
+        Yield the lines of the adjacency matrix, optionally windowed to `rows` and `columns`.
         """
-        matrix: list[list[float]] = list()
         heads: list[node_toy.NodeToy] = [node for node in self._register.values()]
-        columns_size: list[int] = [0 for _ in range(len(heads))]
-        column_separator: str = "│"
-
-        for head in heads:
-            adjacency: list[float] = list()
-            for index in range(len(heads)):
-                if heads[index] in head.get_next():
-                    adjacency.append(head.get_next()[heads[index]])
-                else:
-                    adjacency.append(0)
-            matrix.append(adjacency)
-
-        # Get sizes.
-        for index in range(len(heads)):
-            head = str(heads[index].get_name())
-            if len(head) > columns_size[index]:
-                columns_size[index] = len(head)
-
-        for index_row in range(len(matrix)):
-            for index_column in range(len(matrix[index_row])):
-                weight: str = str(matrix[index_row][index_column])
-                if len(weight) > columns_size[index_column]:
-                    columns_size[index_column] = len(weight)
-
-        total_length: int = 3
-        row_separator: str = "\n─┼"
-        for size in columns_size:
-            total_length += size + 1
-            row_separator += "─" * size + "┼"
-
-        row_separator += "\n"
-
-        # Format.
-        table: list[str] = [" " + column_separator + column_separator.join([
-            graphics.justify(heads[index_column].get_name(), columns_size[index_column]) 
-            for index_column in range(len(heads))
-        ])]
-
-        for index_row in range(len(matrix)):
-            line: str = heads[index_row].get_name() + column_separator
-            for index_column in range(len(matrix[index_row])):
-                weight: str = str(matrix[index_row][index_column])
-                line += graphics.justify(weight, columns_size[index_column]) + column_separator
-            
-            table.append(line)
+        return tables.adjacency_lines(
+            [head.get_name() for head in heads],
+            self._row_reader(heads),
+            rows,
+            columns,
+        )
 
-        return row_separator.join(table)
+    def dictionary_lines(self, tab: str = "  ", rows: range | None = None) -> Iterator[str]:
+        """
+        Yield the lines of the dictionary of neighbors, optionally windowed to `rows`.
+        """
+        heads: list[node_toy.NodeToy] = [node for node in self._register.values()]
+        return tables.dictionary_lines(
+            [head.get_name() for head in heads],
+            self._row_reader(heads),
+            tab,
+            rows,
+        )
+
+    def display_adjacency(self) -> str:
+        """
+        Get a formatted string of the adjacency matrix.
+        """
+        return "\n".join(self.adjacency_lines())
 
     def display_dict(self, tab: str = "  ") -> str:
         """
         Get the dictionary of neighbors.
         """
-        lines: list[str] = ["{"]
-        for name, node in self._register.items():
-            following: list[str] = [
-                f"{node.get_name()}: {weight}" 
-                for node, weight in node.get_next().items()
-            ]
-            lines.append(f"{tab}{name}: \x7b{', '.join(following)}\x7d")
-        
-        return ", \n".join(lines)
+        return ", \n".join(self.dictionary_lines(tab))
+
+    def snapshot(self) -> 'GraphSnapshot':
+        """
+        Get a frozen copy of the names, positions and arcs, safe to read from another thread.
+        """
+        heads: list[node_toy.NodeToy] = [node for node in self._register.values()]
+        row: tables.Row = self._row_reader(heads)
+        return GraphSnapshot(
+            [head.get_name() for head in heads],
+            [head.position for head in heads],
+            [row(index) for index in range(len(heads))],
+        )
+
+
+class GraphSnapshot:
+    """
+    # `GraphSnapshot`, frozen copy of a `GraphToy`.
+    Nodes are indexed by their position in the register.
+    """
+    names: list[str]
+    positions: list[tuple[float, float]]
+    # Outgoing arcs of each node: {end index: weight}, read-only.
+    rows: list[Mapping[int, float]]
+
+    def __init__(
+        self,
+        names: list[str],
+        positions: list[tuple[float, float]],
+        rows: list[Mapping[int, float]],
+    ) -> None:
+        self.names = names
+        self.positions = positions
+        self.rows = rows
+
+    @property
+    def card(self) -> int:
+        """
+        Returns the _Card_, or the number total of nodes.
+        """
+        return len(self.names)
+
+    def adjacency_lines(
+        self,
+        rows: range | None = None,
+        columns: range | None = None,
+    ) -> Iterator[str]:
+        """
+        Yield the lines of the adjacency matrix, optionally windowed to `rows` and `columns`.
+        """
+        return tables.adjacency_lines(self.names, self.rows.__getitem__, rows, columns)
+
+    def dictionary_lines(self, tab: str = "  ", rows: range | None = None) -> Iterator[str]:
+        """
+        Yield the lines of the dictionary of neighbors, optionally windowed to `rows`.
+        """
+        return tables.dictionary_lines(self.names, self.rows.__getitem__, tab, rows)
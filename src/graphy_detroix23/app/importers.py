@@ -0,0 +1,207 @@
+"""
+# Graphy.
+/src/graphy_detroix23/app/importers.py
+
+Streaming import of graphs from edge lists, CSV and GraphML files.
+"""
+
+import csv
+import pathlib
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Callable, Iterable, Iterator
+
+from graphy_detroix23.app import graph_toy, node_toy
+
+Edge = tuple[str, str, float]
+"""
+(origin name, end name, weight).
+"""
+
+class ImportReport:
+    """
+    # `ImportReport` of an import: counts and throughput.
+    """
+    path: pathlib.Path
+    nodes: int
+    edges: int
+    seconds: float
+
+    def __init__(self, path: pathlib.Path, nodes: int, edges: int, seconds: float) -> None:
+        self.path = path
+        self.nodes = nodes
+        self.edges = edges
+        self.seconds = seconds
+
+    @property
+    def edges_per_second(self) -> float:
+        """
+        Throughput, in edges per second.
+        """
+        return self.edges / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self) -> str:
+        return f"Imported {self.path}: {self.nodes} nodes, {self.edges} edges in {self.seconds:.2f}s \
+({self.edges_per_second:.0f} edges/s)."
+
+
+def insert(graph: graph_toy.GraphToy, edges: Iterable[Edge], batch: int = 4096) -> tuple[int, int]:
+    """
+    Insert streamed `edges` in `graph`, adding the missing nodes.
+    Edges are buffered `batch` at a time, grouped by origin for `batch_next`.
+    Returns the numbers of nodes and edges added.
+    """
+    nodes_before: int = graph.card
+    count: int = 0
+    pending: dict[str, list[tuple[str, float]]] = dict()
+    buffered: int = 0
+
+    for origin, end, weight in edges:
+        pending.setdefault(origin, list()).append((end, weight))
+        buffered += 1
+        count += 1
+        if buffered >= batch:
+            _flush(graph, pending)
+            pending = dict()
+            buffered = 0
+
+    _flush(graph, pending)
+    return graph.card - nodes_before, count
+
+def _flush(graph: graph_toy.GraphToy, pending: dict[str, list[tuple[str, float]]]) -> None:
+    for origin, ends in pending.items():
+        if origin not in graph:
+            graph.add(origin)
+        arcs: list[tuple[node_toy.NodeToy, float]] = list()
+        for end, weight in ends:
+            if end not in graph:
+                graph.add(end)
+            arcs.append((graph[end], weight))
+        graph[origin].batch_next(arcs)
+
+def edge_list_edges(path: pathlib.Path, default_weight: float = 1.0) -> Iterator[Edge]:
+    """
+    Stream the edges of an edge list: `origin end [weight]` per line, `#` for comments.
+    """
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            fields: list[str] = line.split("#", 1)[0].split()
+            if len(fields) < 2:
+                continue
+            yield fields[0], fields[1], float(fields[2]) if len(fields) > 2 else default_weight
+
+def csv_edges(
+    path: pathlib.Path,
+    source: str = "source",
+    target: str = "target",
+    weight: str = "weight",
+    default_weight: float = 1.0,
+) -> Iterator[Edge]:
+    """
+    Stream the edges of a CSV file.
+    With a header, the `source`, `target` and `weight` columns are used, else the first three.
+    """
+    with open(path, encoding="utf-8", newline="") as file:
+        reader: Iterator[list[str]] = csv.reader(file)
+        header: list[str] | None = next(reader, None)
+        if header is None:
+            return
+
+        columns: tuple[int, int, int | None]
+        if source in header and target in header:
+            columns = (header.index(source), header.index(target), header.index(weight) if weight in header else None)
+        else:
+            columns = (0, 1, 2)
+            # No header: the first row is an edge.
+            reader = _chain([header], reader)
+
+        for row in reader:
+            if len(row) < 2:
+                continue
+            value: float = default_weight
+            if columns[2] is not None and columns[2] < len(row) and row[columns[2]].strip():
+                value = float(row[columns[2]])
+            yield row[columns[0]].strip(), row[columns[1]].strip(), value
+
+def _chain(first: list[list[str]], rest: Iterator[list[str]]) -> Iterator[list[str]]:
+    yield from first
+    yield from rest
+
+def graphml_edges(
+    path: pathlib.Path,
+    default_weight: float = 1.0,
+    on_node: Callable[[str], None] | None = None,
+) -> Iterator[Edge]:
+    """
+    Stream the edges of a GraphML file. The edge data key named `weight` gives the weight.
+    Undirected graphs yield both directions. Each node id is also given to `on_node`, for isolated nodes.
+    Parsed elements are cleared, so memory does not grow with the file.
+    """
+    weight_key: str | None = None
+    weight_default: float = default_weight
+    directed: bool = True
+    parent: ElementTree.Element | None = None
+
+    for event, element in ElementTree.iterparse(path, events=("start", "end")):
+        tag: str = element.tag.rsplit("}", 1)[-1]
+
+        if event == "start":
+            if tag == "graph":
+                directed = element.get("edgedefault", "directed") != "undirected"
+                parent = element
+            continue
+
+        if tag == "key":
+            if element.get("for") in ("edge", "all") and element.get("attr.name") == "weight":
+                weight_key = element.get("id")
+                for child in element:
+                    if child.tag.rsplit("}", 1)[-1] == "default" and child.text:
+                        weight_default = float(child.text)
+
+        elif tag == "edge":
+            value: float = weight_default
+            for child in element:
+                if child.tag.rsplit("}", 1)[-1] == "data" and child.get("key") == weight_key and child.text:
+                    value = float(child.text)
+            origin: str = element.get("source", "")
+            end: str = element.get("target", "")
+            yield origin, end, value
+            if not directed and element.get("directed") != "true" and origin != end:
+                yield end, origin, value
+
+        elif tag == "node" and on_node is not None:
+            on_node(element.get("id", ""))
+
+        # Drop the parsed children of the graph.
+        if tag in ("edge", "node") and parent is not None:
+            parent.clear()
+
+def import_file(
+    graph: graph_toy.GraphToy,
+    path: pathlib.Path,
+    layout: bool = False,
+    batch: int = 4096,
+) -> ImportReport:
+    """
+    Import a graph file in `graph`, by extension: `.graphml`, `.csv`, else an edge list.
+    Then spread the nodes, or start the force-directed `layout`.
+    """
+    edges: Iterator[Edge]
+    suffix: str = path.suffix.lower()
+    if suffix == ".graphml":
+        edges = graphml_edges(path, on_node=lambda name: None if name in graph else graph.add(name))
+    elif suffix == ".csv":
+        edges = csv_edges(path)
+    else:
+        edges = edge_list_edges(path)
+
+    start: float = time.perf_counter()
+    nodes, count = insert(graph, edges, batch)
+    seconds: float = time.perf_counter() - start
+
+    if graph.card > 0:
+        graph.default_position(100.0 + graph.card)
+        if layout and not graph.layout_enabled:
+            graph.toggle_layout()
+
+    return ImportReport(path, nodes, count, seconds)
@@ -6,11 +6,10 @@
 import enum
 from typing import TYPE_CHECKING
 
-import pyxel
-
 if TYPE_CHECKING:
     from graphy_detroix23.app import base
 from graphy_detroix23.modules import (
+    backend,
     defaults,
     graphics,
 )
@@ -70,9 +69,9 @@ class Mouse:
         """
 
         if self.state == State.HOLD:
-            pyxel.blt(
-                pyxel.mouse_x + self.SPRITE_HOLD.offset[0],
-                pyxel.mouse_y + self.SPRITE_HOLD.offset[1],
+            graphics.blt(
+                backend.current.mouse_x + self.SPRITE_HOLD.offset[0],
+                backend.current.mouse_y + self.SPRITE_HOLD.offset[1],
                 self.SPRITE_HOLD.image,
                 self.SPRITE_HOLD.position[0],
                 self.SPRITE_HOLD.position[1],
@@ -83,9 +82,9 @@ class Mouse:
             )
         
         elif self.state == State.DRAW:
-            pyxel.blt(
-                pyxel.mouse_x + self.SPRITE_DRAW.offset[0],
-                pyxel.mouse_y + self.SPRITE_DRAW.offset[1],
+            graphics.blt(
+                backend.current.mouse_x + self.SPRITE_DRAW.offset[0],
+                backend.current.mouse_y + self.SPRITE_DRAW.offset[1],
                 self.SPRITE_DRAW.image,
                 self.SPRITE_DRAW.position[0],
                 self.SPRITE_DRAW.position[1],
@@ -96,9 +95,9 @@ class Mouse:
             )
         
         else:
-            pyxel.blt(
-                pyxel.mouse_x + self.SPRITE_SELECT.offset[0],
-                pyxel.mouse_y + self.SPRITE_SELECT.offset[1],
+            graphics.blt(
+                backend.current.mouse_x + self.SPRITE_SELECT.offset[0],
+                backend.current.mouse_y + self.SPRITE_SELECT.offset[1],
                 self.SPRITE_SELECT.image,
                 self.SPRITE_SELECT.position[0],
                 self.SPRITE_SELECT.position[1],
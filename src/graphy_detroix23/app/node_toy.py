@@ -3,10 +3,14 @@
 /src/graphy_detroix23/app/node_toy.py
 """
 
+from typing import TYPE_CHECKING, Callable, Iterable, Sequence
+
 import pyxel
 
 import structures_detroix23 as structures
-from graphy_detroix23.modules import defaults, graphics
+if TYPE_CHECKING:
+    from graphy_detroix23.app import graph_toy
+from graphy_detroix23.modules import arrays, defaults, graphics
 
 class NodeToy(structures.nodes.Node):
     """
@@ -17,13 +21,26 @@ class NodeToy(structures.nodes.Node):
     SPRITE_SIZE: tuple[int, int] = (16, 16)
     SPRITE_IMAGE: int = 0
     SPRITE_COLKEY: int = defaults.COLKEY
+    # Side offset of the arcs, so the two directions do not overlap.
+    ARC_SHIFT: float = 5.0
+
+    # Nodes are keys of most indexes: hashed by identity, in C, instead of by `get_id`.
+    # Consistent with the equality of `Node`, by identity too.
+    __hash__ = object.__hash__
 
-    position: tuple[float, float]
+    _position: tuple[float, float]
     # Actual screen radius, in pixels.
-    radius: float
+    _radius: float
     # Sprite scale.
-    scale: float
+    _scale: float
     is_selected: bool
+    # Color of the strongly connected component, if shown.
+    component_color: int | None
+    # Graph notified of the arcs changes.
+    owner: 'graph_toy.GraphToy | None'
+    # Arrays holding the spacial state instead, and the row in them.
+    _arrays: arrays.NodeArrays | None
+    _slot: int
 
     def __init__(
         self,
@@ -35,49 +52,282 @@ class NodeToy(structures.nodes.Node):
         Initialize the `NodeToy` from `Node`.
         """
         super().__init__(name, previous, next)
-        self.position = (100.0, 100.0)
-        self.radius = 32
-        self.scale = 1.0
+        # Not attached yet: the spacial state is set directly, not through the properties.
+        self._arrays = None
+        self._slot = -1
+        self._position = (100.0, 100.0)
+        self._radius = 32
+        self._scale = 1.0
         self.is_selected = False
+        self.component_color = None
+        self.owner = None
 
     def __repr__(self) -> str:
         return f"Node(name={self._name}, id={self._id}, previous={self._previous}, \
 next={self._next}, position={self.position}, scale={self.scale}, radius={self.radius})"
 
-    def draw(self, show_weights: bool) -> None:
+    @property
+    def position(self) -> tuple[float, float]:
         """
-        Draw this `NodeToy`.
+        Center of the node, on screen.
         """
-        scale: float = self.radius / self.SPRITE_SIZE[0] * self.scale
+        if self._arrays is not None:
+            return (float(self._arrays.positions[self._slot, 0]), float(self._arrays.positions[self._slot, 1]))
 
-        if self.is_selected:
-            pyxel.dither(0.8)
+        return self._position
+
+    @position.setter
+    def position(self, position: tuple[float, float]) -> None:
+        if self._arrays is not None:
+            self._arrays.positions[self._slot] = position
+        else:
+            self._position = position
+
+    @property
+    def radius(self) -> float:
+        """
+        Actual screen radius, in pixels.
+        """
+        if self._arrays is not None:
+            return float(self._arrays.radii[self._slot])
+
+        return self._radius
+
+    @radius.setter
+    def radius(self, radius: float) -> None:
+        if self._arrays is not None:
+            self._arrays.radii[self._slot] = radius
+        else:
+            self._radius = radius
+
+    @property
+    def scale(self) -> float:
+        """
+        Sprite scale.
+        """
+        if self._arrays is not None:
+            return float(self._arrays.scales[self._slot])
+
+        return self._scale
+
+    @scale.setter
+    def scale(self, scale: float) -> None:
+        if self._arrays is not None:
+            self._arrays.scales[self._slot] = scale
+        else:
+            self._scale = scale
+
+    def attach(self, node_arrays: arrays.NodeArrays, slot: int) -> None:
+        """
+        Move the spacial state into the row `slot` of `node_arrays`.
+        """
+        node_arrays.attach(slot, self.position, self.radius, self.scale)
+        self._arrays = node_arrays
+        self._slot = slot
+
+    @staticmethod
+    def attach_many(nodes: Sequence['NodeToy'], node_arrays: arrays.NodeArrays, slots: Sequence[int]) -> None:
+        """
+        `attach` each of the `nodes` to its row of `slots`, the arrays filled at once.
+        """
+        node_arrays.attach_many(
+            slots,
+            [node._position for node in nodes],
+            [node._radius for node in nodes],
+            [node._scale for node in nodes],
+        )
+        for node, slot in zip(nodes, slots):
+            node._arrays = node_arrays
+            node._slot = slot
+
+    def detach(self) -> None:
+        """
+        Move the spacial state back out of the arrays.
+        """
+        if self._arrays is None:
+            return
 
-        # Arcs.
+        position: tuple[float, float] = self.position
+        radius: float = self.radius
+        scale: float = self.scale
+        self._arrays.detach(self._slot)
+        self._arrays = None
+        self._slot = -1
+        self._position = position
+        self._radius = radius
+        self._scale = scale
+
+    def set_next(self, node: structures.nodes.Node, weight: float) -> None:
+        """
+        Add or update the arc to `node`, notifying the `owner`.
+        """
+        super().set_next(node, weight)
+        if self.owner is not None and isinstance(node, NodeToy):
+            self.owner.arc_set(self, node, weight)
+
+    def remove_next(self, node: structures.nodes.Node) -> None:
+        """
+        Remove the arc to `node`, notifying the `owner`.
+        """
+        super().remove_next(node)
+        if self.owner is not None and isinstance(node, NodeToy):
+            self.owner.arc_removed(self, node)
+
+    def batch_next(self, nodes: Iterable[tuple[structures.nodes.Node, float]]) -> None:
+        """
+        Add or update several arcs at once, notifying the `owner` of each.
+        """
+        for node, weight in nodes:
+            self.set_next(node, weight)
+
+    def link(self, nodes: Iterable[tuple[structures.nodes.Node, float]]) -> None:
+        """
+        Add or update several arcs at once, without notifying the `owner`. The caller updates it.
+        Like `unlink`, through the methods of `Node`: its `batch_next` dispatches back to this class.
+        """
+        set_next: Callable[[structures.nodes.Node, float], None] = super().set_next
+        for node, weight in nodes:
+            set_next(node, weight)
+
+    def unlink(self, predecessors: Iterable['NodeToy']) -> None:
+        """
+        Remove the arcs from this `NodeToy`, and to it from its `predecessors`, without notifying the `owner`.
+        O(degree): the nodes that are not neighbors are not scanned.
+        """
+        for predecessor in predecessors:
+            if predecessor is not self:
+                super(NodeToy, predecessor).remove_next(self)
+        for neighbor in list(self.get_next()):
+            super().remove_next(neighbor)
+
+    @property
+    def sprite_scale(self) -> float:
+        """
+        Scale applied to the sprite when drawn.
+        """
+        return self.radius / self.SPRITE_SIZE[0] * self.scale
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        """
+        Screen bounding box of the drawn sprite: (x min, y min, x max, y max).
+        """
+        half: tuple[float, float] = (
+            self.SPRITE_SIZE[0] * self.sprite_scale / 2,
+            self.SPRITE_SIZE[1] * self.sprite_scale / 2,
+        )
+        return (
+            self.position[0] - half[0],
+            self.position[1] - half[1],
+            self.position[0] + half[0],
+            self.position[1] + half[1],
+        )
+
+    def visible_arcs(
+        self,
+        viewport: tuple[float, float, float, float] | None = None,
+        exclude: 'NodeToy | None' = None,
+    ) -> tuple[list[tuple['NodeToy', float]], int]:
+        """
+        Get the outgoing arcs (neighbor, weight) crossing the `viewport`, except the one to `exclude`.
+        Returns them with the number of skipped arcs.
+        """
+        arcs: list[tuple[NodeToy, float]] = list()
+        culled: int = 0
         for neighbor, weight in self.get_next().items():
-            if isinstance(neighbor, NodeToy):
-                graphics.arrow(
+            if isinstance(neighbor, NodeToy) and neighbor is not exclude:
+                if viewport is not None and not graphics.segment_in_rectangle(
                     self.position[0],
                     self.position[1],
                     neighbor.position[0],
                     neighbor.position[1],
-                    color=pyxel.COLOR_LIGHT_BLUE,
-                    scale=1.0,
-                    shorten=neighbor.radius,
-                    shift=5.0,
-                )
+                    viewport,
+                ):
+                    culled += 1
+                    continue
+
+                arcs.append((neighbor, weight))
+
+        return arcs, culled
+
+    def draw_arcs(
+        self, 
+        show_weights: bool, 
+        viewport: tuple[float, float, float, float] | None = None,
+        exclude: 'NodeToy | None' = None,
+        lines: bool = False,
+    ) -> int:
+        """
+        Draw the outgoing arcs of this `NodeToy`, except the one to `exclude`.
+        Arcs not crossing the `viewport` (x min, y min, x max, y max) are skipped.
+        Returns the number of skipped arcs.
+        """
+        arcs, culled = self.visible_arcs(viewport, exclude)
 
-                if show_weights:
-                    pyxel.text(
-                        (self.position[0] + neighbor.position[0]) / 2,
-                        (self.position[1] + neighbor.position[1]) / 2,
-                        str(weight),
-                        col=pyxel.COLOR_NAVY,
-                        font=defaults.FONT_BIG_BLUE,
+        if self.is_selected:
+            graphics.dither(0.8)
+
+        for neighbor, weight in arcs:
+            self.draw_arc(neighbor, weight, show_weights, lines)
+
+        if self.is_selected:
+            graphics.dither(1.0)
+
+        return culled
+
+    def draw_arc(
+        self,
+        neighbor: 'NodeToy',
+        weight: float,
+        show_weights: bool,
+        lines: bool = False,
+        geometry: graphics.Arrow | Sequence[float] | None = None,
+    ) -> None:
+        """
+        Draw a single arc, to `neighbor`. With `lines`, a plain line without arrow head.
+        The arrow `geometry` is taken from the `owner` cache if not given.
+        """
+        if lines:
+            graphics.line(
+                self.position[0],
+                self.position[1],
+                neighbor.position[0],
+                neighbor.position[1],
+                pyxel.COLOR_LIGHT_BLUE,
+            )
+        else:
+            if geometry is None:
+                geometry = (
+                    self.owner.arrow(self, neighbor)
+                    if self.owner is not None
+                    else graphics.arrow_geometry(
+                        self.position[0],
+                        self.position[1],
+                        neighbor.position[0],
+                        neighbor.position[1],
+                        neighbor.radius,
+                        self.ARC_SHIFT,
                     )
+                )
+            graphics.draw_arrow(geometry, pyxel.COLOR_LIGHT_BLUE)
+
+        if show_weights:
+            graphics.text(
+                (self.position[0] + neighbor.position[0]) / 2,
+                (self.position[1] + neighbor.position[1]) / 2,
+                str(weight),
+                pyxel.COLOR_NAVY,
+                font=defaults.FONT_BIG_BLUE,
+            )
+
+    def draw(self, label: bool = True) -> None:
+        """
+        Draw this `NodeToy`: sprite and `label`.
+        """
+        if self.is_selected:
+            graphics.dither(0.8)
 
         # Main circle of the node.
-        pyxel.blt(
+        graphics.blt(
             self.position[0] - self.SPRITE_SIZE[0] // 2,
             self.position[1] - self.SPRITE_SIZE[1] // 2,
             self.SPRITE_IMAGE,
@@ -86,16 +336,21 @@ next={self._next}, position={self.position}, scale={self.scale}, radius={self.ra
             self.SPRITE_SIZE[0],
             self.SPRITE_SIZE[1],
             self.SPRITE_COLKEY,
-            scale=scale,
+            scale=self.sprite_scale,
         )
 
+        if self.component_color is not None:
+            bounds: tuple[float, float, float, float] = self.bounds()
+            graphics.circb(self.position[0], self.position[1], (bounds[2] - bounds[0]) / 2, self.component_color)
+
         # Label.
-        pyxel.text(
-            self.position[0] - self.SPRITE_SIZE[0] // 2 + 4,
-            self.position[1] - self.SPRITE_SIZE[1] // 2 + 2,
-            self.get_name(),
-            pyxel.COLOR_DARK_BLUE,
-            defaults.FONT_BIG_BLUE,
-        )
+        if label:
+            graphics.text(
+                self.position[0] - self.SPRITE_SIZE[0] // 2 + 4,
+                self.position[1] - self.SPRITE_SIZE[1] // 2 + 2,
+                self.get_name(),
+                pyxel.COLOR_DARK_BLUE,
+                defaults.FONT_BIG_BLUE,
+            )
 
-        pyxel.dither(1.0)
\ No newline at end of file
+        graphics.dither(1.0)
@@ -0,0 +1,216 @@
+"""
+# Graphy.
+/src/graphy_detroix23/app/storage.py
+
+Binary save and load of a `GraphToy`.
+
+Layout of a file, little-endian:
+- Header: magic `GRPY`, version, flags, nodes count, edges count, string table size.
+- Node records: name offset and length in the string table, x, y, radius.
+- Edge records: origin index, end index, weight.
+- String table: the names, UTF-8, back to back.
+"""
+
+import gc
+import mmap
+import pathlib
+import struct
+from typing import IO, Any, Iterator
+
+from graphy_detroix23.app import graph_toy, node_toy
+from graphy_detroix23.modules import arrays
+
+SUFFIX: str = ".graphy"
+MAGIC: bytes = b"GRPY"
+VERSION: int = 1
+
+HEADER: struct.Struct = struct.Struct("<4sHHIIQ")
+NODE: struct.Struct = struct.Struct("<IIddd")
+EDGE: struct.Struct = struct.Struct("<IId")
+
+class GraphFile:
+    """
+    # Memory-mapped `GraphFile`.
+    Opening only reads the header, records are decoded on access.
+    """
+    path: pathlib.Path
+    nodes_count: int
+    edges_count: int
+    _file: IO[bytes]
+    _map: mmap.mmap
+    _nodes_start: int
+    _edges_start: int
+    _strings_start: int
+    _strings_end: int
+
+    def __init__(self, path: pathlib.Path) -> None:
+        """
+        Raise a `ValueError` if `path` is not a readable Graphy file. Nothing is left open then.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as error:
+            # Empty files cannot be mapped.
+            self._file.close()
+            raise ValueError(f"{path} is empty or cannot be mapped: {error}") from error
+
+        try:
+            if len(self._map) < HEADER.size:
+                raise ValueError(f"{path} is too short to be a Graphy file.")
+            magic, version, _, self.nodes_count, self.edges_count, strings_size = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a Graphy file.")
+            if version != VERSION:
+                raise ValueError(f"{path} has an unsupported version {version}.")
+
+            self._nodes_start = HEADER.size
+            self._edges_start = self._nodes_start + self.nodes_count * NODE.size
+            self._strings_start = self._edges_start + self.edges_count * EDGE.size
+            self._strings_end = self._strings_start + strings_size
+            if self._strings_end > len(self._map):
+                raise ValueError(f"{path} is truncated.")
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> 'GraphFile':
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the mapping and the file.
+        """
+        self._map.close()
+        self._file.close()
+
+    def nodes(self) -> Iterator[tuple[str, tuple[float, float], float]]:
+        """
+        Yield each node: (name, position, radius).
+        Raise a `ValueError` if a name is out of the string table, or not UTF-8.
+        """
+        # Copied as `bytes`: no view of the mapping is left to block `close`, when raising.
+        records: bytes = self._map[self._nodes_start:self._edges_start]
+        for index, (offset, length, x, y, radius) in enumerate(NODE.iter_unpack(records)):
+            start: int = self._strings_start + offset
+            if start + length > self._strings_end:
+                raise ValueError(f"{self.path}: the name of node {index} is out of the string table.")
+            try:
+                name: str = self._map[start:start + length].decode("utf-8")
+            except UnicodeDecodeError as error:
+                raise ValueError(f"{self.path}: the name of node {index} is not UTF-8.") from error
+            yield name, (x, y), radius
+
+    def edges(self) -> Iterator[tuple[int, int, float]]:
+        """
+        Yield each edge: (origin index, end index, weight).
+        """
+        view: memoryview = memoryview(self._map)
+        try:
+            yield from EDGE.iter_unpack(view[self._edges_start:self._strings_start])
+        finally:
+            view.release()
+
+    def edge_arrays(self) -> tuple[Any, Any, Any]:
+        """
+        Get the edges as `numpy` arrays (origins, ends, weights), without copy. Needs `numpy`.
+        The arrays must be dropped before `close`.
+        """
+        if arrays.numpy is None:
+            raise ModuleNotFoundError("numpy is needed to map the edges.")
+
+        records: Any = arrays.numpy.frombuffer(
+            self._map,
+            dtype=arrays.numpy.dtype([("origin", "<u4"), ("end", "<u4"), ("weight", "<f8")]),
+            count=self.edges_count,
+            offset=self._edges_start,
+        )
+        return records["origin"], records["end"], records["weight"]
+
+
+def save(graph: graph_toy.GraphToy, path: pathlib.Path) -> None:
+    """
+    Write the nodes and arcs of a `graph` to `path`.
+    """
+    nodes: list[node_toy.NodeToy] = graph.nodes()
+    index: dict[node_toy.NodeToy, int] = {node: position for position, node in enumerate(nodes)}
+    strings: bytearray = bytearray()
+    edges_count: int = 0
+
+    with open(path, "wb") as file:
+        # Header rewritten at the end, once sizes are known.
+        file.write(bytes(HEADER.size))
+
+        records: list[bytes] = list()
+        for node in nodes:
+            name: bytes = node.get_name().encode("utf-8")
+            records.append(NODE.pack(len(strings), len(name), node.position[0], node.position[1], node.radius))
+            strings.extend(name)
+        file.write(b"".join(records))
+
+        for origin, node in enumerate(nodes):
+            records = list()
+            for neighbor, weight in node.get_next().items():
+                end: int | None = index.get(neighbor) if isinstance(neighbor, node_toy.NodeToy) else None
+                if end is not None:
+                    records.append(EDGE.pack(origin, end, weight))
+            file.write(b"".join(records))
+            edges_count += len(records)
+
+        file.write(strings)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(nodes), edges_count, len(strings)))
+
+def load(graph: graph_toy.GraphToy, path: pathlib.Path) -> None:
+    """
+    Replace the content of `graph` by the one saved at `path`.
+    The whole file is read and checked first: if it is invalid, a `ValueError` is raised and `graph` is untouched.
+    Nodes and arcs are then added in bulk, without a notification each.
+    The garbage collector is paused meanwhile: the millions of dictionaries created hold no cycle to collect.
+    Known limit: 3 to 4 s for 100k nodes and 1M arcs, spent filling the dictionaries of the nodes and of `arcs`.
+    """
+    collecting: bool = gc.isenabled()
+    gc.disable()
+    try:
+        with GraphFile(path) as graph_file:
+            records, origins, ends, weights = read(graph_file)
+
+        graph.clear()
+        nodes: list[node_toy.NodeToy] = graph.add_named(records)
+        graph.link_many(nodes, origins, ends, weights)
+    finally:
+        if collecting:
+            gc.enable()
+
+def read(
+    graph_file: GraphFile,
+) -> tuple[list[tuple[str, tuple[float, float], float]], list[int], list[int], list[float]]:
+    """
+    Get the nodes (name, position, radius) and the edge columns (origins, ends, weights) of a `graph_file`.
+    Raise a `ValueError` if a name is invalid or repeated, or an edge index is out of the nodes.
+    """
+    records: list[tuple[str, tuple[float, float], float]] = list(graph_file.nodes())
+    if len({name for name, _, _ in records}) != len(records):
+        raise ValueError(f"{graph_file.path} has several nodes of the same name.")
+
+    origins: list[int]
+    ends: list[int]
+    weights: list[float]
+    if arrays.numpy is not None:
+        # Copied out of the mapping, which cannot close while arrays view it.
+        origins, ends, weights = (column.tolist() for column in graph_file.edge_arrays())
+    else:
+        origins, ends, weights = list(), list(), list()
+        for origin, end, weight in graph_file.edges():
+            origins.append(origin)
+            ends.append(end)
+            weights.append(weight)
+
+    # Indices are unsigned.
+    if origins and max(max(origins), max(ends)) >= len(records):
+        raise ValueError(f"{graph_file.path} has an edge to a node out of its {len(records)}.")
+    return records, origins, ends, weights
@@ -0,0 +1,109 @@
+"""
+# Graphy.
+/src/graphy_detroix23/app/tasks.py
+
+Background work, out of the `pyxel` loop.
+"""
+
+import concurrent.futures
+import queue
+import sys
+import traceback
+from typing import Any, Callable, Generic, TypeVar
+
+Result = TypeVar("Result")
+
+class Task(Generic[Result]):
+    """
+    # Background `Task`.
+    The work may update `progress`, between 0 and 1, from its thread.
+    """
+    progress: float
+    done: Callable[[Result], None] | None
+    failed: Callable[[BaseException], None] | None
+    # Set by the main loop, once `done` or `failed` was called.
+    delivered: bool
+    result: Result | None
+    error: BaseException | None
+
+    def __init__(
+        self,
+        done: Callable[[Result], None] | None = None,
+        failed: Callable[[BaseException], None] | None = None,
+    ) -> None:
+        self.progress = 0.0
+        self.done = done
+        self.failed = failed
+        self.delivered = False
+        self.result = None
+        self.error = None
+
+
+class Executor:
+    """
+    # Thread-pool `Executor` of `Task`s.
+    Finished tasks are queued, and delivered to the main loop by `drain`, once per frame.
+    """
+    _pool: concurrent.futures.ThreadPoolExecutor
+    _finished: queue.SimpleQueue[Task[Any]]
+    pending: int
+
+    def __init__(self, workers: int = 2) -> None:
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="graphy")
+        self._finished = queue.SimpleQueue()
+        self.pending = 0
+
+    def submit(
+        self,
+        work: Callable[[Task[Result]], Result],
+        done: Callable[[Result], None] | None = None,
+        failed: Callable[[BaseException], None] | None = None,
+    ) -> Task[Result]:
+        """
+        Run `work` in a worker thread. It must not touch `pyxel` nor the live graph.
+        `done` or `failed` will be called from the main loop.
+        """
+        task: Task[Result] = Task(done, failed)
+        self.pending += 1
+        self._pool.submit(self._run, work, task)
+        return task
+
+    def _run(self, work: Callable[[Task[Result]], Result], task: Task[Result]) -> None:
+        try:
+            task.result = work(task)
+            task.progress = 1.0
+        except BaseException as error:
+            task.error = error
+
+        self._finished.put(task)
+
+    def drain(self) -> int:
+        """
+        Deliver the finished tasks. Returns how many were delivered.
+        """
+        delivered: int = 0
+        while True:
+            try:
+                task: Task[Any] = self._finished.get_nowait()
+            except queue.Empty:
+                break
+
+            self.pending -= 1
+            task.delivered = True
+            delivered += 1
+
+            if task.error is not None:
+                if task.failed is not None:
+                    task.failed(task.error)
+                else:
+                    traceback.print_exception(task.error, file=sys.stderr)
+            elif task.done is not None:
+                task.done(task.result)
+
+        return delivered
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers, dropping the tasks not started.
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
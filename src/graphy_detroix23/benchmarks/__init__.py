@@ -0,0 +1,7 @@
+"""
+# Graphy.
+/src/graphy_detroix23/benchmarks/__init__.py
+
+Headless benchmarks of the `GraphToy` hot paths.
+Run from the repository root: `python -m graphy_detroix23.benchmarks --help`.
+"""
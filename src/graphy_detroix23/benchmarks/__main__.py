@@ -0,0 +1,54 @@
+"""
+# Graphy.
+/src/graphy_detroix23/benchmarks/__main__.py
+
+Command line of the benchmarks.
+"""
+
+import argparse
+import pathlib
+import sys
+
+from graphy_detroix23.benchmarks import generators, runner
+
+def main() -> int:
+    """
+    Run the benchmarks, or compare two results.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="python -m graphy_detroix23.benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks.")
+    run.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    run.add_argument("--families", nargs="+", choices=list(generators.FAMILIES), default=list(generators.FAMILIES))
+    run.add_argument("--only", nargs="+", default=None, help="Benchmarks to run, all by default.")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--time", type=float, default=0.5, help="Minimum time per benchmark, in seconds.")
+    run.add_argument("--output", type=pathlib.Path, default=None, help="JSON file of the results.")
+
+    compare = commands.add_parser("compare", help="Find regressions between two JSON results.")
+    compare.add_argument("baseline", type=pathlib.Path)
+    compare.add_argument("current", type=pathlib.Path)
+    compare.add_argument("--threshold", type=float, default=0.2, help="Tolerated throughput loss.")
+
+    arguments: argparse.Namespace = parser.parse_args()
+
+    if arguments.command == "compare":
+        regressions: list[str] = runner.compare(arguments.baseline, arguments.current, arguments.threshold)
+        for regression in regressions:
+            print(regression)
+        return 1 if regressions else 0
+
+    results: list[runner.Result] = runner.run(
+        arguments.sizes,
+        arguments.families,
+        arguments.only,
+        arguments.seed,
+        arguments.time,
+    )
+    if arguments.output is not None:
+        runner.save(results, arguments.output)
+
+    return 0
+
+sys.exit(main())
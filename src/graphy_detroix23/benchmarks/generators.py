@@ -0,0 +1,66 @@
+"""
+# Graphy.
+/src/graphy_detroix23/benchmarks/generators.py
+
+Synthetic graphs, reproducible with a seed.
+"""
+
+import math
+import random
+from typing import Callable
+
+from graphy_detroix23.app import graph_toy, node_toy
+
+def _nodes(graph: graph_toy.GraphToy, count: int, rng: random.Random, spread: float) -> list[node_toy.NodeToy]:
+    for index in range(count):
+        graph.add(f"N{index}", (rng.uniform(0.0, spread), rng.uniform(0.0, spread)))
+    return graph.nodes()
+
+def random_graph(graph: graph_toy.GraphToy, count: int, seed: int = 0, degree: float = 2.0) -> None:
+    """
+    Erdős–Rényi like: `degree` arcs per node on average, to uniformly random ends.
+    """
+    rng: random.Random = random.Random(seed)
+    nodes: list[node_toy.NodeToy] = _nodes(graph, count, rng, 30.0 * math.sqrt(count))
+    for node in nodes:
+        node.batch_next([(rng.choice(nodes), 1.0) for _ in range(int(degree) + (rng.random() < degree % 1))])
+
+def grid_graph(graph: graph_toy.GraphToy, count: int, seed: int = 0) -> None:
+    """
+    Square grid, each node linked to its right and bottom neighbors.
+    """
+    side: int = max(1, math.isqrt(count))
+    for index in range(count):
+        graph.add(f"N{index}", ((index % side) * 40.0, (index // side) * 40.0))
+
+    nodes: list[node_toy.NodeToy] = graph.nodes()
+    for index, node in enumerate(nodes):
+        arcs: list[tuple[node_toy.NodeToy, float]] = list()
+        if (index + 1) % side != 0 and index + 1 < count:
+            arcs.append((nodes[index + 1], 1.0))
+        if index + side < count:
+            arcs.append((nodes[index + side], 1.0))
+        node.batch_next(arcs)
+
+def scale_free_graph(graph: graph_toy.GraphToy, count: int, seed: int = 0, links: int = 2) -> None:
+    """
+    Barabási–Albert preferential attachment: each new node links to `links` ends, chosen by degree.
+    """
+    rng: random.Random = random.Random(seed)
+    nodes: list[node_toy.NodeToy] = _nodes(graph, count, rng, 30.0 * math.sqrt(count))
+    # Each node appears once per arc end, plus once.
+    targets: list[node_toy.NodeToy] = nodes[:1]
+    for node in nodes[1:]:
+        ends: list[node_toy.NodeToy] = [rng.choice(targets) for _ in range(links)]
+        node.batch_next([(end, 1.0) for end in ends])
+        targets.extend(ends)
+        targets.append(node)
+
+FAMILIES: dict[str, Callable[[graph_toy.GraphToy, int, int], None]] = {
+    "random": random_graph,
+    "grid": grid_graph,
+    "scale_free": scale_free_graph,
+}
+"""
+Graph generators by name.
+"""
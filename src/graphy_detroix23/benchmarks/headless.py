@@ -0,0 +1,66 @@
+"""
+# Graphy.
+/src/graphy_detroix23/benchmarks/headless.py
+
+Run the app code without a window: a `Headless` backend whose screen only counts the drawing calls.
+"""
+
+import contextlib
+from typing import Any, Callable, Iterator
+
+from graphy_detroix23.modules import backend
+
+STUBBED: tuple[str, ...] = (
+    "blt", "line", "text", "rect", "rectb", "circ", "circb", "pset", "tri", "trib",
+    "dither", "pal", "cls", "camera", "clip",
+)
+"""
+Drawing methods of the screen, counted while headless.
+"""
+
+class Calls:
+    """
+    # `Calls` counter, a screen drawing nothing.
+    """
+    counts: dict[str, int]
+
+    def __init__(self) -> None:
+        self.counts = {name: 0 for name in STUBBED}
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        """
+        Drawing methods are no-ops that count their calls.
+        """
+        if name not in STUBBED:
+            raise AttributeError(name)
+        return self.stub(name)
+
+    def stub(self, name: str) -> Callable[..., None]:
+        """
+        Get a no-op replacement of the drawing method `name` that counts its calls.
+        """
+        def call(*_: Any, **__: Any) -> None:
+            self.counts[name] += 1
+
+        return call
+
+    def reset(self) -> None:
+        """
+        Set all the counts back to 0.
+        """
+        for name in self.counts:
+            self.counts[name] = 0
+
+
+@contextlib.contextmanager
+def headless(width: int = 700, height: int = 500) -> Iterator[Calls]:
+    """
+    Use a `Headless` backend of `width` × `height`, drawing nothing on screen and playing no sound.
+    The previous backend is restored on exit.
+    """
+    calls: Calls = Calls()
+    previous: backend.Backend = backend.use(backend.Headless(width, height, screen=calls))
+    try:
+        yield calls
+    finally:
+        backend.use(previous)
@@ -0,0 +1,236 @@
+"""
+# Graphy.
+/src/graphy_detroix23/benchmarks/runner.py
+
+Timing, memory and JSON results of the benchmarks.
+"""
+
+import json
+import pathlib
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import pyxel
+
+from graphy_detroix23.app import graph_toy
+from graphy_detroix23.benchmarks import generators, headless
+from graphy_detroix23.modules import backend, graphics
+
+class Result:
+    """
+    # `Result` of a benchmark, on one graph.
+    """
+    name: str
+    family: str
+    nodes: int
+    arcs: int
+    operations: int
+    seconds: float
+    p50: float
+    p99: float
+    peak_bytes: int
+
+    def __init__(
+        self,
+        name: str,
+        family: str,
+        nodes: int,
+        arcs: int,
+        samples: list[float],
+        peak_bytes: int,
+    ) -> None:
+        ordered: list[float] = sorted(samples)
+        self.name = name
+        self.family = family
+        self.nodes = nodes
+        self.arcs = arcs
+        self.operations = len(samples)
+        self.seconds = sum(samples)
+        self.p50 = ordered[len(ordered) // 2]
+        self.p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        self.peak_bytes = peak_bytes
+
+    @property
+    def key(self) -> str:
+        """
+        Identifier of the benchmark and graph, to compare runs.
+        """
+        return f"{self.name}/{self.family}/{self.nodes}"
+
+    @property
+    def ops_per_second(self) -> float:
+        """
+        Operations per second.
+        """
+        return self.operations / self.seconds if self.seconds > 0 else float("inf")
+
+    def to_json(self) -> dict[str, Any]:
+        """
+        Get a JSON-serializable `dict`.
+        """
+        return {
+            "key": self.key,
+            "name": self.name,
+            "family": self.family,
+            "nodes": self.nodes,
+            "arcs": self.arcs,
+            "operations": self.operations,
+            "ops_per_second": self.ops_per_second,
+            "p50_seconds": self.p50,
+            "p99_seconds": self.p99,
+            "peak_bytes": self.peak_bytes,
+        }
+
+    def __str__(self) -> str:
+        return f"{self.key:<40} {self.ops_per_second:>12.1f} ops/s  p50 {self.p50 * 1e6:>10.1f}µs  \
+p99 {self.p99 * 1e6:>10.1f}µs  peak {self.peak_bytes / 1024:>10.1f}KiB"
+
+
+def measure(operation: Callable[[], object], minimum_time: float = 0.5, maximum_operations: int = 10_000) -> list[float]:
+    """
+    Time `operation` repeatedly, for about `minimum_time` seconds. Returns each duration.
+    """
+    samples: list[float] = list()
+    deadline: float = time.perf_counter() + minimum_time
+    while len(samples) < maximum_operations and (len(samples) < 3 or time.perf_counter() < deadline):
+        start: float = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+def peak_memory(operation: Callable[[], object]) -> int:
+    """
+    Peak memory allocated by a single `operation`, in bytes.
+    """
+    tracemalloc.start()
+    try:
+        operation()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def operations(graph: graph_toy.GraphToy, seed: int) -> dict[str, Callable[[], object]]:
+    """
+    Get the benchmarked hot paths on a `graph`, by name.
+    """
+    rng: random.Random = random.Random(seed)
+    width: float = float(backend.current.width)
+    height: float = float(backend.current.height)
+
+    def select_node() -> object:
+        return graph.select_node((rng.uniform(0.0, width), rng.uniform(0.0, height)))
+
+    def arrow() -> None:
+        graphics.arrow(
+            rng.uniform(0.0, width), rng.uniform(0.0, height),
+            rng.uniform(0.0, width), rng.uniform(0.0, height),
+            color=pyxel.COLOR_LIGHT_BLUE,
+            shorten=32.0,
+            shift=5.0,
+        )
+
+    def redraw() -> None:
+        graph.invalidate()
+        graph.draw()
+
+    return {
+        "select_node": select_node,
+        # Idle frame, and frame after a change, with the retained layer.
+        "draw": graph.draw,
+        "redraw": redraw,
+        "display_adjacency": graph.display_adjacency,
+        "display_dict": graph.display_dict,
+        "arrow": arrow,
+    }
+
+QUADRATIC: tuple[str, ...] = ("display_adjacency",)
+"""
+Benchmarks with an output quadratic in the nodes, skipped above `quadratic_limit`.
+"""
+
+def run(
+    sizes: list[int],
+    families: list[str],
+    names: list[str] | None = None,
+    seed: int = 0,
+    minimum_time: float = 0.5,
+    quadratic_limit: int = 2_000,
+    log: Callable[[str], None] = print,
+) -> list[Result]:
+    """
+    Build each graph family at each size, headless, and benchmark the hot paths.
+    """
+    results: list[Result] = list()
+    with headless.headless():
+        for family in families:
+            for size in sizes:
+                graph: graph_toy.GraphToy = graph_toy.GraphToy()
+                generators.FAMILIES[family](graph, size, seed)
+                log(f"# {family}, {graph.card} nodes, {graph.arcs.arcs} arcs.")
+
+                for name, operation in operations(graph, seed).items():
+                    if names is not None and name not in names:
+                        continue
+                    if name in QUADRATIC and size > quadratic_limit:
+                        continue
+
+                    samples: list[float] = measure(operation, minimum_time)
+                    result: Result = Result(name, family, graph.card, graph.arcs.arcs, samples, peak_memory(operation))
+                    results.append(result)
+                    log(str(result))
+
+    return results
+
+def metadata() -> dict[str, Any]:
+    """
+    Describe the machine and the commit of a run.
+    """
+    commit: str | None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "python": sys.version,
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def save(results: list[Result], path: pathlib.Path) -> None:
+    """
+    Write the `results` and the metadata as JSON.
+    """
+    path.write_text(json.dumps({
+        "metadata": metadata(),
+        "results": [result.to_json() for result in results],
+    }, indent=2))
+
+def compare(baseline: pathlib.Path, current: pathlib.Path, threshold: float = 0.2) -> list[str]:
+    """
+    Compare two JSON results. Returns the regressions: throughput lower by more than `threshold`.
+    """
+    before: dict[str, dict[str, Any]] = {result["key"]: result for result in json.loads(baseline.read_text())["results"]}
+    regressions: list[str] = list()
+
+    for result in json.loads(current.read_text())["results"]:
+        old: dict[str, Any] | None = before.get(result["key"])
+        if old is None or old["ops_per_second"] <= 0:
+            continue
+
+        ratio: float = result["ops_per_second"] / old["ops_per_second"]
+        if ratio < 1.0 - threshold:
+            regressions.append(
+                f"{result['key']}: {old['ops_per_second']:.1f} -> {result['ops_per_second']:.1f} ops/s ({ratio:.0%})"
+            )
+
+    return regressions
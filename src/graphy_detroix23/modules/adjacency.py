@@ -0,0 +1,291 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/adjacency.py
+
+Persistent adjacency store, updated arc by arc instead of rebuilt.
+"""
+
+import array
+import heapq
+import itertools
+from typing import Generic, Hashable, Iterable, Sequence, TypeVar
+
+Item = TypeVar("Item", bound=Hashable)
+
+class Adjacency(Generic[Item]):
+    """
+    # `Adjacency` store of weighted arcs.
+    Each item gets an integer slot, reused after removal.
+    Arcs are kept both ways, as sparse rows (outgoing) and columns (incoming).
+    While the graph is small, a dense row-major matrix of weights is kept too.
+    """
+    DENSE_LIMIT: int = 256
+    """
+    Maximum capacity, in slots, of the dense matrix.
+    """
+
+    _index: dict[Item, int]
+    _slots: list[Item | None]
+    _free: list[int]
+    _rows: list[dict[int, float]]
+    _columns: list[dict[int, float]]
+    # Dense mirror of the weights, `None` when too large.
+    _dense: array.array[float] | None
+    _capacity: int
+    _arcs: int
+
+    def __init__(self) -> None:
+        self._index = dict()
+        self._slots = list()
+        self._free = list()
+        self._rows = list()
+        self._columns = list()
+        self._dense = array.array("d")
+        self._capacity = 0
+        self._arcs = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, item: Item) -> bool:
+        return item in self._index
+
+    @property
+    def arcs(self) -> int:
+        """
+        Total number of arcs.
+        """
+        return self._arcs
+
+    @property
+    def is_dense(self) -> bool:
+        """
+        Whether the dense matrix is maintained.
+        """
+        return self._dense is not None
+
+    def index(self, item: Item) -> int:
+        """
+        Get the slot of an `item`. Raise if it doesn't exist.
+        """
+        return self._index[item]
+
+    def item(self, slot: int) -> Item:
+        """
+        Get the item in a `slot`. Raise if empty.
+        """
+        item: Item | None = self._slots[slot]
+        if item is None:
+            raise KeyError(slot)
+
+        return item
+
+    def add(self, item: Item) -> int:
+        """
+        Add an `item` without arcs, returns its slot.
+        """
+        if item in self._index:
+            return self._index[item]
+
+        slot: int
+        if self._free:
+            slot = heapq.heappop(self._free)
+            self._slots[slot] = item
+        else:
+            slot = len(self._slots)
+            self._slots.append(item)
+            self._rows.append(dict())
+            self._columns.append(dict())
+            if slot >= self._capacity:
+                self._grow()
+
+        self._index[item] = slot
+        return slot
+
+    def remove(self, item: Item) -> None:
+        """
+        Remove an `item` and all its incoming and outgoing arcs, if present.
+        """
+        slot: int | None = self._index.pop(item, None)
+        if slot is None:
+            return
+
+        self._arcs -= len(self._rows[slot]) + len(self._columns[slot]) - (slot in self._rows[slot])
+        for end in self._rows[slot]:
+            del self._columns[end][slot]
+            self._set_dense(slot, end, 0.0)
+        for origin in self._columns[slot]:
+            if origin != slot:
+                del self._rows[origin][slot]
+                self._set_dense(origin, slot, 0.0)
+
+        self._rows[slot].clear()
+        self._columns[slot].clear()
+        self._slots[slot] = None
+        heapq.heappush(self._free, slot)
+
+    def set(self, origin: Item, end: Item, weight: float) -> None:
+        """
+        Add or update the arc from `origin` to `end`.
+        """
+        row: int | None = self._index.get(origin)
+        if row is None:
+            row = self.add(origin)
+        column: int | None = self._index.get(end)
+        if column is None:
+            column = self.add(end)
+        arcs: dict[int, float] = self._rows[row]
+        if column not in arcs:
+            self._arcs += 1
+        arcs[column] = weight
+        self._columns[column][row] = weight
+        self._set_dense(row, column, weight)
+
+    def extend(self, origins: Sequence[int], ends: Sequence[int], weights: Sequence[float]) -> None:
+        """
+        Add or update arcs between existing slots, in bulk: the arc from `origins[i]` to `ends[i]`.
+        Rows are updated a run of equal origins at a time.
+        """
+        rows: list[dict[int, float]] = self._rows
+        start: int = 0
+        for row, run in itertools.groupby(origins):
+            stop: int = start + len(list(run))
+            arcs: dict[int, float] = rows[row]
+            before: int = len(arcs)
+            arcs.update(zip(ends[start:stop], weights[start:stop]))
+            self._arcs += len(arcs) - before
+            start = stop
+
+        columns: list[dict[int, float]] = self._columns
+        for row, column, weight in zip(origins, ends, weights):
+            columns[column][row] = weight
+        if self._dense is not None:
+            for row, column, weight in zip(origins, ends, weights):
+                self._dense[row * self._capacity + column] = weight
+
+    def unset(self, origin: Item, end: Item) -> None:
+        """
+        Remove the arc from `origin` to `end`, if present.
+        """
+        row: int | None = self._index.get(origin)
+        column: int | None = self._index.get(end)
+        if row is None or column is None or column not in self._rows[row]:
+            return
+
+        del self._rows[row][column]
+        del self._columns[column][row]
+        self._set_dense(row, column, 0.0)
+        self._arcs -= 1
+
+    def weight(self, origin: int, end: int) -> float | None:
+        """
+        Get the weight of the arc between two slots, `None` if there is none.
+        """
+        return self._rows[origin].get(end)
+
+    def row(self, slot: int) -> dict[int, float]:
+        """
+        Outgoing arcs of a `slot`: {end slot: weight}. Do not mutate.
+        """
+        return self._rows[slot]
+
+    def column(self, slot: int) -> dict[int, float]:
+        """
+        Incoming arcs of a `slot`: {origin slot: weight}. Do not mutate.
+        """
+        return self._columns[slot]
+
+    def successors(self, item: Item) -> list[Item]:
+        """
+        Items reached by an arc from `item`.
+        """
+        return [self.item(slot) for slot in self._rows[self._index[item]]]
+
+    def predecessors(self, item: Item) -> list[Item]:
+        """
+        Items with an arc to `item`.
+        """
+        return [self.item(slot) for slot in self._columns[self._index[item]]]
+
+    def slots(self, items: Iterable[Item] | None = None) -> list[int]:
+        """
+        Get the slots of `items`, or of every item in slot order.
+        """
+        if items is None:
+            return [slot for slot, item in enumerate(self._slots) if item is not None]
+
+        return [self._index[item] for item in items]
+
+    def to_array(self, items: Iterable[Item] | None = None) -> array.array[float]:
+        """
+        Export a dense row-major matrix of the weights, 0 without arc, as a flat `array.array`.
+        Rows and columns follow `items`, or the slot order.
+        """
+        order: list[int] = self.slots(items)
+        size: int = len(order)
+
+        # Contiguous slots: copy the dense rows as they are.
+        if self._dense is not None and order == list(range(size)):
+            matrix: array.array[float] = array.array("d")
+            for row in range(size):
+                matrix.extend(self._dense[row * self._capacity:row * self._capacity + size])
+            return matrix
+
+        position: dict[int, int] = {slot: index for index, slot in enumerate(order)}
+        matrix = array.array("d", bytes(8 * size * size))
+
+        for row_index, slot in enumerate(order):
+            start: int = row_index * size
+            for end, weight in self._rows[slot].items():
+                column_index: int | None = position.get(end)
+                if column_index is not None:
+                    matrix[start + column_index] = weight
+
+        return matrix
+
+    def to_csr(
+        self,
+        items: Iterable[Item] | None = None,
+    ) -> tuple[array.array[int], array.array[int], array.array[float]]:
+        """
+        Export the weights in Compressed Sparse Row format: (row pointers, column indices, weights).
+        Rows and columns follow `items`, or the slot order.
+        """
+        order: list[int] = self.slots(items)
+        position: dict[int, int] = {slot: index for index, slot in enumerate(order)}
+        pointers: array.array[int] = array.array("q", [0])
+        indices: array.array[int] = array.array("q")
+        weights: array.array[float] = array.array("d")
+
+        for slot in order:
+            for end, weight in self._rows[slot].items():
+                column_index: int | None = position.get(end)
+                if column_index is not None:
+                    indices.append(column_index)
+                    weights.append(weight)
+            pointers.append(len(indices))
+
+        return pointers, indices, weights
+
+    def _grow(self) -> None:
+        """
+        Double the capacity, resizing or dropping the dense matrix.
+        """
+        old: int = self._capacity
+        self._capacity = max(16, 2 * old)
+
+        if self._capacity > self.DENSE_LIMIT:
+            self._dense = None
+            return
+
+        if self._dense is None:
+            return
+
+        dense: array.array[float] = array.array("d", bytes(8 * self._capacity * self._capacity))
+        for row in range(old):
+            dense[row * self._capacity:row * self._capacity + old] = self._dense[row * old:(row + 1) * old]
+        self._dense = dense
+
+    def _set_dense(self, row: int, column: int, weight: float) -> None:
+        if self._dense is not None:
+            self._dense[row * self._capacity + column] = weight
@@ -0,0 +1,320 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/analysis.py
+
+Shortest paths and reachability over integer slots, with results cached per source.
+"""
+
+import collections
+import heapq
+import math
+from typing import Callable, Iterable, Iterator, Mapping
+
+Row = Callable[[int], Mapping[int, float]]
+"""
+Outgoing arcs of a slot: {end slot: weight}.
+"""
+
+class Search:
+    """
+    # Dijkstra `Search` from a `source`, resumable.
+    Stopping at a target keeps the heap, a later query continues from there.
+    """
+    __slots__ = ("source", "distances", "parents", "settled", "_heap")
+
+    source: int
+    # Best known distances, final for the `settled` slots.
+    distances: dict[int, float]
+    parents: dict[int, int]
+    settled: set[int]
+    _heap: list[tuple[float, int]]
+
+    def __init__(self, source: int) -> None:
+        self.source = source
+        self.distances = {source: 0.0}
+        self.parents = dict()
+        self.settled = set()
+        self._heap = [(0.0, source)]
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether every reachable slot is settled.
+        """
+        return not self._heap
+
+    def run(self, row: Row, target: int | None = None) -> None:
+        """
+        Settle slots until `target` is, or all of them. Weights must not be negative.
+        """
+        heap: list[tuple[float, int]] = self._heap
+        distances: dict[int, float] = self.distances
+        parents: dict[int, int] = self.parents
+        settled: set[int] = self.settled
+
+        while heap:
+            if target is not None and target in settled:
+                return
+            distance, slot = heapq.heappop(heap)
+            if slot in settled or distance > distances[slot]:
+                continue
+            settled.add(slot)
+
+            for end, weight in row(slot).items():
+                if weight < 0:
+                    raise ValueError(f"Negative weight {weight} from slot {slot}: shortest paths need positive ones.")
+                candidate: float = distance + weight
+                if candidate < distances.get(end, math.inf):
+                    distances[end] = candidate
+                    parents[end] = slot
+                    heapq.heappush(heap, (candidate, end))
+
+            if slot == target:
+                return
+
+    def path(self, target: int) -> list[int] | None:
+        """
+        Get the slots from the `source` to a settled `target`, `None` if not reached.
+        """
+        if target not in self.settled:
+            return None
+        path: list[int] = [target]
+        while path[-1] != self.source:
+            path.append(self.parents[path[-1]])
+        path.reverse()
+        return path
+
+
+Pair = tuple[float, list[int], set[int]]
+"""
+(distance, slots of the path, slots expanded by the search).
+"""
+
+def bidirectional(row: Row, column: Row, source: int, target: int) -> Pair | None:
+    """
+    Bidirectional Dijkstra, from `source` by the rows and from `target` by the columns.
+    Each step expands the side with the smaller frontier, until the frontiers cannot improve the best meeting.
+    """
+    if source == target:
+        return 0.0, [source], {source}
+
+    sides: tuple[
+        tuple[Row, dict[int, float], dict[int, int], set[int], list[tuple[float, int]]], ...
+    ] = (
+        (row, {source: 0.0}, dict(), set(), [(0.0, source)]),
+        (column, {target: 0.0}, dict(), set(), [(0.0, target)]),
+    )
+    best: float = math.inf
+    meeting: int | None = None
+
+    while sides[0][4] and sides[1][4]:
+        if sides[0][4][0][0] + sides[1][4][0][0] >= best:
+            break
+        side: int = 0 if len(sides[0][4]) <= len(sides[1][4]) else 1
+        arcs, distances, parents, settled, heap = sides[side]
+        opposite: dict[int, float] = sides[1 - side][1]
+
+        distance, slot = heapq.heappop(heap)
+        if slot in settled or distance > distances[slot]:
+            continue
+        settled.add(slot)
+
+        for end, weight in arcs(slot).items():
+            if weight < 0:
+                raise ValueError(f"Negative weight {weight} at slot {slot}: shortest paths need positive ones.")
+            candidate: float = distance + weight
+            if candidate < distances.get(end, math.inf):
+                distances[end] = candidate
+                parents[end] = slot
+                heapq.heappush(heap, (candidate, end))
+            through: float | None = opposite.get(end)
+            if through is not None and candidate + through < best:
+                best = candidate + through
+                meeting = end
+
+    if meeting is None:
+        return None
+
+    path: list[int] = [meeting]
+    while path[-1] != source:
+        path.append(sides[0][2][path[-1]])
+    path.reverse()
+    while path[-1] != target:
+        path.append(sides[1][2][path[-1]])
+    return best, path, sides[0][3] | sides[1][3]
+
+
+class Analysis:
+    """
+    # Graph `Analysis`, over the slots of an adjacency.
+    Results are cached per source, and paths per pair. Arcs changes are reported by `touch` and `forget`,
+    and only the results that read a touched slot are dropped, at the next query.
+    With the incoming arcs `column`, paths are searched from both ends.
+    """
+    CACHE_SIZE: int = 64
+    """
+    Sources kept, for each kind of result.
+    """
+
+    row: Row
+    column: Row | None
+    _searches: collections.OrderedDict[int, Search]
+    _reaches: collections.OrderedDict[int, set[int]]
+    _pairs: collections.OrderedDict[tuple[int, int], Pair | None]
+    # Ends of the arcs changed since the last query.
+    _touched: set[int]
+    runs: int
+    hits: int
+    invalidations: int
+
+    def __init__(self, row: Row, column: Row | None = None) -> None:
+        self.row = row
+        self.column = column
+        self._searches = collections.OrderedDict()
+        self._reaches = collections.OrderedDict()
+        self._pairs = collections.OrderedDict()
+        self._touched = set()
+        self.runs = 0
+        self.hits = 0
+        self.invalidations = 0
+
+    def touch(self, origin: int, end: int) -> None:
+        """
+        Report a change of the arc from the slot `origin` to `end`.
+        """
+        self._touched.add(origin)
+        self._touched.add(end)
+
+    def forget(self, slot: int) -> None:
+        """
+        Report the removal of a `slot`, with all its arcs. Call before the slot is reused.
+        """
+        self._refresh()
+        for source in [source for source, search in self._searches.items() if slot in search.distances]:
+            del self._searches[source]
+            self.invalidations += 1
+        for source in [source for source, reach in self._reaches.items() if slot in reach]:
+            del self._reaches[source]
+            self.invalidations += 1
+        for pair in [pair for pair, found in self._pairs.items() if slot in pair or found and slot in found[2]]:
+            del self._pairs[pair]
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Drop every result.
+        """
+        self._searches.clear()
+        self._reaches.clear()
+        self._pairs.clear()
+        self._touched.clear()
+
+    def _refresh(self) -> None:
+        if not self._touched:
+            return
+        touched: set[int] = self._touched
+        # A result is only stale if it expanded a touched slot.
+        for source in [
+            source for source, search in self._searches.items() if not touched.isdisjoint(search.settled)
+        ]:
+            del self._searches[source]
+            self.invalidations += 1
+        for source in [source for source, reach in self._reaches.items() if not touched.isdisjoint(reach)]:
+            del self._reaches[source]
+            self.invalidations += 1
+        # Unreachable pairs may become reachable from anywhere.
+        for pair in [
+            pair for pair, found in self._pairs.items() if found is None or not touched.isdisjoint(found[2])
+        ]:
+            del self._pairs[pair]
+            self.invalidations += 1
+        self._touched = set()
+
+    def search(self, source: int) -> Search:
+        """
+        Get the cached `Search` from `source`, or a new one.
+        """
+        self._refresh()
+        search: Search | None = self._searches.get(source)
+        if search is None:
+            search = Search(source)
+            self._searches[source] = search
+            if len(self._searches) > self.CACHE_SIZE:
+                self._searches.popitem(last=False)
+        else:
+            self._searches.move_to_end(source)
+        return search
+
+    def shortest_path(self, source: int, target: int) -> tuple[float, list[int]] | None:
+        """
+        Get the (distance, slots) of a shortest path, `None` if `target` is not reachable.
+        A search already cached from `source` is used, or resumed without `column`.
+        """
+        self._refresh()
+        search: Search | None = self._searches.get(source)
+        if search is not None and target in search.settled:
+            self.hits += 1
+            return search.distances[target], search.path(target) or []
+
+        if self.column is None:
+            search = self.search(source)
+            self.runs += 1
+            search.run(self.row, target)
+            path: list[int] | None = search.path(target)
+            return None if path is None else (search.distances[target], path)
+
+        if (source, target) in self._pairs:
+            self.hits += 1
+            self._pairs.move_to_end((source, target))
+        else:
+            self.runs += 1
+            self._pairs[(source, target)] = bidirectional(self.row, self.column, source, target)
+            if len(self._pairs) > self.CACHE_SIZE:
+                self._pairs.popitem(last=False)
+
+        found: Pair | None = self._pairs[(source, target)]
+        return None if found is None else (found[0], found[1])
+
+    def distances(self, source: int) -> dict[int, float]:
+        """
+        Get the distances of all the slots reachable from `source`. Do not mutate.
+        """
+        search: Search = self.search(source)
+        if search.complete:
+            self.hits += 1
+        else:
+            self.runs += 1
+            search.run(self.row)
+        return search.distances
+
+    def reachable(self, source: int) -> set[int]:
+        """
+        Get the slots reachable from `source`, by breadth-first search, `source` included. Do not mutate.
+        """
+        self._refresh()
+        reach: set[int] | None = self._reaches.get(source)
+        if reach is not None:
+            self.hits += 1
+            self._reaches.move_to_end(source)
+            return reach
+
+        self.runs += 1
+        reach = {source}
+        waiting: collections.deque[int] = collections.deque((source,))
+        while waiting:
+            for end in self.row(waiting.popleft()):
+                if end not in reach:
+                    reach.add(end)
+                    waiting.append(end)
+
+        self._reaches[source] = reach
+        if len(self._reaches) > self.CACHE_SIZE:
+            self._reaches.popitem(last=False)
+        return reach
+
+    def all_pairs(self, sources: Iterable[int]) -> Iterator[tuple[int, dict[int, float]]]:
+        """
+        Yield the distances from each of the `sources`, one Dijkstra each.
+        """
+        for source in sources:
+            yield source, self.distances(source)
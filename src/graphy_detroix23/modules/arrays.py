@@ -0,0 +1,154 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/arrays.py
+
+Structure-of-arrays storage of the nodes, for batched `numpy` operations.
+Optional: everything here needs `numpy`, check `AVAILABLE` first.
+"""
+
+from types import ModuleType
+from typing import Any
+
+numpy: ModuleType | None
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+AVAILABLE: bool = numpy is not None
+"""
+Whether `numpy` is installed.
+"""
+
+class NodeArrays:
+    """
+    # `NodeArrays`, contiguous positions, radii and scales of the nodes.
+    Rows are indexed by integer slots, given by the caller.
+    """
+    positions: Any
+    radii: Any
+    scales: Any
+    # Drawing order of each slot.
+    order: Any
+    alive: Any
+    _counter: int
+
+    def __init__(self, capacity: int = 64) -> None:
+        if numpy is None:
+            raise ModuleNotFoundError("numpy is needed for the arrays backend.")
+
+        self.positions = numpy.zeros((capacity, 2), dtype=numpy.float64)
+        self.radii = numpy.zeros(capacity, dtype=numpy.float64)
+        self.scales = numpy.ones(capacity, dtype=numpy.float64)
+        self.order = numpy.zeros(capacity, dtype=numpy.int64)
+        self.alive = numpy.zeros(capacity, dtype=numpy.bool_)
+        self._counter = 0
+
+    @property
+    def capacity(self) -> int:
+        """
+        Number of rows allocated.
+        """
+        return len(self.radii)
+
+    def _grow(self, capacity: int) -> None:
+        assert numpy is not None
+        old: int = self.capacity
+        self.positions = numpy.concatenate((self.positions, numpy.zeros((capacity - old, 2))))
+        self.radii = numpy.concatenate((self.radii, numpy.zeros(capacity - old)))
+        self.scales = numpy.concatenate((self.scales, numpy.ones(capacity - old)))
+        self.order = numpy.concatenate((self.order, numpy.zeros(capacity - old, dtype=numpy.int64)))
+        self.alive = numpy.concatenate((self.alive, numpy.zeros(capacity - old, dtype=numpy.bool_)))
+
+    def attach(
+        self,
+        slot: int,
+        position: tuple[float, float],
+        radius: float,
+        scale: float,
+    ) -> None:
+        """
+        Fill the row `slot`, growing the arrays if needed.
+        """
+        if slot >= self.capacity:
+            self._grow(max(2 * self.capacity, slot + 1))
+
+        self.positions[slot] = position
+        self.radii[slot] = radius
+        self.scales[slot] = scale
+        self.order[slot] = self._counter
+        self.alive[slot] = True
+        self._counter += 1
+
+    def attach_many(self, slots: Any, positions: Any, radii: Any, scales: Any) -> None:
+        """
+        Fill the rows `slots` at once, like `attach` each.
+        """
+        assert numpy is not None
+        slots = numpy.asarray(slots, dtype=numpy.int64)
+        if not len(slots):
+            return
+        if int(slots.max()) >= self.capacity:
+            self._grow(max(2 * self.capacity, int(slots.max()) + 1))
+
+        self.positions[slots] = numpy.asarray(positions, dtype=numpy.float64).reshape((-1, 2))
+        self.radii[slots] = radii
+        self.scales[slots] = scales
+        self.order[slots] = numpy.arange(self._counter, self._counter + len(slots))
+        self.alive[slots] = True
+        self._counter += len(slots)
+
+    def detach(self, slot: int) -> None:
+        """
+        Free the row `slot`.
+        """
+        self.alive[slot] = False
+
+    def visible(self, viewport: tuple[float, float, float, float], half_sizes: Any) -> Any:
+        """
+        Get the alive slots whose box of `half_sizes` overlaps the `viewport`, in drawing order.
+        """
+        assert numpy is not None
+        x: Any = self.positions[:, 0]
+        y: Any = self.positions[:, 1]
+        mask: Any = (
+            self.alive
+            & (x + half_sizes >= viewport[0]) & (x - half_sizes <= viewport[2])
+            & (y + half_sizes >= viewport[1]) & (y - half_sizes <= viewport[3])
+        )
+        slots: Any = numpy.flatnonzero(mask)
+        return slots[numpy.argsort(self.order[slots], kind="stable")]
+
+
+def segments_in_rectangle(
+    starts: Any,
+    ends: Any,
+    rectangle: tuple[float, float, float, float],
+) -> Any:
+    """
+    Check which segments, from `starts` to `ends` (N×2 arrays), cross the `rectangle`.
+    Vectorized Liang-Barsky clipping, returns a boolean mask.
+    """
+    assert numpy is not None
+    dx: Any = ends[:, 0] - starts[:, 0]
+    dy: Any = ends[:, 1] - starts[:, 1]
+    start: Any = numpy.zeros(len(starts))
+    end: Any = numpy.ones(len(starts))
+    inside: Any = numpy.ones(len(starts), dtype=numpy.bool_)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        for p, q in (
+            (-dx, starts[:, 0] - rectangle[0]),
+            (dx, rectangle[2] - starts[:, 0]),
+            (-dy, starts[:, 1] - rectangle[1]),
+            (dy, rectangle[3] - starts[:, 1]),
+        ):
+            parallel: Any = p == 0
+            inside &= ~(parallel & (q < 0))
+            t: Any = q / numpy.where(parallel, 1.0, p)
+            entering: Any = ~parallel & (p < 0)
+            leaving: Any = ~parallel & (p > 0)
+            start = numpy.where(entering, numpy.maximum(start, t), start)
+            end = numpy.where(leaving, numpy.minimum(end, t), end)
+
+    return inside & (start <= end)
@@ -0,0 +1,370 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/backend.py
+
+Rendering, input and sound `Backend`s: the `pyxel` window, or `Headless`, without window nor audio.
+The code draws on `current.screen` and reads `current` for the input, never `pyxel` itself:
+graphs can be built, laid out, analysed and benchmarked on a server, and rendered to PNG.
+"""
+
+import abc
+import pathlib
+import time
+import tomllib
+import zipfile
+from typing import Any, Callable
+
+import pyxel
+
+class Backend(abc.ABC):
+    """
+    # Rendering and input `Backend` interface.
+    `screen` has the drawing methods of a `pyxel.Image`: `cls`, `blt`, `line`, `text`, `rect`, `circ`...
+    """
+    name: str
+
+    @property
+    @abc.abstractmethod
+    def screen(self) -> Any:
+        """
+        Surface drawn on, with the drawing methods of a `pyxel.Image`.
+        """
+        ...
+
+    @property
+    @abc.abstractmethod
+    def width(self) -> int:
+        ...
+
+    @property
+    @abc.abstractmethod
+    def height(self) -> int:
+        ...
+
+    @property
+    @abc.abstractmethod
+    def frame_count(self) -> int:
+        ...
+
+    @property
+    @abc.abstractmethod
+    def mouse_x(self) -> int:
+        ...
+
+    @property
+    @abc.abstractmethod
+    def mouse_y(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    def clock(self) -> float:
+        """
+        Time, in seconds, from an arbitrary origin.
+        """
+        ...
+
+    @abc.abstractmethod
+    def btn(self, key: int) -> bool:
+        """
+        Whether `key` is held.
+        """
+        ...
+
+    @abc.abstractmethod
+    def btnp(self, key: int) -> bool:
+        """
+        Whether `key` was pressed this frame.
+        """
+        ...
+
+    @abc.abstractmethod
+    def btnr(self, key: int) -> bool:
+        """
+        Whether `key` was released this frame.
+        """
+        ...
+
+    @abc.abstractmethod
+    def play(self, channel: int, sound: Any, loop: bool = False) -> None:
+        """
+        Play `sound`, a sound slot or MML, on `channel`.
+        """
+        ...
+
+    @abc.abstractmethod
+    def play_pos(self, channel: int) -> tuple[int, float] | None:
+        """
+        Position played on `channel`, `None` if idle.
+        """
+        ...
+
+    @abc.abstractmethod
+    def stop(self, channel: int) -> None:
+        """
+        Stop `channel`.
+        """
+        ...
+
+    @abc.abstractmethod
+    def start(self, width: int, height: int, fps: int, title: str, resource: pathlib.Path) -> None:
+        """
+        Open the screen, and load the sprites of the `resource` file.
+        """
+        ...
+
+    @abc.abstractmethod
+    def run(self, update: Callable[[], None], draw: Callable[[], None]) -> None:
+        """
+        Run the game loop.
+        """
+        ...
+
+    @abc.abstractmethod
+    def tick(self) -> None:
+        """
+        End a frame run outside of `run`.
+        """
+        ...
+
+    @abc.abstractmethod
+    def mouse(self, visible: bool) -> None:
+        """
+        Show or hide the system cursor.
+        """
+        ...
+
+    @abc.abstractmethod
+    def save(self, path: pathlib.Path, scale: int = 1) -> None:
+        """
+        Save the screen as a PNG image, the `.png` suffix added.
+        """
+        ...
+
+
+class Pyxel(Backend):
+    """
+    # `Pyxel` window backend.
+    """
+    name = "pyxel"
+
+    @property
+    def screen(self) -> Any:
+        # The module draws on the window, like an image.
+        return pyxel
+
+    @property
+    def width(self) -> int:
+        return pyxel.width
+
+    @property
+    def height(self) -> int:
+        return pyxel.height
+
+    @property
+    def frame_count(self) -> int:
+        return pyxel.frame_count
+
+    @property
+    def mouse_x(self) -> int:
+        return pyxel.mouse_x
+
+    @property
+    def mouse_y(self) -> int:
+        return pyxel.mouse_y
+
+    def clock(self) -> float:
+        return time.perf_counter()
+
+    def btn(self, key: int) -> bool:
+        return pyxel.btn(key)
+
+    def btnp(self, key: int) -> bool:
+        return pyxel.btnp(key)
+
+    def btnr(self, key: int) -> bool:
+        return pyxel.btnr(key)
+
+    def play(self, channel: int, sound: Any, loop: bool = False) -> None:
+        pyxel.play(channel, sound, loop=loop)
+
+    def play_pos(self, channel: int) -> tuple[int, float] | None:
+        return pyxel.play_pos(channel)
+
+    def stop(self, channel: int) -> None:
+        pyxel.stop(channel)
+
+    def start(self, width: int, height: int, fps: int, title: str, resource: pathlib.Path) -> None:
+        pyxel.init(width, height, title=title, fps=fps, quit_key=pyxel.KEY_ESCAPE)
+        pyxel.load(str(resource))
+
+    def run(self, update: Callable[[], None], draw: Callable[[], None]) -> None:
+        pyxel.run(update, draw)
+
+    def tick(self) -> None:
+        # `pyxel` ends its frames itself.
+        pass
+
+    def mouse(self, visible: bool) -> None:
+        pyxel.mouse(visible)
+
+    def save(self, path: pathlib.Path, scale: int = 1) -> None:
+        pyxel.screen.save(str(path.with_suffix("")), scale)
+
+
+class Headless(Backend):
+    """
+    # `Headless` backend: an offscreen screen, the input set by the caller, no sound.
+    Nothing needs `pyxel.init`. A `tick` ends each frame, and the `clock` advances by one frame:
+    runs are deterministic, whatever the time taken.
+    """
+    name = "headless"
+
+    _screen: Any
+    _width: int
+    _height: int
+    fps: int
+    _frame_count: int
+    _mouse: tuple[int, int]
+    # Keys held, and pressed or released this frame.
+    held: set[int]
+    pressed: set[int]
+    released: set[int]
+
+    def __init__(self, width: int, height: int, fps: int = 30, screen: Any | None = None) -> None:
+        """
+        `screen` replaces the offscreen `pyxel.Image`, to count calls without drawing for example.
+        """
+        self._screen = pyxel.Image(width, height) if screen is None else screen
+        self._width = width
+        self._height = height
+        self.fps = fps
+        self._frame_count = 0
+        self._mouse = (0, 0)
+        self.held = set()
+        self.pressed = set()
+        self.released = set()
+
+    @property
+    def screen(self) -> Any:
+        return self._screen
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def frame_count(self) -> int:
+        return self._frame_count
+
+    @property
+    def mouse_x(self) -> int:
+        return self._mouse[0]
+
+    @property
+    def mouse_y(self) -> int:
+        return self._mouse[1]
+
+    def clock(self) -> float:
+        return self._frame_count / self.fps
+
+    def move_mouse(self, x: int, y: int) -> None:
+        """
+        Set the mouse position.
+        """
+        self._mouse = (x, y)
+
+    def press(self, key: int) -> None:
+        """
+        Press `key`, held until `release`.
+        """
+        self.held.add(key)
+        self.pressed.add(key)
+
+    def release(self, key: int) -> None:
+        """
+        Release `key`.
+        """
+        self.held.discard(key)
+        self.released.add(key)
+
+    def tick(self) -> None:
+        """
+        End the frame: pressed and released keys are reset.
+        """
+        self._frame_count += 1
+        self.pressed.clear()
+        self.released.clear()
+
+    def btn(self, key: int) -> bool:
+        return key in self.held
+
+    def btnp(self, key: int) -> bool:
+        return key in self.pressed
+
+    def btnr(self, key: int) -> bool:
+        return key in self.released
+
+    def play(self, channel: int, sound: Any, loop: bool = False) -> None:
+        pass
+
+    def play_pos(self, channel: int) -> tuple[int, float] | None:
+        return None
+
+    def stop(self, channel: int) -> None:
+        pass
+
+    def start(self, width: int, height: int, fps: int, title: str, resource: pathlib.Path) -> None:
+        if resource.is_file():
+            load_images(resource)
+
+    def run(self, update: Callable[[], None], draw: Callable[[], None], frames: int = 1) -> None:
+        """
+        Run `frames` frames.
+        """
+        for _ in range(frames):
+            update()
+            draw()
+            self.tick()
+
+    def mouse(self, visible: bool) -> None:
+        pass
+
+    def save(self, path: pathlib.Path, scale: int = 1) -> None:
+        self._screen.save(str(path.with_suffix("")), scale)
+
+
+def load_images(resource: pathlib.Path) -> int:
+    """
+    Load the image banks of a `.pyxres` `resource` into `pyxel.images`, without `pyxel.init`.
+    Returns the number of banks loaded.
+    """
+    with zipfile.ZipFile(resource) as archive:
+        content: dict[str, Any] = tomllib.loads(archive.read("pyxel_resource.toml").decode("utf-8"))
+
+    images: list[dict[str, Any]] = content.get("images", list())
+    for bank, image in enumerate(images):
+        # Rows of color indices, trimmed of their trailing 0: padded to the longest one.
+        rows: list[str] = ["".join(f"{color:x}" for color in row) for row in image["data"]]
+        if rows:
+            width: int = max(len(row) for row in rows)
+            pyxel.images[bank].set(0, 0, [row.ljust(width, "0") for row in rows])
+    return len(images)
+
+
+current: Backend = Pyxel()
+"""
+Backend in use, switched by `use`.
+"""
+
+def use(backend: Backend) -> Backend:
+    """
+    Switch to `backend`. Returns the previous one.
+    """
+    global current
+    previous: Backend = current
+    current = backend
+    return previous
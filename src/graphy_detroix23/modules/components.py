@@ -0,0 +1,292 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/components.py
+
+Strongly connected components and topological order, over integer slots.
+Iterative: the depth of the graph is not limited by the recursion limit.
+"""
+
+import collections
+from typing import Callable, Collection, Iterable, Mapping
+
+Row = Callable[[int], Mapping[int, float]]
+"""
+Arcs of a slot: {other slot: weight}.
+"""
+
+def tarjan(slots: Iterable[int], row: Row, within: Collection[int] | None = None) -> list[list[int]]:
+    """
+    Get the strongly connected components of the `slots`, in reverse topological order.
+    Only arcs to slots `within`, if given, are followed.
+    """
+    index: dict[int, int] = dict()
+    low: dict[int, int] = dict()
+    stack: list[int] = list()
+    on_stack: set[int] = set()
+    result: list[list[int]] = list()
+    counter: int = 0
+
+    for root in slots:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        # Explicit call stack: (slot, iterator on its arcs).
+        work: list[tuple[int, Iterable[int]]] = [(root, iter(row(root)))]
+
+        while work:
+            slot, ends = work[-1]
+            advanced: bool = False
+            for end in ends:
+                if within is not None and end not in within:
+                    continue
+                if end not in index:
+                    index[end] = low[end] = counter
+                    counter += 1
+                    stack.append(end)
+                    on_stack.add(end)
+                    work.append((end, iter(row(end))))
+                    advanced = True
+                    break
+                if end in on_stack and index[end] < low[slot]:
+                    low[slot] = index[end]
+            if advanced:
+                continue
+
+            work.pop()
+            if work and low[slot] < low[work[-1][0]]:
+                low[work[-1][0]] = low[slot]
+
+            if low[slot] == index[slot]:
+                component: list[int] = list()
+                while True:
+                    member: int = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == slot:
+                        break
+                result.append(component)
+
+    return result
+
+
+class Components:
+    """
+    # Live strongly connected `Components`.
+    Single edits update the components incrementally:
+    - An arc inside a component, or removed between two, changes nothing.
+    - An arc between two components merges the ones on the new cycles, found from both ends.
+    - An arc removed inside a component, or a node removed, splits only that component.
+    After `BULK` edits in a frame, the components are rebuilt at the next `refresh` instead.
+    """
+    BULK: int = 256
+
+    row: Row
+    column: Row
+    slots: Callable[[], Iterable[int]]
+    # Component id of each slot, and the slots of each component.
+    component: dict[int, int]
+    members: dict[int, set[int]]
+    # Slots with an arc to themselves.
+    loops: set[int]
+    # Slots whose component changed, since the last `take_changed`.
+    changed: set[int]
+    dirty: bool
+    _next_id: int
+    _edits: int
+    _order: list[int] | None
+
+    def __init__(self, row: Row, column: Row, slots: Callable[[], Iterable[int]]) -> None:
+        self.row = row
+        self.column = column
+        self.slots = slots
+        self.component = dict()
+        self.members = dict()
+        self.loops = set()
+        self.changed = set()
+        self.dirty = True
+        self._next_id = 0
+        self._edits = 0
+        self._order = None
+
+    @property
+    def count(self) -> int:
+        """
+        Number of components.
+        """
+        return len(self.members)
+
+    @property
+    def cycles(self) -> int:
+        """
+        Number of components with a cycle: several slots, or a loop.
+        """
+        return sum(1 for members in self.members.values() if len(members) > 1) + len(
+            [slot for slot in self.loops if len(self.members[self.component[slot]]) == 1]
+        )
+
+    @property
+    def is_dag(self) -> bool:
+        """
+        Whether the graph has no cycle.
+        """
+        return not self.loops and len(self.members) == len(self.component)
+
+    def size(self, slot: int) -> int:
+        """
+        Number of slots in the component of `slot`.
+        """
+        return len(self.members[self.component[slot]])
+
+    def _new(self, slots: Iterable[int]) -> int:
+        identifier: int = self._next_id
+        self._next_id += 1
+        members: set[int] = set(slots)
+        self.members[identifier] = members
+        for slot in members:
+            self.component[slot] = identifier
+        self.changed |= members
+        return identifier
+
+    def _edit(self) -> bool:
+        """
+        Count an edit. Returns whether to update incrementally.
+        """
+        self._order = None
+        self._edits += 1
+        if self._edits > self.BULK:
+            self.dirty = True
+        return not self.dirty
+
+    def rebuild(self) -> None:
+        """
+        Compute all the components again.
+        """
+        self.changed |= self.component.keys()
+        self.component = dict()
+        self.members = dict()
+        self.loops = set()
+        slots: list[int] = list(self.slots())
+        components: list[list[int]] = tarjan(slots, self.row)
+        for members in components:
+            self._new(members)
+        self.loops = {slot for slot in slots if slot in self.row(slot)}
+        # Tarjan gives the reverse topological order.
+        self._order = [slot for members in reversed(components) for slot in members]
+        self.dirty = False
+
+    def refresh(self) -> None:
+        """
+        Once per frame: rebuild after bulk edits.
+        """
+        if self.dirty:
+            self.rebuild()
+        self._edits = 0
+
+    def take_changed(self) -> set[int]:
+        """
+        Get and reset the slots whose component changed.
+        """
+        changed: set[int] = self.changed
+        self.changed = set()
+        return changed
+
+    def node_added(self, slot: int) -> None:
+        """
+        Report a new `slot`, without arcs.
+        """
+        if self._edit():
+            self._new((slot,))
+
+    def node_removed(self, slot: int) -> None:
+        """
+        Report the removal of a `slot` and its arcs, after it happened.
+        """
+        self.loops.discard(slot)
+        if not self._edit():
+            return
+        identifier: int | None = self.component.pop(slot, None)
+        if identifier is None:
+            return
+        members: set[int] = self.members[identifier]
+        members.discard(slot)
+        # A single remaining slot is not in a cycle anymore.
+        self.changed |= members
+        if not members:
+            del self.members[identifier]
+        elif len(members) > 1:
+            self._split(identifier)
+
+    def arc_added(self, origin: int, end: int) -> None:
+        """
+        Report an arc added or updated, after it happened.
+        """
+        if origin == end:
+            self.loops.add(origin)
+            self.changed.add(origin)
+        if not self._edit() or self.component[origin] == self.component[end]:
+            return
+
+        # Slots reachable from `end`, then the ones of them reaching `origin`: the new cycles.
+        forward: set[int] = self._reach(end, self.row, None)
+        if origin not in forward:
+            return
+        cycle: set[int] = self._reach(origin, self.column, forward)
+
+        merged: set[int] = {self.component[slot] for slot in cycle}
+        target: int = max(merged, key=lambda identifier: len(self.members[identifier]))
+        for identifier in merged - {target}:
+            members: set[int] = self.members.pop(identifier)
+            for slot in members:
+                self.component[slot] = target
+            self.members[target] |= members
+        # The target slots too: alone before, they were not in a cycle.
+        self.changed |= self.members[target]
+
+    def arc_removed(self, origin: int, end: int) -> None:
+        """
+        Report an arc removed, after it happened.
+        """
+        if origin == end:
+            self.loops.discard(origin)
+            self.changed.add(origin)
+        if not self._edit() or self.component[origin] != self.component[end]:
+            return
+        self._split(self.component[origin])
+
+    def _reach(self, start: int, arcs: Row, within: set[int] | None) -> set[int]:
+        reach: set[int] = {start}
+        waiting: collections.deque[int] = collections.deque((start,))
+        while waiting:
+            for other in arcs(waiting.popleft()):
+                if other not in reach and (within is None or other in within):
+                    reach.add(other)
+                    waiting.append(other)
+        return reach
+
+    def _split(self, identifier: int) -> None:
+        members: set[int] = self.members[identifier]
+        parts: list[list[int]] = tarjan(members, self.row, members)
+        if len(parts) == 1:
+            return
+        # The largest part keeps the id, and its color.
+        parts.sort(key=len, reverse=True)
+        self.members[identifier] = set(parts[0])
+        # It may be a single slot now, out of any cycle.
+        self.changed |= self.members[identifier]
+        for part in parts[1:]:
+            self._new(part)
+
+    def topological_order(self) -> list[int] | None:
+        """
+        Get the slots in topological order, `None` if the graph has a cycle.
+        """
+        if self.dirty:
+            self.rebuild()
+        if not self.is_dag:
+            return None
+        if self._order is None:
+            self._order = [slot for members in reversed(tarjan(list(self.slots()), self.row)) for slot in members]
+        return self._order
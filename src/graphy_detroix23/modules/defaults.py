@@ -3,18 +3,40 @@
 /src/graphy_detroix23/modules/paths.py
 """
 
+import functools
 import pathlib
-from typing import Final
+from typing import Any, Final
 import pyxel
 
 
 COLKEY: Final[int] = 8
 
-RESOURCE_FILE: Final[pathlib.Path] = pathlib.Path("../../../resources/graphy.pyxres")
+RESOURCES: Final[pathlib.Path] = pathlib.Path(__file__).resolve().parents[1] / "resources"
+"""
+Resources directory, inside the package: found from a checkout or an installation, whatever the working directory.
+"""
+
+RESOURCE_FILE: Final[pathlib.Path] = RESOURCES / "graphy.pyxres"
 
-FONT_BIG_BLUE_FILE: Final[pathlib.Path] = pathlib.Path("resources/big_blue_font/BigBlueTermPlusNerdFont-Regular.ttf")
+FONT_BIG_BLUE_FILE: Final[pathlib.Path] = RESOURCES / "big_blue_font" / "BigBlueTermPlusNerdFont-Regular.ttf"
 FONT_BIG_BLUE_SIZE: int = 12
-FONT_BIG_BLUE = pyxel.Font(str(FONT_BIG_BLUE_FILE), FONT_BIG_BLUE_SIZE)
+
+@functools.cache
+def font_big_blue() -> pyxel.Font | None:
+    """
+    Load the big blue font, once. `None` without the font file: the `pyxel` font is used instead.
+    """
+    if FONT_BIG_BLUE_FILE.is_file():
+        return pyxel.Font(str(FONT_BIG_BLUE_FILE), FONT_BIG_BLUE_SIZE)
+    return None
+
+def __getattr__(name: str) -> Any:
+    """
+    `FONT_BIG_BLUE` is loaded on first use, not at import.
+    """
+    if name == "FONT_BIG_BLUE":
+        return font_big_blue()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 SCALE_ALL: Final[list[int]] = [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
 SCALE_ALL_2: Final[list[int]] = [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1]
@@ -0,0 +1,166 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/detail.py
+
+Level of detail of the graph drawing, from the density on screen.
+Dense graphs lose their text first, then their arrow heads, then nodes are aggregated by cells of a grid,
+so the cost of a frame is bounded by the pixels of the viewport rather than by the items.
+"""
+
+import enum
+import heapq
+import math
+from typing import Any, Iterable
+
+from graphy_detroix23.modules import arrays
+
+class Detail(enum.IntEnum):
+    """
+    # Level of `Detail`, from the most detailed.
+    """
+    FULL = 0
+    # No node labels, no arc weights.
+    NO_TEXT = 1
+    # Arcs as plain lines, without arrow heads.
+    LINES = 2
+    # Nodes aggregated in cells, arcs between cells.
+    CLUSTERS = 3
+
+
+THRESHOLDS: tuple[float, ...] = (0.5, 1.0, 3.0)
+"""
+Coverage from which each level after `Detail.FULL` is used.
+"""
+
+HYSTERESIS: float = 0.2
+"""
+Fraction below its threshold the coverage must fall to go back to a finer level. No flicker at the limit.
+"""
+
+ARC_AREA: float = 96.0
+"""
+Pixels covered by an arc, with its arrow head.
+"""
+
+CELL: int = 12
+"""
+Side of the cells of the clusters, in pixels.
+"""
+
+LINKS: int = 1024
+"""
+Links between cells drawn at most, the ones with the most arcs.
+"""
+
+def coverage(nodes_area: float, arcs: int, viewport: tuple[float, float, float, float]) -> float:
+    """
+    Get the ratio of the `viewport` covered by the visible nodes, of total area `nodes_area`, and `arcs`.
+    Above 1, items overlap. Node sizes include their scale: zooming out raises the coverage.
+    """
+    area: float = (viewport[2] - viewport[0]) * (viewport[3] - viewport[1])
+    if area <= 0:
+        return 0.0
+    return (nodes_area + arcs * ARC_AREA) / area
+
+def level(coverage: float, current: Detail = Detail.FULL, thresholds: tuple[float, ...] = THRESHOLDS) -> Detail:
+    """
+    Get the level of detail for a `coverage`, given the `current` one.
+    """
+    result: Detail = Detail.FULL
+    for index, threshold in enumerate(thresholds):
+        # Levels up to the current one stay until the coverage falls clearly below.
+        if index + 1 <= current:
+            threshold *= 1.0 - HYSTERESIS
+        if coverage >= threshold:
+            result = Detail(index + 1)
+    return result
+
+def cell(x: float, y: float, size: float = CELL) -> tuple[int, int]:
+    """
+    Get the cell of the point (`x`, `y`).
+    """
+    return (math.floor(x / size), math.floor(y / size))
+
+def center(key: tuple[int, int], size: float = CELL) -> tuple[float, float]:
+    """
+    Get the center of the cell `key`, on screen.
+    """
+    return ((key[0] + 0.5) * size, (key[1] + 0.5) * size)
+
+def cells(points: Iterable[tuple[float, float]], size: float = CELL) -> dict[tuple[int, int], int]:
+    """
+    Count the `points` in each cell.
+    """
+    counts: dict[tuple[int, int], int] = dict()
+    for x, y in points:
+        key: tuple[int, int] = cell(x, y, size)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+def links(
+    segments: Iterable[tuple[tuple[float, float], tuple[float, float]]],
+    size: float = CELL,
+    limit: int = LINKS,
+) -> list[tuple[int, int, int, int]]:
+    """
+    Get the pairs of distinct cells linked by the `segments`, once whatever the direction.
+    Only the `limit` pairs with the most segments are kept.
+    """
+    counts: dict[tuple[int, int, int, int], int] = dict()
+    for start, end in segments:
+        first: tuple[int, int] = cell(start[0], start[1], size)
+        second: tuple[int, int] = cell(end[0], end[1], size)
+        if first != second:
+            key: tuple[int, int, int, int] = (*min(first, second), *max(first, second))
+            counts[key] = counts.get(key, 0) + 1
+    if len(counts) <= limit:
+        return list(counts)
+    return heapq.nlargest(limit, counts, key=counts.__getitem__)
+
+def _pack(keys: Any) -> tuple[Any, int, int, int]:
+    """
+    Pack cells (N×2 array) as single integers, faster to sort. Returns (packed, x min, y min, height).
+    """
+    assert arrays.numpy is not None
+    x: int = int(keys[:, 0].min())
+    y: int = int(keys[:, 1].min())
+    height: int = int(keys[:, 1].max()) - y + 1
+    return (keys[:, 0] - x) * height + (keys[:, 1] - y), x, y, height
+
+def cells_array(points: Any, size: float = CELL) -> tuple[Any, Any]:
+    """
+    Count the `points` (N×2 array) in each cell, with `numpy`. Returns (cells N×2, counts).
+    """
+    assert arrays.numpy is not None
+    numpy: Any = arrays.numpy
+    keys: Any = numpy.floor(points / size).astype(numpy.int64)
+    if not len(keys):
+        return keys, numpy.zeros(0, dtype=numpy.int64)
+
+    packed, x, y, height = _pack(keys)
+    unique, counts = numpy.unique(packed, return_counts=True)
+    return numpy.stack((unique // height + x, unique % height + y), axis=1), counts
+
+def links_array(starts: Any, ends: Any, size: float = CELL, limit: int = LINKS) -> Any:
+    """
+    Get the pairs of distinct cells linked by the segments from `starts` to `ends` (N×2 arrays), with `numpy`.
+    Returns an N×4 array, each pair once whatever the direction, the `limit` ones with the most segments.
+    """
+    assert arrays.numpy is not None
+    numpy: Any = arrays.numpy
+    if not len(starts):
+        return numpy.zeros((0, 4), dtype=numpy.int64)
+
+    packed, x, y, height = _pack(numpy.floor(numpy.concatenate((starts, ends)) / size).astype(numpy.int64))
+    first: Any = packed[:len(starts)]
+    second: Any = packed[len(starts):]
+    distinct: Any = first != second
+    low: Any = numpy.minimum(first[distinct], second[distinct])
+    high: Any = numpy.maximum(first[distinct], second[distinct])
+    cells: int = int(packed.max()) + 1
+    pairs, counts = numpy.unique(low * cells + high, return_counts=True)
+    if len(pairs) > limit:
+        pairs = pairs[numpy.argpartition(counts, -limit)[-limit:]]
+
+    low, high = pairs // cells, pairs % cells
+    return numpy.stack((low // height + x, low % height + y, high // height + x, high % height + y), axis=1)
@@ -5,11 +5,13 @@
 Helper functions and classes for `pyxel`.
 """
 
+import contextlib
 import math
+from typing import Any, Hashable, Iterator, Sequence
 
 import pyxel
 
-from graphy_detroix23.modules import defaults
+from graphy_detroix23.modules import arrays, backend, defaults, profiler
 
 class Colors:
     """
@@ -103,39 +105,226 @@ def justify(string: str, total_length: int, fill: str = ' ') -> str:
     
     return string + fill * delta
 
-def arrow(
-    x1: float, 
-    y1: float, 
-    x2: float, 
+def rectangles_overlap(
+    first: tuple[float, float, float, float],
+    second: tuple[float, float, float, float],
+) -> bool:
+    """
+    Check if two rectangles (x min, y min, x max, y max) overlap.
+    """
+    return (
+        first[0] <= second[2] and second[0] <= first[2]
+        and first[1] <= second[3] and second[1] <= first[3]
+    )
+
+def segment_in_rectangle(
+    x1: float,
+    y1: float,
+    x2: float,
     y2: float,
-    color: int,
-    scale: float = 1.0,
-    shorten: float = 0.0,
-    shift: float = 0.0
-) -> None:
+    rectangle: tuple[float, float, float, float],
+) -> bool:
     """
-    Draw an arrow from P1(`x1`, `y1`) to P2(`x2`, `y2`).
+    Check if the segment P1(`x1`, `y1`) to P2(`x2`, `y2`) crosses the `rectangle` (x min, y min, x max, y max).
+    Liang-Barsky clipping.
     """
-    point: tuple[float, float] = (x2 - x1, y2 - y1)
-    length: float = math.sqrt(point[0] * point[0] + point[1] * point[1])
-    # Angle of the arrow from P1 to P2
-    angle: float
-    if length > 0:
-        if signum(point[1]) == 0:
-            angle = math.acos(point[0] / length)
+    dx: float = x2 - x1
+    dy: float = y2 - y1
+    start: float = 0.0
+    end: float = 1.0
+
+    for p, q in (
+        (-dx, x1 - rectangle[0]),
+        (dx, rectangle[2] - x1),
+        (-dy, y1 - rectangle[1]),
+        (dy, rectangle[3] - y1),
+    ):
+        if p == 0:
+            # Parallel to this edge, and outside.
+            if q < 0:
+                return False
         else:
-            angle = signum(point[1]) * math.acos(point[0] / length)
-    else:
-        angle = 0
+            t: float = q / p
+            if p < 0:
+                if t > end:
+                    return False
+                start = max(start, t)
+            else:
+                if t < start:
+                    return False
+                end = min(end, t)
+
+    return True
+
+_target: pyxel.Image | None = None
+"""
+Image drawn on by the wrappers below, the screen of the backend if `None`.
+"""
+
+def surface() -> Any:
+    """
+    Get the image drawn on: the current target, or the screen of the backend.
+    """
+    return backend.current.screen if _target is None else _target
+
+@contextlib.contextmanager
+def drawing_on(image: pyxel.Image) -> Iterator[pyxel.Image]:
+    """
+    Draw on an offscreen `image` instead of the screen, within the `with` block.
+    """
+    global _target
+    previous: pyxel.Image | None = _target
+    _target = image
+    try:
+        yield image
+    finally:
+        _target = previous
+
+def blt(
+    x: float,
+    y: float,
+    image: int | pyxel.Image,
+    u: float,
+    v: float,
+    w: float,
+    h: float,
+    colkey: int | None = None,
+    rotate: float | None = None,
+    scale: float | None = None,
+) -> None:
+    """
+    `pyxel.blt`, counted by the profiler.
+    """
+    profiler.PROFILER.count("blt")
+    surface().blt(x, y, image, u, v, w, h, colkey, rotate=rotate, scale=scale)
+
+def line(x1: float, y1: float, x2: float, y2: float, color: int) -> None:
+    """
+    `pyxel.line`, counted by the profiler.
+    """
+    profiler.PROFILER.count("line")
+    surface().line(x1, y1, x2, y2, color)
+
+def text(x: float, y: float, string: str, color: int, font: pyxel.Font | None = None) -> None:
+    """
+    `pyxel.text`, counted by the profiler.
+    """
+    profiler.PROFILER.count("text")
+    surface().text(x, y, string, color, font)
+
+def circ(x: float, y: float, radius: float, color: int) -> None:
+    """
+    `pyxel.circ`, counted by the profiler.
+    """
+    profiler.PROFILER.count("circ")
+    surface().circ(x, y, radius, color)
+
+def circb(x: float, y: float, radius: float, color: int) -> None:
+    """
+    `pyxel.circb`, on the current target.
+    """
+    surface().circb(x, y, radius, color)
+
+def rect(x: float, y: float, w: float, h: float, color: int) -> None:
+    """
+    `pyxel.rect`, on the current target.
+    """
+    surface().rect(x, y, w, h, color)
+
+def rectb(x: float, y: float, w: float, h: float, color: int) -> None:
+    """
+    `pyxel.rectb`, on the current target.
+    """
+    surface().rectb(x, y, w, h, color)
+
+def dither(alpha: float) -> None:
+    """
+    `pyxel.dither`, on the current target.
+    """
+    surface().dither(alpha)
+
+Arrow = tuple[float, float, float, float, float, float, float]
+"""
+Geometry of an arrow: (x, y of the head sprite, its rotation in degrees, x1, y1, x2, y2 of the line).
+"""
+
+def arrow_geometry(
+    x1: float,
+    y1: float,
+    x2: float,
+    y2: float,
+    shorten: float = 0.0,
+    shift: float = 0.0,
+) -> Arrow:
+    """
+    Get the geometry of an arrow from P1(`x1`, `y1`) to P2(`x2`, `y2`),
+    its head `shorten`ed along the arc, and all of it `shift`ed to the side.
+    """
+    dx: float = x2 - x1
+    dy: float = y2 - y1
+    length: float = math.hypot(dx, dy)
+    # Angle of the arrow from P1 to P2.
+    angle: float = math.atan2(dy, dx)
 
-    # Unit vector
-    vector: tuple[float, float] = (math.cos(angle), math.sin(angle))
+    # Unit vector.
+    vector: tuple[float, float] = (dx / length, dy / length) if length > 0 else (1.0, 0.0)
     arrow_distance: float = length - shorten if length > shorten else 0.0
-    arrow_position: tuple[float, float] = (x1 + vector[0] * arrow_distance, y1 + vector[1] * arrow_distance)
+    head: tuple[float, float] = (
+        x1 + vector[0] * arrow_distance + shift * vector[1],
+        y1 + vector[1] * arrow_distance - shift * vector[0],
+    )
+
+    return (
+        head[0] + SPRITE_ARROW.offset[0],
+        head[1] + SPRITE_ARROW.offset[1],
+        math.degrees(angle) + 90.0,
+        x1 + shift * vector[1],
+        y1 - shift * vector[0],
+        head[0],
+        head[1],
+    )
+
+def arrow_geometries(starts: Any, ends: Any, shorten: Any, shift: float = 0.0) -> list[Sequence[float]]:
+    """
+    Get the geometries of the arrows from `starts` to `ends` (N×2), each head `shorten`ed (N) along its arc.
+    Computed at once with `numpy` when installed, else one by one.
+    """
+    if arrays.numpy is None:
+        return [
+            arrow_geometry(start[0], start[1], end[0], end[1], length, shift)
+            for start, end, length in zip(starts, ends, shorten)
+        ]
+
+    numpy: Any = arrays.numpy
+    starts = numpy.asarray(starts, dtype=numpy.float64).reshape(-1, 2)
+    ends = numpy.asarray(ends, dtype=numpy.float64).reshape(-1, 2)
+    deltas: Any = ends - starts
+    lengths: Any = numpy.hypot(deltas[:, 0], deltas[:, 1])
+    angles: Any = numpy.degrees(numpy.arctan2(deltas[:, 1], deltas[:, 0])) + 90.0
 
-    pyxel.blt(
-        arrow_position[0] + SPRITE_ARROW.offset[0] + shift * vector[1],
-        arrow_position[1] + SPRITE_ARROW.offset[1] - shift * vector[0],
+    vectors: Any = numpy.where(
+        (lengths > 0)[:, None],
+        deltas / numpy.where(lengths > 0, lengths, 1.0)[:, None],
+        numpy.array((1.0, 0.0)),
+    )
+    distances: Any = numpy.maximum(lengths - numpy.asarray(shorten, dtype=numpy.float64), 0.0)
+    offsets: Any = shift * numpy.stack((vectors[:, 1], -vectors[:, 0]), axis=1)
+    heads: Any = starts + vectors * distances[:, None] + offsets
+
+    return numpy.column_stack((
+        heads + numpy.array(SPRITE_ARROW.offset),
+        angles,
+        starts + offsets,
+        heads,
+    )).tolist()
+
+def draw_arrow(geometry: Arrow | Sequence[float], color: int, scale: float = 1.0) -> None:
+    """
+    Draw an arrow from its `geometry`: a blit and a line.
+    """
+    blt(
+        geometry[0],
+        geometry[1],
         SPRITE_ARROW.image,
         SPRITE_ARROW.position[0],
         SPRITE_ARROW.position[1],
@@ -143,15 +332,81 @@ def arrow(
         SPRITE_ARROW.size[1],
         SPRITE_ARROW.colkey,
         scale=scale,
-        rotate=math.degrees(angle) + 90.0,
-    )
-    pyxel.line(
-        x1 + shift * vector[1], 
-        y1 - shift * vector[0], 
-        arrow_position[0] + shift * vector[1], 
-        arrow_position[1] - shift * vector[0], 
-        color
+        rotate=geometry[2],
     )
+    line(geometry[3], geometry[4], geometry[5], geometry[6], color)
+
+def arrow(
+    x1: float, 
+    y1: float, 
+    x2: float, 
+    y2: float,
+    color: int,
+    scale: float = 1.0,
+    shorten: float = 0.0,
+    shift: float = 0.0
+) -> None:
+    """
+    Draw an arrow from P1(`x1`, `y1`) to P2(`x2`, `y2`).
+    """
+    draw_arrow(arrow_geometry(x1, y1, x2, y2, shorten, shift), color, scale)
+
+
+class ArrowCache:
+    """
+    # `ArrowCache`, geometries of arrows by edge.
+    An entry is used only if the endpoints did not change. Edges of a moved node should still be `forget`ed,
+    so the cache does not grow with stale entries.
+    """
+    # Edge: ((x1, y1, x2, y2, shorten, shift), geometry).
+    _entries: dict[Hashable, tuple[tuple[float, ...], Arrow]]
+    hits: int
+    misses: int
+
+    def __init__(self) -> None:
+        self._entries = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        edge: Hashable,
+        x1: float,
+        y1: float,
+        x2: float,
+        y2: float,
+        shorten: float = 0.0,
+        shift: float = 0.0,
+    ) -> Arrow:
+        """
+        Get the geometry of the arrow of `edge`, computed again only if its endpoints changed.
+        """
+        inputs: tuple[float, ...] = (x1, y1, x2, y2, shorten, shift)
+        entry: tuple[tuple[float, ...], Arrow] | None = self._entries.get(edge)
+        if entry is not None and entry[0] == inputs:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        geometry: Arrow = arrow_geometry(x1, y1, x2, y2, shorten, shift)
+        self._entries[edge] = (inputs, geometry)
+        return geometry
+
+    def forget(self, edge: Hashable) -> None:
+        """
+        Drop the geometry of `edge`.
+        """
+        self._entries.pop(edge, None)
+
+    def clear(self) -> None:
+        """
+        Drop every geometry.
+        """
+        self._entries.clear()
+
 
 def jagged_line(
     x1: float,
@@ -175,7 +430,7 @@ def jagged_line(
     t: float = shift
 
     while t + 2 * jag < length:
-        pyxel.line(
+        line(
             x1 + t * normal[0],
             y1 + t * normal[1],
             x1 + (t + jag) * normal[0],
@@ -184,7 +439,7 @@ def jagged_line(
         )
         t += 2 * jag
 
-    pyxel.line(
+    line(
         x1 + t * normal[0],
         y1 + t * normal[1],
         x1 + clip(t + jag, maximum=length) * normal[0],
@@ -0,0 +1,173 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/history.py
+
+Undo and redo of the edits, as delta records in a bounded ring buffer.
+Records name the nodes, so they stay valid after a node is removed and added again.
+Undoing or redoing a record costs its own size, never the size of the graph.
+"""
+
+import collections
+import sys
+
+class Move:
+    """
+    # `Move` of a node, a whole drag in one record.
+    """
+    __slots__ = ("name", "before", "after")
+
+    name: str
+    before: tuple[float, float]
+    after: tuple[float, float]
+
+    def __init__(self, name: str, before: tuple[float, float], after: tuple[float, float]) -> None:
+        self.name = name
+        self.before = before
+        self.after = after
+
+
+class Arc:
+    """
+    # `Arc` change, from `origin` to `end`: weights `before` and `after`, `None` when absent.
+    """
+    __slots__ = ("origin", "end", "before", "after")
+
+    origin: str
+    end: str
+    before: float | None
+    after: float | None
+
+    def __init__(self, origin: str, end: str, before: float | None, after: float | None) -> None:
+        self.origin = origin
+        self.end = end
+        self.before = before
+        self.after = after
+
+
+class Node:
+    """
+    # `Node` added, or removed with its arcs.
+    """
+    __slots__ = ("name", "position", "radius", "added", "outgoing", "incoming")
+
+    name: str
+    position: tuple[float, float]
+    radius: float
+    added: bool
+    # Arcs of a removed node: (end, weight) and (origin, weight).
+    outgoing: tuple[tuple[str, float], ...]
+    incoming: tuple[tuple[str, float], ...]
+
+    def __init__(
+        self,
+        name: str,
+        position: tuple[float, float],
+        radius: float,
+        added: bool,
+        outgoing: tuple[tuple[str, float], ...] = (),
+        incoming: tuple[tuple[str, float], ...] = (),
+    ) -> None:
+        self.name = name
+        self.position = position
+        self.radius = radius
+        self.added = added
+        self.outgoing = outgoing
+        self.incoming = incoming
+
+
+Record = Move | Arc | Node
+"""
+Delta record of an edit.
+"""
+
+def size(record: Record) -> int:
+    """
+    Get the approximate memory of a `record`, in bytes. Interned or shared values are counted anyway.
+    """
+    total: int = sys.getsizeof(record)
+    for field in record.__slots__:
+        value: object = getattr(record, field)
+        total += sys.getsizeof(value)
+        if isinstance(value, tuple):
+            for item in value:
+                total += sys.getsizeof(item)
+                if isinstance(item, tuple):
+                    total += sum(sys.getsizeof(part) for part in item)
+    return total
+
+
+class History:
+    """
+    # `History` of edits, for undo and redo.
+    The oldest records are dropped beyond `capacity` records or `budget` bytes: memory stays flat.
+    A new record clears the redo side.
+    """
+    capacity: int
+    budget: int
+    # Records to undo, oldest first, and to redo, latest undone last.
+    _undo: collections.deque[tuple[Record, int]]
+    _redo: list[tuple[Record, int]]
+    # Memory of the records kept, in bytes.
+    bytes: int
+
+    def __init__(self, capacity: int = 4096, budget: int = 4 * 1024 * 1024) -> None:
+        self.capacity = capacity
+        self.budget = budget
+        self._undo = collections.deque()
+        self._redo = list()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        """
+        Number of records to undo.
+        """
+        return len(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        """
+        Whether there is an undone record to redo.
+        """
+        return bool(self._redo)
+
+    def record(self, record: Record) -> None:
+        """
+        Add a `record` of an edit just done.
+        """
+        for _, dropped in self._redo:
+            self.bytes -= dropped
+        self._redo = list()
+
+        amount: int = size(record)
+        self._undo.append((record, amount))
+        self.bytes += amount
+        while self._undo and (len(self._undo) > self.capacity or self.bytes > self.budget):
+            self.bytes -= self._undo.popleft()[1]
+
+    def undo(self) -> Record | None:
+        """
+        Take the latest record to undo, `None` if there is none. The caller reverts it.
+        """
+        if not self._undo:
+            return None
+        entry: tuple[Record, int] = self._undo.pop()
+        self._redo.append(entry)
+        return entry[0]
+
+    def redo(self) -> Record | None:
+        """
+        Take the latest undone record, `None` if there is none. The caller applies it again.
+        """
+        if not self._redo:
+            return None
+        entry: tuple[Record, int] = self._redo.pop()
+        self._undo.append(entry)
+        return entry[0]
+
+    def clear(self) -> None:
+        """
+        Forget every record.
+        """
+        self._undo.clear()
+        self._redo = list()
+        self.bytes = 0
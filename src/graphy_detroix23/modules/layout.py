@@ -0,0 +1,470 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/layout.py
+
+Force-directed layout, with the Barnes-Hut approximation of the repulsion.
+"""
+
+import abc
+import math
+import time
+from types import ModuleType
+from typing import Any, Callable
+
+numpy: ModuleType | None
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class QuadTree:
+    """
+    # Barnes-Hut `QuadTree` cell.
+    Holds the total mass and the center of mass of the bodies inside the square.
+    """
+    MAX_DEPTH: int = 24
+    """
+    Below this depth, bodies are merged in the same leaf, to stop on coincident points.
+    """
+
+    __slots__ = ("x", "y", "size", "mass", "center_x", "center_y", "body", "children")
+
+    x: float
+    y: float
+    size: float
+    mass: float
+    center_x: float
+    center_y: float
+    # Index of the single body of a leaf, -1 if empty or merged.
+    body: int
+    children: list['QuadTree'] | None
+
+    def __init__(self, x: float, y: float, size: float) -> None:
+        self.x = x
+        self.y = y
+        self.size = size
+        self.mass = 0.0
+        self.center_x = 0.0
+        self.center_y = 0.0
+        self.body = -1
+        self.children = None
+
+    @staticmethod
+    def bounding(positions: list[list[float]]) -> 'QuadTree':
+        """
+        Get an empty root cell, containing all the `positions`.
+        """
+        if not positions:
+            return QuadTree(0.0, 0.0, 1.0)
+
+        minimum_x: float = min(position[0] for position in positions)
+        minimum_y: float = min(position[1] for position in positions)
+        size: float = max(
+            max(position[0] for position in positions) - minimum_x,
+            max(position[1] for position in positions) - minimum_y,
+            1.0,
+        )
+        return QuadTree(minimum_x, minimum_y, size * 1.0001)
+
+    @staticmethod
+    def build(positions: list[list[float]]) -> 'QuadTree':
+        """
+        Build the tree of all the `positions`, each of mass 1.
+        """
+        root: QuadTree = QuadTree.bounding(positions)
+        for index, position in enumerate(positions):
+            root.insert(index, position[0], position[1])
+
+        return root
+
+    def _child(self, x: float, y: float) -> 'QuadTree':
+        assert self.children is not None
+        half: float = self.size / 2
+        return self.children[(x >= self.x + half) + 2 * (y >= self.y + half)]
+
+    def _split(self) -> None:
+        half: float = self.size / 2
+        self.children = [
+            QuadTree(self.x, self.y, half),
+            QuadTree(self.x + half, self.y, half),
+            QuadTree(self.x, self.y + half, half),
+            QuadTree(self.x + half, self.y + half, half),
+        ]
+
+    def insert(self, body: int, x: float, y: float) -> None:
+        """
+        Insert a `body` of mass 1 at (`x`, `y`).
+        """
+        cell: QuadTree = self
+        depth: int = 0
+        while True:
+            # Empty leaf.
+            if cell.mass == 0.0 and cell.children is None:
+                cell.mass = 1.0
+                cell.center_x = x
+                cell.center_y = y
+                cell.body = body
+                return
+
+            # Occupied leaf: push its body down.
+            if cell.children is None:
+                if depth >= self.MAX_DEPTH:
+                    cell._add_mass(x, y)
+                    cell.body = -1
+                    return
+
+                cell._split()
+                cell._child(cell.center_x, cell.center_y)._add_body(cell.body, cell.center_x, cell.center_y, cell.mass)
+                cell.body = -1
+
+            cell._add_mass(x, y)
+            cell = cell._child(x, y)
+            depth += 1
+
+    def _add_mass(self, x: float, y: float) -> None:
+        self.center_x = (self.center_x * self.mass + x) / (self.mass + 1.0)
+        self.center_y = (self.center_y * self.mass + y) / (self.mass + 1.0)
+        self.mass += 1.0
+
+    def _add_body(self, body: int, x: float, y: float, mass: float) -> None:
+        self.mass = mass
+        self.center_x = x
+        self.center_y = y
+        self.body = body
+
+    def repulsion(
+        self,
+        body: int,
+        x: float,
+        y: float,
+        strength: float,
+        theta: float,
+    ) -> tuple[float, float]:
+        """
+        Get the repulsion force on `body` at (`x`, `y`), of `strength` / distance per unit of mass.
+        Cells seen under an angle smaller than `theta` are approximated by their center of mass.
+        """
+        force_x: float = 0.0
+        force_y: float = 0.0
+        stack: list[QuadTree] = [self]
+
+        while stack:
+            cell: QuadTree = stack.pop()
+            if cell.mass == 0.0 or cell.body == body:
+                continue
+
+            dx: float = x - cell.center_x
+            dy: float = y - cell.center_y
+            distance_squared: float = dx * dx + dy * dy
+
+            if cell.children is None or cell.size * cell.size < theta * theta * distance_squared:
+                mass: float = cell.mass
+                if cell.children is None and cell.body == -1 and cell.center_x == x and cell.center_y == y:
+                    # Merged leaf containing this body.
+                    mass -= 1.0
+                if distance_squared < 0.01:
+                    # Coincident: push in an arbitrary, body dependent, direction.
+                    angle: float = body * 2.399963
+                    dx, dy, distance_squared = math.cos(angle) * 0.1, math.sin(angle) * 0.1, 0.01
+                force_x += strength * mass * dx / distance_squared
+                force_y += strength * mass * dy / distance_squared
+            else:
+                stack.extend(cell.children)
+
+        return force_x, force_y
+
+
+class Layout(abc.ABC):
+    """
+    # Force-directed `Layout` base: the parameters, the cooling, and the tree of the sweeps.
+    A sweep moves every body once. It is split across calls to `run`, each bounded by a time budget.
+    """
+    spring_length: float
+    theta: float
+    gravity: float
+    temperature: float
+    cooling: float
+    minimum_temperature: float
+    sweeps: int
+
+    # Positions of the bodies of the sweep, as [x, y] rows.
+    positions: Any
+    _tree: QuadTree | None
+    # Bodies inserted in the tree so far.
+    _built: int
+    _next: int
+    _center: tuple[float, float]
+
+    def __init__(
+        self,
+        spring_length: float = 80.0,
+        theta: float = 0.9,
+        gravity: float = 0.01,
+        temperature: float = 20.0,
+        cooling: float = 0.95,
+        minimum_temperature: float = 0.5,
+    ) -> None:
+        self.spring_length = spring_length
+        self.theta = theta
+        self.gravity = gravity
+        self.temperature = temperature
+        self.cooling = cooling
+        self.minimum_temperature = minimum_temperature
+        self.sweeps = 0
+        self._tree = None
+        self._built = 0
+        self._next = 0
+        self._center = (0.0, 0.0)
+
+    @property
+    def in_sweep(self) -> bool:
+        """
+        Whether a sweep is started and not finished.
+        """
+        return self._tree is not None
+
+    @property
+    def settled(self) -> bool:
+        """
+        Whether the layout has cooled down.
+        """
+        return self.temperature <= self.minimum_temperature
+
+    def heat(self, temperature: float = 20.0) -> None:
+        """
+        Restart the cooling, after the graph changed.
+        """
+        self.temperature = max(self.temperature, temperature)
+
+    @abc.abstractmethod
+    def begin(
+        self,
+        positions: Any,
+        arcs: list[tuple[int, int]],
+        center: tuple[float, float],
+    ) -> None:
+        """
+        Start a sweep over bodies at `positions`, pulled by `arcs` as undirected springs,
+        and by the gravity to `center`.
+        """
+        ...
+
+    @abc.abstractmethod
+    def run(self, deadline: float, pinned: Callable[[int], bool]) -> range:
+        """
+        Move bodies of the current sweep until `time.perf_counter()` reaches `deadline`.
+        `pinned` bodies do not move.
+        Returns the range of bodies moved, the sweep is over if it reaches the end.
+        """
+        ...
+
+    def _start_sweep(self, points: list[list[float]], center: tuple[float, float]) -> None:
+        self._tree = QuadTree.bounding(points)
+        self._built = 0
+        self._next = 0
+        self._center = center
+
+    def _grow(self, tree: QuadTree, points: list[list[float]], deadline: float) -> bool:
+        """
+        Insert the `points` not in the `tree` yet, until `deadline`. Returns whether they all are.
+        """
+        while self._built < len(points):
+            if self._built % 64 == 0 and time.perf_counter() >= deadline:
+                return False
+            point: list[float] = points[self._built]
+            tree.insert(self._built, point[0], point[1])
+            self._built += 1
+        return True
+
+    def _end_sweep(self) -> None:
+        self._tree = None
+        self.sweeps += 1
+        self.temperature = max(self.temperature * self.cooling, self.minimum_temperature)
+
+
+class ForceLayout(Layout):
+    """
+    # `ForceLayout`, Fruchterman-Reingold forces relaxed incrementally.
+    """
+    positions: list[list[float]]
+    _neighbors: list[list[int]]
+
+    def __init__(
+        self,
+        spring_length: float = 80.0,
+        theta: float = 0.9,
+        gravity: float = 0.01,
+        temperature: float = 20.0,
+        cooling: float = 0.95,
+        minimum_temperature: float = 0.5,
+    ) -> None:
+        super().__init__(spring_length, theta, gravity, temperature, cooling, minimum_temperature)
+        self.positions = list()
+        self._neighbors = list()
+
+    def begin(
+        self,
+        positions: list[tuple[float, float]],
+        arcs: list[tuple[int, int]],
+        center: tuple[float, float],
+    ) -> None:
+        """
+        Start a sweep over bodies at `positions`, pulled by `arcs` as undirected springs,
+        and by the gravity to `center`.
+        """
+        self.positions = [[position[0], position[1]] for position in positions]
+        self._neighbors = [list() for _ in positions]
+        for origin, end in arcs:
+            if origin != end:
+                self._neighbors[origin].append(end)
+                self._neighbors[end].append(origin)
+        self._start_sweep(self.positions, center)
+
+    def run(self, deadline: float, pinned: Callable[[int], bool]) -> range:
+        if self._tree is None:
+            return range(0)
+        tree: QuadTree = self._tree
+        if not self._grow(tree, self.positions, deadline):
+            return range(0)
+
+        start: int = self._next
+        length: float = self.spring_length
+        strength: float = length * length
+
+        index: int = start
+        while index < len(self.positions):
+            # Check the clock every few bodies only.
+            if (index - start) % 16 == 0 and index > start and time.perf_counter() >= deadline:
+                break
+
+            if not pinned(index):
+                position: list[float] = self.positions[index]
+                force_x, force_y = tree.repulsion(index, position[0], position[1], strength, self.theta)
+
+                for neighbor in self._neighbors[index]:
+                    other: list[float] = self.positions[neighbor]
+                    dx: float = other[0] - position[0]
+                    dy: float = other[1] - position[1]
+                    distance: float = math.sqrt(dx * dx + dy * dy)
+                    force_x += dx * distance / length
+                    force_y += dy * distance / length
+
+                force_x += (self._center[0] - position[0]) * self.gravity * length
+                force_y += (self._center[1] - position[1]) * self.gravity * length
+
+                norm: float = math.sqrt(force_x * force_x + force_y * force_y)
+                if norm > 0.0:
+                    displacement: float = min(norm, self.temperature) / norm
+                    position[0] += force_x * displacement
+                    position[1] += force_y * displacement
+
+            index += 1
+
+        self._next = index
+        if index >= len(self.positions):
+            self._end_sweep()
+
+        return range(start, index)
+
+
+class VectorLayout(Layout):
+    """
+    # `VectorLayout`, `ForceLayout` with `numpy` for the sums of forces and the moves.
+    The repulsion keeps the Barnes-Hut tree. The springs are summed once per sweep,
+    and bodies are moved by chunks, a sweep split across calls to `run` the same way.
+    """
+    CHUNK: int = 64
+    """
+    Bodies moved together, between checks of the clock.
+    """
+
+    positions: Any
+    _attraction: Any
+    # Positions the tree is built from, as lists: faster to read one by one than the array.
+    _points: list[list[float]]
+
+    def __init__(
+        self,
+        spring_length: float = 80.0,
+        theta: float = 0.9,
+        gravity: float = 0.01,
+        temperature: float = 20.0,
+        cooling: float = 0.95,
+        minimum_temperature: float = 0.5,
+    ) -> None:
+        if numpy is None:
+            raise ModuleNotFoundError("numpy is needed for the vectorized layout.")
+
+        super().__init__(spring_length, theta, gravity, temperature, cooling, minimum_temperature)
+        self.positions = numpy.zeros((0, 2))
+        self._attraction = numpy.zeros((0, 2))
+        self._points = list()
+
+    def begin(
+        self,
+        positions: Any,
+        arcs: list[tuple[int, int]],
+        center: tuple[float, float],
+    ) -> None:
+        """
+        Start a sweep over bodies at `positions`, pulled by `arcs` as undirected springs,
+        and by the gravity to `center`.
+        The attraction is computed once for the whole sweep.
+        """
+        assert numpy is not None
+        self.positions = numpy.array(positions, dtype=numpy.float64).reshape((-1, 2))
+        self._attraction = numpy.zeros_like(self.positions)
+
+        if arcs:
+            pairs: Any = numpy.array(arcs, dtype=numpy.int64)
+            pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+            vectors: Any = self.positions[pairs[:, 1]] - self.positions[pairs[:, 0]]
+            forces: Any = vectors * (numpy.hypot(vectors[:, 0], vectors[:, 1]) / self.spring_length)[:, None]
+            numpy.add.at(self._attraction, pairs[:, 0], forces)
+            numpy.add.at(self._attraction, pairs[:, 1], -forces)
+
+        self._points = self.positions.tolist()
+        self._start_sweep(self._points, center)
+
+    def run(self, deadline: float, pinned: Callable[[int], bool]) -> range:
+        """
+        Move chunks of bodies of the current sweep until `time.perf_counter()` reaches `deadline`.
+        `pinned` bodies do not move.
+        Returns the range of bodies moved, the sweep is over if it reaches the end.
+        """
+        assert numpy is not None
+        if self._tree is None:
+            return range(0)
+        tree: QuadTree = self._tree
+        points: list[list[float]] = self._points
+        if not self._grow(tree, points, deadline):
+            return range(0)
+
+        start: int = self._next
+        strength: float = self.spring_length * self.spring_length
+        count: int = len(points)
+
+        while self._next < count and (self._next == start or time.perf_counter() < deadline):
+            chunk: range = range(self._next, min(self._next + self.CHUNK, count))
+            forces: Any = numpy.array([
+                tree.repulsion(index, points[index][0], points[index][1], strength, self.theta)
+                for index in chunk
+            ]).reshape((-1, 2))
+
+            rows: Any = self.positions[chunk.start:chunk.stop]
+            forces += self._attraction[chunk.start:chunk.stop]
+            forces += (numpy.array(self._center) - rows) * (self.gravity * self.spring_length)
+
+            norms: Any = numpy.hypot(forces[:, 0], forces[:, 1])
+            factors: Any = numpy.where(norms > 0.0, numpy.minimum(norms, self.temperature) / numpy.maximum(norms, 1e-12), 0.0)
+            for index in chunk:
+                if pinned(index):
+                    factors[index - chunk.start] = 0.0
+
+            rows += forces * factors[:, None]
+            self._next = chunk.stop
+
+        if self._next >= count:
+            self._end_sweep()
+
+        return range(start, self._next)
@@ -0,0 +1,84 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/names.py
+
+Integer node ids, and the names generated from them: spreadsheet-style `A`, ..., `Z`, `AA`, ... or numeric.
+Ids of removed nodes are reused, smallest first, so generated names stay short.
+"""
+
+import enum
+import heapq
+import string
+
+class Style(enum.Enum):
+    """
+    # `Style` of the generated names.
+    """
+    # `A`, ..., `Z`, `AA`, `AB`, ...
+    LETTERS = 0
+    # `0`, `1`, ...
+    NUMBERS = 1
+
+
+def letters(identifier: int) -> str:
+    """
+    Get the spreadsheet column name of `identifier`, from 0: `A`, ..., `Z`, `AA`, ...
+    """
+    name: list[str] = list()
+    identifier += 1
+    while identifier > 0:
+        identifier, remainder = divmod(identifier - 1, 26)
+        name.append(string.ascii_uppercase[remainder])
+    return "".join(reversed(name))
+
+
+class Allocator:
+    """
+    # `Allocator` of integer ids, with a free list.
+    """
+    style: Style
+    # Ids released, as a heap.
+    _free: list[int]
+    _next: int
+
+    def __init__(self, style: Style = Style.LETTERS) -> None:
+        self.style = style
+        self._free = list()
+        self._next = 0
+
+    def __len__(self) -> int:
+        """
+        Number of ids in use.
+        """
+        return self._next - len(self._free)
+
+    def allocate(self) -> int:
+        """
+        Get an unused id, the smallest released one first.
+        """
+        if self._free:
+            return heapq.heappop(self._free)
+        identifier: int = self._next
+        self._next += 1
+        return identifier
+
+    def release(self, identifier: int) -> None:
+        """
+        Make `identifier` available again.
+        """
+        heapq.heappush(self._free, identifier)
+
+    def clear(self) -> None:
+        """
+        Release every id.
+        """
+        self._free = list()
+        self._next = 0
+
+    def name(self, identifier: int) -> str:
+        """
+        Get the name generated for `identifier`.
+        """
+        if self.style == Style.NUMBERS:
+            return str(identifier)
+        return letters(identifier)
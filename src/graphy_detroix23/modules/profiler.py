@@ -0,0 +1,227 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/profiler.py
+
+Per-frame timing scopes, draw counters, on-screen overlay and Chrome trace export.
+"""
+
+import collections
+import json
+import os
+import pathlib
+import threading
+import time
+from typing import Any
+
+import pyxel
+
+from graphy_detroix23.modules import backend
+
+class Scope:
+    """
+    # Timing `Scope`, a context manager adding its duration to the `Profiler`.
+    """
+    __slots__ = ("name", "profiler", "start")
+
+    name: str
+    profiler: 'Profiler'
+    start: float
+
+    def __init__(self, name: str, profiler: 'Profiler') -> None:
+        self.name = name
+        self.profiler = profiler
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *_: object) -> None:
+        self.profiler.record(self.name, self.start, time.perf_counter())
+
+
+class Profiler:
+    """
+    # Frame `Profiler`.
+    Scopes and counters are summed over a frame, between `begin_frame` and `end_frame`.
+    """
+    # Frames kept in the histogram.
+    HISTORY: int = 120
+    # Smoothing of the scope durations, between frames.
+    SMOOTHING: float = 0.1
+    # Scopes listed by the overlay.
+    TOP: int = 6
+
+    shown: bool
+    tracing: bool
+    # Rolling frame durations, in seconds.
+    frame_times: collections.deque[float]
+    # Smoothed durations per frame of each scope, in seconds.
+    scopes: dict[str, float]
+    # Counts of the last frame.
+    counts: dict[str, int]
+    _scopes: dict[str, Scope]
+    _frame_scopes: dict[str, float]
+    _frame_counts: dict[str, int]
+    _frame_start: float | None
+    _events: list[dict[str, Any]]
+    _origin: float
+
+    def __init__(self) -> None:
+        self.shown = False
+        self.tracing = False
+        self.frame_times = collections.deque(maxlen=self.HISTORY)
+        self.scopes = dict()
+        self.counts = dict()
+        self._scopes = dict()
+        self._frame_scopes = dict()
+        self._frame_counts = dict()
+        self._frame_start = None
+        self._events = list()
+        self._origin = time.perf_counter()
+
+    def scope(self, name: str) -> Scope:
+        """
+        Get the timing `Scope` named `name`: `with PROFILER.scope("name"): ...`.
+        """
+        scope: Scope | None = self._scopes.get(name)
+        if scope is None:
+            scope = Scope(name, self)
+            self._scopes[name] = scope
+        return scope
+
+    def record(self, name: str, start: float, end: float) -> None:
+        """
+        Add a duration to the scope `name`.
+        """
+        self._frame_scopes[name] = self._frame_scopes.get(name, 0.0) + end - start
+        if self.tracing:
+            self._events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Increment the counter `name`, for this frame.
+        """
+        self._frame_counts[name] = self._frame_counts.get(name, 0) + amount
+
+    def begin_frame(self) -> None:
+        """
+        Start a frame, at the beginning of the update.
+        Updates without drawing, when `pyxel` catches up, stay in the same frame.
+        """
+        if self._frame_start is None:
+            self._frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        """
+        End a frame, after the drawing: keep its duration, smooth the scopes and reset the counters.
+        """
+        if self._frame_start is None:
+            return
+        end: float = time.perf_counter()
+        self.frame_times.append(end - self._frame_start)
+
+        for name in self.scopes.keys() - self._frame_scopes.keys():
+            self._frame_scopes[name] = 0.0
+        for name, duration in self._frame_scopes.items():
+            self.scopes[name] = self.scopes.get(name, duration) * (1.0 - self.SMOOTHING) + duration * self.SMOOTHING
+
+        self.counts = self._frame_counts
+        if self.tracing:
+            self._events.append({
+                "name": "draw calls",
+                "ph": "C",
+                "ts": (end - self._origin) * 1e6,
+                "pid": os.getpid(),
+                "args": dict(self.counts),
+            })
+            self.record("frame", self._frame_start, end)
+
+        self._frame_scopes = dict()
+        self._frame_counts = dict()
+        self._frame_start = None
+
+    def toggle_overlay(self) -> None:
+        """
+        Show or hide the overlay.
+        """
+        self.shown = not self.shown
+
+    def start_trace(self) -> None:
+        """
+        Start recording trace events.
+        """
+        self._events = list()
+        self.tracing = True
+
+    def stop_trace(self, path: pathlib.Path) -> int:
+        """
+        Stop recording, and write the events to `path`, in the Chrome trace-event format.
+        Open with `chrome://tracing` or Perfetto. Returns the number of events.
+        """
+        self.tracing = False
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self._events, "displayTimeUnit": "ms"}, file)
+        count: int = len(self._events)
+        self._events = list()
+        return count
+
+    def draw(self, budget: float = 1.0 / 30.0) -> None:
+        """
+        Draw the overlay, bottom right: frame-time histogram, top scopes and counters.
+        Bars above the frame `budget` are red.
+        Drawn directly on the screen of the backend, not counted.
+        """
+        if not self.shown:
+            return
+        screen: Any = backend.current.screen
+
+        width: int = self.HISTORY * 2
+        height: int = 40
+        lines: int = self.TOP + 2
+        x: int = backend.current.width - width - 8
+        y: int = backend.current.height - height - lines * 7 - 12
+
+        screen.dither(0.7)
+        screen.rect(x - 4, y - 4, width + 8, height + lines * 7 + 12, pyxel.COLOR_BLACK)
+        screen.dither(1.0)
+
+        # Histogram, the budget at mid height.
+        bottom: int = y + height
+        for index, duration in enumerate(self.frame_times):
+            bar: float = min(duration / (2.0 * budget), 1.0) * height
+            screen.rect(
+                x + index * 2,
+                bottom - bar,
+                2,
+                max(bar, 1.0),
+                pyxel.COLOR_RED if duration > budget else pyxel.COLOR_GREEN,
+            )
+        screen.line(x, bottom - height // 2, x + width, bottom - height // 2, pyxel.COLOR_GRAY)
+
+        latest: float = self.frame_times[-1] if self.frame_times else 0.0
+        text_y: int = bottom + 4
+        screen.text(x, text_y, f"frame {latest * 1e3:6.2f}ms {'TRACE' if self.tracing else ''}", pyxel.COLOR_WHITE)
+
+        top: list[tuple[str, float]] = sorted(self.scopes.items(), key=lambda item: item[1], reverse=True)[:self.TOP]
+        for index, (name, duration) in enumerate(top):
+            screen.text(x, text_y + (index + 1) * 7, f"{duration * 1e3:6.2f}ms {name}"[:width // 4], pyxel.COLOR_WHITE)
+
+        screen.text(
+            x,
+            text_y + (self.TOP + 1) * 7,
+            " ".join(f"{name} {count}" for name, count in sorted(self.counts.items()))[:width // 4],
+            pyxel.COLOR_LIGHT_BLUE,
+        )
+
+
+PROFILER: Profiler = Profiler()
+"""
+Profiler of the application.
+"""
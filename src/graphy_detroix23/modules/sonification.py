@@ -0,0 +1,363 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/sonification.py
+
+Sonification of graph traversals.
+Nodes are visited by BFS, DFS or a weighted random walk. Their degree gives the pitch, the weight of
+the arc followed gives the length, and the depth gives the channel.
+"""
+
+import bisect
+import collections
+import enum
+import itertools
+import math
+import queue
+import random
+import threading
+from typing import Iterator, Mapping, Sequence
+
+from graphy_detroix23.modules import backend, defaults, sound
+
+Rows = Sequence[Mapping[int, float]]
+"""
+Outgoing arcs of each node: {end index: weight}.
+"""
+
+Step = tuple[int, int, float]
+"""
+(node index, depth, weight of the arc followed to the node).
+"""
+
+class Mode(enum.Enum):
+    """
+    # Traversal `Mode`.
+    """
+    BFS = 0
+    DFS = 1
+    WALK = 2
+
+
+def breadth_first(rows: Rows, start: int = 0) -> Iterator[Step]:
+    """
+    Yield the nodes in breadth-first order from `start`, then from each node not reached yet.
+    """
+    seen: list[bool] = [False] * len(rows)
+    for root in itertools.chain((start,), range(len(rows))):
+        if seen[root]:
+            continue
+        seen[root] = True
+        waiting: collections.deque[Step] = collections.deque([(root, 0, 0.0)])
+        while waiting:
+            node, depth, weight = waiting.popleft()
+            yield node, depth, weight
+            for end, arc in rows[node].items():
+                if not seen[end]:
+                    seen[end] = True
+                    waiting.append((end, depth + 1, arc))
+
+def depth_first(rows: Rows, start: int = 0) -> Iterator[Step]:
+    """
+    Yield the nodes in depth-first order from `start`, then from each node not reached yet.
+    Iterative, the depth of the graph is not limited by the stack.
+    """
+    seen: list[bool] = [False] * len(rows)
+    for root in itertools.chain((start,), range(len(rows))):
+        if seen[root]:
+            continue
+        stack: list[Step] = [(root, 0, 0.0)]
+        while stack:
+            node, depth, weight = stack.pop()
+            if seen[node]:
+                continue
+            seen[node] = True
+            yield node, depth, weight
+            # Reversed, so the first neighbor is visited first.
+            for end, arc in reversed(list(rows[node].items())):
+                if not seen[end]:
+                    stack.append((end, depth + 1, arc))
+
+def random_walk(rows: Rows, start: int = 0, steps: int = 256, seed: int | None = None) -> Iterator[Step]:
+    """
+    Yield `steps` nodes of a random walk from `start`, choosing arcs by the absolute value of their weight.
+    On a node without arcs, the walk jumps to a random node.
+    """
+    rng: random.Random = random.Random(seed)
+    node: int = start
+    depth: int = 0
+    weight: float = 0.0
+    for _ in range(steps):
+        yield node, depth, weight
+
+        row: Mapping[int, float] = rows[node]
+        if not row:
+            node, depth, weight = rng.randrange(len(rows)), 0, 0.0
+            continue
+
+        ends: list[int] = list(row)
+        weights: list[float] = [abs(arc) for arc in row.values()]
+        node = rng.choices(ends, weights if sum(weights) > 0 else None)[0]
+        depth += 1
+        weight = row[node]
+
+def traverse(mode: Mode, rows: Rows, start: int = 0, seed: int | None = None) -> Iterator[Step]:
+    """
+    Traverse the graph by `mode`. Random walks last twice the number of nodes.
+    """
+    if not rows:
+        return iter(())
+    if mode == Mode.BFS:
+        return breadth_first(rows, start)
+    if mode == Mode.DFS:
+        return depth_first(rows, start)
+    return random_walk(rows, start, max(64, 2 * len(rows)), seed)
+
+
+class Phrase:
+    """
+    # `Phrase` of the sonification: a few steps, one MML string per channel.
+    """
+    __slots__ = ("nodes", "ends", "channels")
+
+    # Name of the node sounding at each step.
+    nodes: list[str]
+    # End of each step, in seconds from the start of the phrase.
+    ends: list[float]
+    channels: list[str]
+
+    def __init__(self, nodes: list[str], ends: list[float], channels: list[str]) -> None:
+        self.nodes = nodes
+        self.ends = ends
+        self.channels = channels
+
+    @property
+    def duration(self) -> float:
+        """
+        Length of the phrase, in seconds.
+        """
+        return self.ends[-1] if self.ends else 0.0
+
+    def node_at(self, elapsed: float) -> str | None:
+        """
+        Get the node sounding `elapsed` seconds after the start.
+        """
+        index: int = bisect.bisect_right(self.ends, elapsed)
+        return self.nodes[index] if index < len(self.nodes) else None
+
+
+class Composer:
+    """
+    # `Composer` of phrases from traversal steps.
+    - The out-degree is the degree in the `scale`, from `base_octave`.
+    - The weight of the arc followed sets the length: heavier is longer.
+    - Voices take turns by depth, the others rest.
+    """
+    # Note divisions, from no or light arcs to heavy ones.
+    DIVISIONS: tuple[int, ...] = (16, 8, 4, 2)
+
+    tempo: int
+    velocity: int
+    length: int
+    voices: int
+    base_octave: int
+    phrase_steps: int
+    # Semitones from the base of each degree of the scale, over one octave.
+    _offsets: list[int]
+
+    def __init__(
+        self,
+        tempo: int = 160,
+        velocity: int = 64,
+        length: int = 90,
+        voices: int = 3,
+        scale: list[int] = defaults.SCALE_MAJOR,
+        base_octave: int = 3,
+        phrase_steps: int = 16,
+    ) -> None:
+        self.tempo = tempo
+        self.velocity = velocity
+        self.length = length
+        self.voices = voices
+        self.base_octave = base_octave
+        self.phrase_steps = phrase_steps
+        self._offsets = list(itertools.accumulate(scale))[:-1] or [0]
+
+    def pitch(self, degree: int) -> tuple[int, int]:
+        """
+        Get the (octave, semitone) of a node of out-`degree`, two octaves at most.
+        """
+        degree = min(degree, 2 * len(self._offsets))
+        octave, index = divmod(degree, len(self._offsets))
+        extra, semitone = divmod(self._offsets[index], len(sound.NOTE))
+        return (self.base_octave + octave + extra, semitone)
+
+    def division(self, weight: float) -> int:
+        """
+        Get the note division of an arc of `weight`.
+        """
+        index: int = int(math.log2(1.0 + abs(weight)))
+        return self.DIVISIONS[min(index, len(self.DIVISIONS) - 1)]
+
+    def seconds(self, division: int) -> float:
+        """
+        Duration of a note of `division`, at the `tempo`.
+        """
+        return 240.0 / (self.tempo * division)
+
+    def phrases(self, steps: Iterator[Step], rows: Rows, names: Sequence[str]) -> Iterator[Phrase]:
+        """
+        Stream the phrases of a traversal, `phrase_steps` steps at a time.
+        """
+        header: str = f"T{self.tempo} Q{self.length} V{self.velocity} "
+        while True:
+            chunk: list[Step] = list(itertools.islice(steps, self.phrase_steps))
+            if not chunk:
+                return
+
+            nodes: list[str] = list()
+            ends: list[float] = list()
+            tokens: list[list[str]] = [list() for _ in range(self.voices)]
+            octaves: list[int | None] = [None] * self.voices
+            elapsed: float = 0.0
+
+            for node, depth, weight in chunk:
+                division: int = self.division(weight)
+                voice: int = depth % self.voices
+                octave, semitone = self.pitch(len(rows[node]))
+                for other in range(self.voices):
+                    if other != voice:
+                        tokens[other].append(f"R{division}")
+                if octaves[voice] != octave:
+                    tokens[voice].append(f"O{octave}")
+                    octaves[voice] = octave
+                tokens[voice].append(f"{sound.NOTE[semitone]}{division}")
+
+                elapsed += self.seconds(division)
+                nodes.append(names[node])
+                ends.append(elapsed)
+
+            yield Phrase(nodes, ends, [header + " ".join(voice) for voice in tokens])
+
+
+class Stream:
+    """
+    # `Stream` of phrases, from a worker to the main loop.
+    The queue is bounded: the worker waits while the player is behind.
+    """
+    _phrases: queue.Queue[Phrase | None]
+    _stopped: threading.Event
+
+    def __init__(self, ahead: int = 4) -> None:
+        self._phrases = queue.Queue(maxsize=ahead)
+        self._stopped = threading.Event()
+
+    @property
+    def stopped(self) -> bool:
+        """
+        Whether the stream was stopped by the player.
+        """
+        return self._stopped.is_set()
+
+    def put(self, phrase: Phrase | None) -> bool:
+        """
+        Worker side: queue a `phrase`, `None` at the end. Returns `False` once stopped.
+        """
+        while not self._stopped.is_set():
+            try:
+                self._phrases.put(phrase, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self) -> Phrase | None:
+        """
+        Main loop side: get the next phrase. Raises `queue.Empty` when the worker is behind.
+        """
+        return self._phrases.get_nowait()
+
+    def stop(self) -> None:
+        """
+        Stop the worker.
+        """
+        self._stopped.set()
+
+
+class Player:
+    """
+    # `Player` of phrase streams, on the channels not used by the sound effects.
+    """
+    channels: tuple[int, ...]
+    stream: Stream | None
+    phrase: Phrase | None
+    # Node sounding now, by name.
+    node: str | None
+    _started: float
+
+    def __init__(self, channels: tuple[int, ...] = (1, 2, 3)) -> None:
+        self.channels = channels
+        self.stream = None
+        self.phrase = None
+        self.node = None
+        self._started = 0.0
+
+    @property
+    def playing(self) -> bool:
+        """
+        Whether a stream is being played.
+        """
+        return self.stream is not None
+
+    def start(self) -> Stream:
+        """
+        Stop the current stream, and get a new one to fill from a worker.
+        """
+        self.stop()
+        self.stream = Stream()
+        for channel in self.channels:
+            sound.SCHEDULER.reserved.add(channel)
+        return self.stream
+
+    def stop(self) -> None:
+        """
+        Stop playing, and the worker.
+        """
+        if self.stream is None:
+            return
+
+        self.stream.stop()
+        self.stream = None
+        self.phrase = None
+        self.node = None
+        for channel in self.channels:
+            backend.current.stop(channel)
+            sound.SCHEDULER.reserved.discard(channel)
+
+    def update(self) -> str | None:
+        """
+        Start the next phrase when the current one is over. Returns the node sounding now.
+        Timed by the backend clock: by frames, deterministic, when headless.
+        """
+        if self.stream is None:
+            return None
+
+        now: float = backend.current.clock()
+        if self.phrase is None or now - self._started >= self.phrase.duration:
+            try:
+                self.phrase = self.stream.get()
+            except queue.Empty:
+                # Worker behind: silence until the next phrase.
+                self.phrase = None
+                self.node = None
+                return None
+
+            if self.phrase is None:
+                self.stop()
+                return None
+
+            self._started = now
+            for channel, mml in zip(self.channels, self.phrase.channels):
+                backend.current.play(channel, mml)
+
+        self.node = self.phrase.node_at(now - self._started)
+        return self.node
@@ -5,11 +5,14 @@
 Sounds for `pyxel`, using Music Macro Language.
 """
 
+import collections
 import enum
 from typing import Final
 
 import pyxel
 
+from graphy_detroix23.modules import backend
+
 _MML_EXAMPLE = """
 'T133 L8 @ENV1{0,0,127,60,102,10,0} Q88 V96 @2 @ENV1 @VIB0 O4B2&8>GGD C8.<B8.A>C4C4 D2&8<GB16B8. 
 R4.>C<BA>CC <B2&8>GGD C8.<B8.A>C4C4 D4&16<G16A16B16>D2 <A4.>F16<F16A4.>D16<A16', 
@@ -35,6 +38,36 @@ BIARPEGGIO: Final[list[str]] = [
 Bi-directional arpeggio, from _A♯_, by _G_, to _A_.
 """
 
+DEGREE_INDEX: Final[dict[str, int]] = {degree: index for index, degree in enumerate(DEGREES)}
+"""
+Index in `DEGREES` of each letter.
+"""
+DEGREE_SEMITONE: Final[list[int]] = [NOTE.index(degree) for degree in DEGREES]
+"""
+Semitone, index in `NOTE`, of each degree index.
+"""
+OCTAVES: Final[range] = range(-8, 9)
+"""
+Relative octaves with a precomputed token.
+"""
+TOKENS: Final[dict[tuple[int, int], str]] = {
+    (semitone, octave): (">" * octave if octave > 0 else "<" * -octave) + NOTE[semitone]
+    for octave in OCTAVES
+    for semitone in range(len(NOTE))
+}
+"""
+MML token of each (semitone, relative octave).
+"""
+
+def token(semitone: int, octave: int) -> str:
+    """
+    Get the MML token of a `semitone` (index in `NOTE`), `octave`s above or under.
+    """
+    result: str | None = TOKENS.get((semitone, octave))
+    if result is None:
+        result = (">" * octave if octave > 0 else "<" * -octave) + NOTE[semitone]
+    return result
+
 class Signature(enum.Enum):
     """
     # Key `Signature`.
@@ -57,12 +90,24 @@ class Signature(enum.Enum):
     """
 
 
+SIGNATURE_SHIFT: Final[dict[Signature, int]] = {
+    Signature.NONE: 0,
+    Signature.SHARP: 1,
+    Signature.FLAT: -1,
+}
+"""
+Shift in ½ tones of each `Signature`.
+"""
+
+
 class Note:
     """
     # Single MML `Note`.
     Parameters:
     - `octave` how many octaves above (>0) or under (<0)
     """
+    __slots__ = ("octave", "degree_index", "signature", "_note_index")
+
     OCTAVE_ABOVE: str = ">"
     OCTAVE_UNDER: str = "<"
 
@@ -79,7 +124,7 @@ class Note:
     ) -> None:
         self.octave = octave
         if isinstance(degree_index, str):
-            self.degree_index = DEGREES.index(degree_index)
+            self.degree_index = DEGREE_INDEX[degree_index]
         else:
             self.degree_index = degree_index
         
@@ -92,22 +137,21 @@ class Note:
         """
         Get and set `note_index` from a `Note`.
         """
-        self._note_index = NOTE.index(DEGREES[note.degree_index])
-        if note.signature == Signature.FLAT:
-            self.increment_pitch(-1)
-        elif note.signature == Signature.SHARP:
-            self.increment_pitch(1)
+        self._note_index = DEGREE_SEMITONE[note.degree_index]
+        if note.signature != Signature.NONE:
+            self.increment_pitch(SIGNATURE_SHIFT[note.signature])
 
         return self._note_index
 
     def __str__(self) -> str:
-        octave: str = ""
-        if self.octave > 0:
-            octave = self.OCTAVE_ABOVE * self.octave
-        elif self.octave < 0:
-            octave = self.OCTAVE_UNDER * abs(self.octave)
+        return token(self._note_index, self.octave)
 
-        return f"{octave}{self.note}"
+    @property
+    def pitch(self) -> tuple[int, int]:
+        """
+        Get the (octave, semitone) of the _note_, as in a sound `Key`.
+        """
+        return (self.octave, self._note_index)
 
     def clone(self) -> 'Note':
         """
@@ -157,6 +201,197 @@ class Note:
         self.degree_index = (self.degree_index + value) % len(DEGREES)
 
 
+Key = tuple[int, int, int, int, tuple[tuple[int, int], ...]]
+"""
+(tempo, division, length, velocity, notes as (octave, note index)), identifies a compiled sound.
+"""
+
+def expression(key: Key) -> str:
+    """
+    Build the MML string of a sound `key`.
+    """
+    tempo, division, length, velocity, notes = key
+    return f"T{tempo} L{division} Q{length} V{velocity} " + " ".join([
+        token(semitone, octave) for octave, semitone in notes
+    ])
+
+class SoundCache:
+    """
+    # `SoundCache` of compiled MML.
+    Each MML is parsed once into a `pyxel` sound slot, and replayed by slot.
+    The least recently used slot is recompiled when all are taken.
+    """
+    # Slots used, after the ones of the resource file.
+    FIRST_SLOT: int = 32
+    LAST_SLOT: int = 63
+
+    _slots: collections.OrderedDict[Key, int]
+    compilations: int
+
+    def __init__(self) -> None:
+        self._slots = collections.OrderedDict()
+        self.compilations = 0
+
+    def slot(self, key: Key) -> int:
+        """
+        Get the slot of the sound `key`, compiling it on a miss.
+        """
+        slot: int | None = self._slots.get(key)
+        if slot is not None:
+            self._slots.move_to_end(key)
+            return slot
+
+        if len(self._slots) <= self.LAST_SLOT - self.FIRST_SLOT:
+            slot = self.FIRST_SLOT + len(self._slots)
+        else:
+            _, slot = self._slots.popitem(last=False)
+
+        pyxel.sounds[slot].mml(expression(key))
+        self._slots[key] = slot
+        self.compilations += 1
+        return slot
+
+    def clear(self) -> None:
+        """
+        Forget the compiled sounds.
+        """
+        self._slots.clear()
+
+
+CACHE: SoundCache = SoundCache()
+"""
+Compiled sounds of the application.
+"""
+
+class Event:
+    """
+    # Sound `Event`, waiting in the `Scheduler`.
+    """
+    __slots__ = ("kind", "key", "channel", "loop")
+
+    kind: str
+    key: Key
+    # Preferred channel.
+    channel: int
+    loop: bool
+
+    def __init__(self, kind: str, key: Key, channel: int, loop: bool) -> None:
+        self.kind = kind
+        self.key = key
+        self.channel = channel
+        self.loop = loop
+
+
+class Scheduler:
+    """
+    # Audio `Scheduler`.
+    Sounds are queued during a frame, and played by `flush`, at its end:
+    - The same sound of the same kind is merged, within a frame.
+    - A kind plays at most once per its interval, in frames. Others are dropped.
+    - Kinds keep their channel while they own it, new ones take an idle channel, else the oldest.
+    - At most one sound per channel per frame, the extra ones are dropped.
+    - `reserved` channels are left to other players.
+    """
+    CHANNELS: int = 4
+
+    frame: int
+    _pending: dict[tuple[str, Key], Event]
+    # Last frame each kind was accepted.
+    _last: dict[str, int]
+    # Kind playing on each channel, and since when.
+    _owners: list[str | None]
+    _started: list[int]
+    reserved: set[int]
+    submitted: int
+    played: int
+    merged: int
+    dropped: int
+
+    def __init__(self) -> None:
+        self.frame = 0
+        self._pending = dict()
+        self._last = dict()
+        self._owners = [None] * self.CHANNELS
+        self._started = [0] * self.CHANNELS
+        self.reserved = set()
+        self.submitted = 0
+        self.played = 0
+        self.merged = 0
+        self.dropped = 0
+
+    def submit(self, kind: str, key: Key, channel: int = 0, interval: int = 0, loop: bool = False) -> bool:
+        """
+        Queue the sound `key`, of the given `kind`. Returns whether it was queued or merged.
+        """
+        self.submitted += 1
+        if (kind, key) in self._pending:
+            self.merged += 1
+            return True
+
+        last: int | None = self._last.get(kind)
+        if last is not None and interval > 0 and self.frame - last < interval:
+            self.dropped += 1
+            return False
+
+        self._last[kind] = self.frame
+        self._pending[(kind, key)] = Event(kind, key, channel % self.CHANNELS, loop)
+        return True
+
+    def _channel(self, event: Event, taken: set[int]) -> int | None:
+        for channel, owner in enumerate(self._owners):
+            if owner == event.kind and channel not in taken:
+                return channel
+
+        free: list[int] = [channel for channel in range(self.CHANNELS) if channel not in taken]
+        if not free:
+            return None
+        idle: list[int] = [channel for channel in free if backend.current.play_pos(channel) is None]
+        if event.channel in idle:
+            return event.channel
+        if idle:
+            return idle[0]
+        return min(free, key=lambda channel: self._started[channel])
+
+    def flush(self) -> int:
+        """
+        Play the queued sounds, once per frame. Returns how many were played.
+        """
+        taken: set[int] = set(self.reserved)
+        played: int = 0
+        for event in self._pending.values():
+            channel: int | None = self._channel(event, taken)
+            if channel is None:
+                self.dropped += 1
+                continue
+
+            backend.current.play(channel, CACHE.slot(event.key), loop=event.loop)
+            taken.add(channel)
+            self._owners[channel] = event.kind
+            self._started[channel] = self.frame
+            played += 1
+
+        self.played += played
+        self._pending.clear()
+        self.frame += 1
+        return played
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the counts of submitted, played, merged and dropped sounds.
+        """
+        return {
+            "submitted": self.submitted,
+            "played": self.played,
+            "merged": self.merged,
+            "dropped": self.dropped,
+        }
+
+
+SCHEDULER: Scheduler = Scheduler()
+"""
+Audio scheduler of the application.
+"""
+
 class MML:
     """
     # `MML` Music Macro Language music generator.
@@ -168,6 +403,9 @@ class MML:
     velocity: int
     notes: list[Note]
     loop: bool
+    # Scheduling: kind of sound, by default its own, and minimal frames between two plays.
+    kind: str
+    interval: int
 
     def __init__(
         self,
@@ -178,7 +416,11 @@ class MML:
         velocity: int, 
         notes: list[Note],
         loop: bool = False,
+        kind: str | None = None,
+        interval: int = 2,
     ) -> None:
+        self.kind = kind if kind is not None else f"MML {id(self)}"
+        self.interval = interval
         self.channel = channel
         self.tempo = tempo
         self.division = division
@@ -199,11 +441,23 @@ class MML:
         """
         return " ".join([str(note) for note in self.notes])
 
+    def key(self) -> Key:
+        """
+        Get the `Key` of the sound, without building the MML string.
+        """
+        return (
+            self.tempo,
+            self.division,
+            self.length,
+            self.velocity,
+            tuple([note.pitch for note in self.notes]),
+        )
+
     def play(self) -> None:
         """
-        Use `pyxel` to `play` the MML string.
+        Submit the MML to the `SCHEDULER`, played at the end of the frame, compiled once in the `CACHE`.
         """
-        pyxel.play(self.channel, self.__str__(), loop=self.loop)
+        SCHEDULER.submit(self.kind, self.key(), self.channel, self.interval, self.loop)
     
 
 class Incrementing(MML):
@@ -224,8 +478,10 @@ class Incrementing(MML):
         start_note: Note,
         scale: list[int],
         loop: bool = False,
+        kind: str | None = None,
+        interval: int = 2,
     ) -> None:
-        super().__init__(channel, tempo, division, length, velocity, [start_note.clone()], loop)
+        super().__init__(channel, tempo, division, length, velocity, [start_note.clone()], loop, kind, interval)
         self.start_note = start_note
         self.scale = scale
         self._index = 0
@@ -241,6 +497,6 @@ class Incrementing(MML):
         self.notes[0].increment_pitch(self.scale[self._index])
 
         # print(self._index, self.__str__(), self.scale[self._index])
-        pyxel.play(self.channel, self.__str__(), loop=self.loop)
+        super().play()
 
         self._index = (self._index + 1) % len(self.scale)     
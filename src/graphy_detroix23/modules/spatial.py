@@ -0,0 +1,172 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/spatial.py
+
+Spatial indexes, to find what is under a point without scanning everything.
+"""
+
+import math
+from typing import Generic, Hashable, TypeVar
+
+Item = TypeVar("Item", bound=Hashable)
+
+class SpatialHash(Generic[Item]):
+    """
+    # `SpatialHash` uniform grid.
+    Each item is a circle, stored in every cell its bounding box overlaps,
+    so a point query only looks at a single cell.
+    Items keep their insertion order: `pick` returns the first inserted item under the point.
+    """
+    cell_size: float
+    _cells: dict[tuple[int, int], dict[Item, None]]
+    # Cell range covered by each item: (column min, row min, column max, row max).
+    _ranges: dict[Item, tuple[int, int, int, int]]
+    _circles: dict[Item, tuple[float, float, float]]
+    _order: dict[Item, int]
+    _counter: int
+
+    def __init__(self, cell_size: float = 64.0) -> None:
+        self.cell_size = cell_size
+        self._cells = dict()
+        self._ranges = dict()
+        self._circles = dict()
+        self._order = dict()
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._circles)
+
+    def __contains__(self, item: Item) -> bool:
+        return item in self._circles
+
+    def cell(self, position: tuple[float, float]) -> tuple[int, int]:
+        """
+        Get the cell coordinates containing `position`.
+        """
+        return (
+            math.floor(position[0] / self.cell_size),
+            math.floor(position[1] / self.cell_size),
+        )
+
+    def _range(self, position: tuple[float, float], radius: float) -> tuple[int, int, int, int]:
+        """
+        Get the cell range of a circle's bounding box.
+        """
+        size: float = self.cell_size
+        return (
+            math.floor((position[0] - radius) / size),
+            math.floor((position[1] - radius) / size),
+            math.floor((position[0] + radius) / size),
+            math.floor((position[1] + radius) / size),
+        )
+
+    def _link(self, item: Item, cells: tuple[int, int, int, int]) -> None:
+        for column in range(cells[0], cells[2] + 1):
+            for row in range(cells[1], cells[3] + 1):
+                self._cells.setdefault((column, row), dict())[item] = None
+        self._ranges[item] = cells
+
+    def _unlink(self, item: Item) -> None:
+        cells: tuple[int, int, int, int] = self._ranges.pop(item)
+        for column in range(cells[0], cells[2] + 1):
+            for row in range(cells[1], cells[3] + 1):
+                bucket: dict[Item, None] = self._cells[(column, row)]
+                del bucket[item]
+                if not bucket:
+                    del self._cells[(column, row)]
+
+    def insert(self, item: Item, position: tuple[float, float], radius: float) -> None:
+        """
+        Add an `item`, a circle at `position`, of `radius`.
+        Inserting an existing `item` moves it.
+        """
+        if item in self._circles:
+            self.move(item, position, radius)
+            return
+
+        self._order[item] = self._counter
+        self._counter += 1
+        self._circles[item] = (position[0], position[1], radius)
+        self._link(item, self._range(position, radius))
+
+    def move(self, item: Item, position: tuple[float, float], radius: float) -> None:
+        """
+        Update the circle of an existing `item`.
+        Cells are only touched if the covered range changed.
+        """
+        self._circles[item] = (position[0], position[1], radius)
+        cells: tuple[int, int, int, int] = self._range(position, radius)
+        if cells != self._ranges[item]:
+            self._unlink(item)
+            self._link(item, cells)
+
+    def remove(self, item: Item) -> None:
+        """
+        Remove an `item`, if present.
+        """
+        if item not in self._circles:
+            return
+
+        self._unlink(item)
+        del self._circles[item]
+        del self._order[item]
+
+    def clear(self) -> None:
+        """
+        Remove every item.
+        """
+        self._cells.clear()
+        self._ranges.clear()
+        self._circles.clear()
+        self._order.clear()
+        self._counter = 0
+
+    def pick(self, position: tuple[float, float]) -> Item | None:
+        """
+        Return the first inserted item whose circle contains `position`, `None` else.
+        """
+        bucket: dict[Item, None] | None = self._cells.get(self.cell(position))
+        if bucket is None:
+            return None
+
+        found: Item | None = None
+        for item in bucket:
+            x, y, radius = self._circles[item]
+            if ((position[0] - x) ** 2 + (position[1] - y) ** 2 <= radius ** 2
+                and (found is None or self._order[item] < self._order[found])
+            ):
+                found = item
+
+        return found
+
+    def query_rect(self, rectangle: tuple[float, float, float, float]) -> list[Item]:
+        """
+        Return the items whose bounding box overlaps `rectangle` (x min, y min, x max, y max),
+        in insertion order.
+        """
+        minimum: tuple[int, int] = self.cell((rectangle[0], rectangle[1]))
+        maximum: tuple[int, int] = self.cell((rectangle[2], rectangle[3]))
+        found: dict[Item, None] = dict()
+
+        # Sparse graphs: fewer occupied cells than covered ones.
+        if len(self._cells) < (maximum[0] - minimum[0] + 1) * (maximum[1] - minimum[1] + 1):
+            for (column, row), bucket in self._cells.items():
+                if minimum[0] <= column <= maximum[0] and minimum[1] <= row <= maximum[1]:
+                    found.update(bucket)
+        else:
+            for column in range(minimum[0], maximum[0] + 1):
+                for row in range(minimum[1], maximum[1] + 1):
+                    occupied: dict[Item, None] | None = self._cells.get((column, row))
+                    if occupied is not None:
+                        found.update(occupied)
+
+        visible: list[Item] = list()
+        for item in found:
+            x, y, radius = self._circles[item]
+            if (x + radius >= rectangle[0] and x - radius <= rectangle[2]
+                and y + radius >= rectangle[1] and y - radius <= rectangle[3]
+            ):
+                visible.append(item)
+
+        visible.sort(key=self._order.__getitem__)
+        return visible
@@ -0,0 +1,136 @@
+"""
+# Graphy.
+/src/graphy_detroix23/modules/tables.py
+
+Text tables of graphs, produced line by line.
+"""
+
+from typing import Callable, Iterable, Iterator, Mapping, Sequence, TextIO
+
+from graphy_detroix23.modules import graphics
+
+COLUMN_SEPARATOR: str = "│"
+
+Row = Callable[[int], Mapping[int, float]]
+"""
+Get the outgoing arcs of the node at an index: {end index: weight}.
+"""
+
+def adjacency_lines(
+    names: Sequence[str],
+    row: Row,
+    rows: range | None = None,
+    columns: range | None = None,
+) -> Iterator[str]:
+    """
+    Yield the lines of the adjacency matrix, without line breaks.
+    Only the `rows` and `columns` windows are formatted, all by default.
+    """
+    rows = range(len(names)) if rows is None else rows
+    columns = range(len(names)) if columns is None else columns
+
+    # Get sizes, the absent arcs being "0".
+    columns_size: dict[int, int] = {column: len(names[column]) for column in columns}
+    present: dict[int, int] = {column: 0 for column in columns}
+    # Weight of an arc, `None` if absent.
+    weight: float | None
+    for index_row in rows:
+        for end, weight in row(index_row).items():
+            if end in columns_size:
+                present[end] += 1
+                columns_size[end] = max(columns_size[end], len(str(weight)))
+
+    for column in columns:
+        if present[column] < len(rows):
+            columns_size[column] = max(columns_size[column], 1)
+
+    row_separator: str = "─┼" + "".join(["─" * columns_size[column] + "┼" for column in columns])
+
+    yield " " + COLUMN_SEPARATOR + COLUMN_SEPARATOR.join([
+        graphics.justify(names[column], columns_size[column])
+        for column in columns
+    ])
+
+    for index_row in rows:
+        arcs: Mapping[int, float] = row(index_row)
+        cells: list[str] = [names[index_row]]
+        for column in columns:
+            weight = arcs.get(column)
+            cells.append(graphics.justify("0" if weight is None else str(weight), columns_size[column]))
+
+        yield row_separator
+        yield COLUMN_SEPARATOR.join(cells) + COLUMN_SEPARATOR
+
+def dictionary_lines(
+    names: Sequence[str],
+    row: Row,
+    tab: str = "  ",
+    rows: range | None = None,
+) -> Iterator[str]:
+    """
+    Yield the lines of the dictionary of neighbors, without separators.
+    Only the `rows` window is formatted, all by default.
+    """
+    rows = range(len(names)) if rows is None else rows
+
+    yield "{"
+    for index_row in rows:
+        following: list[str] = [
+            f"{names[end]}: {weight}"
+            for end, weight in row(index_row).items()
+        ]
+        yield f"{tab}{names[index_row]}: \x7b{', '.join(following)}\x7d"
+
+
+class Writer:
+    """
+    # Incremental `Writer` of lines to a stream.
+    Each `step` writes a single chunk, to spread a large dump over several frames.
+    """
+    stream: TextIO
+    separator: str
+    chunk: int
+    written: int
+    _lines: Iterator[str]
+    done: bool
+
+    def __init__(
+        self,
+        lines: Iterable[str],
+        stream: TextIO,
+        separator: str = "\n",
+        chunk: int = 256,
+    ) -> None:
+        self.stream = stream
+        self.separator = separator
+        self.chunk = chunk
+        self.written = 0
+        self._lines = iter(lines)
+        self.done = False
+
+    def step(self) -> bool:
+        """
+        Write the next chunk. Returns `False` once everything is written.
+        """
+        if self.done:
+            return False
+
+        batch: list[str] = list()
+        for line in self._lines:
+            batch.append(line)
+            if len(batch) >= self.chunk:
+                break
+
+        if batch:
+            if self.written > 0:
+                self.stream.write(self.separator)
+            self.stream.write(self.separator.join(batch))
+            self.written += len(batch)
+
+        if len(batch) < self.chunk:
+            self.stream.write("\n")
+            self.stream.flush()
+            self.done = True
+            return False
+
+        return True
@@ -0,0 +1,25 @@
+"""
+# Graphy.
+/tests/conftest.py
+
+Shared fixtures: every test runs on a `Headless` backend, without window nor sound.
+"""
+
+from typing import Iterator
+
+import pytest
+
+from graphy_detroix23.modules import backend
+
+
+@pytest.fixture(autouse=True)
+def headless() -> Iterator[backend.Headless]:
+    """
+    Use a `Headless` backend, the previous one restored after the test.
+    """
+    screen: backend.Headless = backend.Headless(700, 500)
+    previous: backend.Backend = backend.use(screen)
+    try:
+        yield screen
+    finally:
+        backend.use(previous)
@@ -0,0 +1,108 @@
+"""
+# Graphy.
+/tests/test_components.py
+
+Incremental strongly connected components of a `GraphToy`, and their colors, against a `rebuild`.
+"""
+
+import pytest
+
+from graphy_detroix23.app import graph_toy, node_toy
+from graphy_detroix23.modules import components
+
+
+@pytest.fixture
+def graph() -> graph_toy.GraphToy:
+    """
+    A headless `GraphToy` of nodes `A` to `E`, without arcs, its components on.
+    """
+    graph = graph_toy.GraphToy()
+    for index, name in enumerate("ABCDE"):
+        graph.add(name, (10.0 * index, 0.0))
+    graph.toggle_components()
+    return graph
+
+
+def node(graph: graph_toy.GraphToy, name: str) -> node_toy.NodeToy:
+    found: node_toy.NodeToy | None = graph.get(name)
+    assert found is not None
+    return found
+
+
+def cycles(graph: graph_toy.GraphToy, live: components.Components) -> set[frozenset[str]]:
+    """
+    Names of the nodes of each component with a cycle.
+    """
+    return {
+        frozenset(graph.arcs.item(slot).get_name() for slot in members)
+        for members in live.members.values()
+        if len(members) > 1 or members <= live.loops
+    }
+
+
+def check(graph: graph_toy.GraphToy) -> None:
+    """
+    Step the components, then compare the colors to the ones of every node recolored, and the components to a `rebuild`.
+    """
+    graph.components_step()
+    colors: dict[str, int | None] = {node.get_name(): node.component_color for node in graph.nodes()}
+    for slot in graph.arcs.slots():
+        graph.color_component(slot)
+    assert {node.get_name(): node.component_color for node in graph.nodes()} == colors
+
+    rebuilt = components.Components(graph.arcs.row, graph.arcs.column, graph.arcs.slots)
+    rebuilt.rebuild()
+    expected: set[frozenset[str]] = cycles(graph, rebuilt)
+    assert cycles(graph, graph.strong_components) == expected
+    assert {name for name, color in colors.items() if color is not None} == set().union(*expected)
+
+
+def test_two_cycle(graph: graph_toy.GraphToy) -> None:
+    node(graph, "A").set_next(node(graph, "B"), 1.0)
+    check(graph)
+    node(graph, "B").set_next(node(graph, "A"), 1.0)
+    check(graph)
+    assert node(graph, "A").component_color is not None
+
+    node(graph, "B").remove_next(node(graph, "A"))
+    check(graph)
+    assert node(graph, "A").component_color is None
+
+
+def test_three_cycle(graph: graph_toy.GraphToy) -> None:
+    a, b, c = node(graph, "A"), node(graph, "B"), node(graph, "C")
+    a.set_next(b, 1.0)
+    b.set_next(a, 1.0)
+    check(graph)
+    b.set_next(c, 1.0)
+    c.set_next(a, 1.0)
+    check(graph)
+
+    # Still a cycle through `C`.
+    b.remove_next(a)
+    check(graph)
+    c.remove_next(a)
+    check(graph)
+    assert all(node.component_color is None for node in graph.nodes())
+
+
+def test_loop(graph: graph_toy.GraphToy) -> None:
+    d = node(graph, "D")
+    d.set_next(d, 1.0)
+    check(graph)
+    assert d.component_color is not None
+
+    d.remove_next(d)
+    check(graph)
+    assert d.component_color is None
+
+
+def test_node_removed(graph: graph_toy.GraphToy) -> None:
+    a, b = node(graph, "A"), node(graph, "B")
+    a.set_next(b, 1.0)
+    b.set_next(a, 1.0)
+    check(graph)
+
+    graph.remove("B")
+    check(graph)
+    assert a.component_color is None
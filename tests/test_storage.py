@@ -0,0 +1,109 @@
+"""
+# Graphy.
+/tests/test_storage.py
+
+Save and load round trip of `storage`.
+"""
+
+import pathlib
+from typing import Callable
+
+import pytest
+
+from graphy_detroix23.app import graph_toy, storage
+
+
+@pytest.fixture
+def graph() -> graph_toy.GraphToy:
+    """
+    A `GraphToy` without app, headless: weights, a self-loop and isolated nodes.
+    """
+    graph = graph_toy.GraphToy()
+    for index, name in enumerate("ABCDEF"):
+        graph.add(name, (10.0 * index, 5.0 + index))
+    a, b, c, d = (graph.get(name) for name in "ABCD")
+    assert a is not None and b is not None and c is not None and d is not None
+    a.set_next(b, 2.5)
+    b.set_next(a, 1.0)
+    b.set_next(c, 3.0)
+    c.set_next(c, 7.0)
+    d.set_next(a, 0.5)
+    return graph
+
+
+def test_round_trip(graph: graph_toy.GraphToy, tmp_path: pathlib.Path) -> None:
+    path: pathlib.Path = tmp_path / ("graph" + storage.SUFFIX)
+    storage.save(graph, path)
+
+    loaded = graph_toy.GraphToy()
+    # Replaced by the load.
+    loaded.add("Z")
+    storage.load(loaded, path)
+
+    assert loaded.display_dict() == graph.display_dict()
+    assert loaded.display_adjacency() == graph.display_adjacency()
+    assert [node.position for node in loaded.nodes()] == [node.position for node in graph.nodes()]
+    assert [node.radius for node in loaded.nodes()] == [node.radius for node in graph.nodes()]
+    assert loaded.arcs.arcs == graph.arcs.arcs
+
+
+def test_loaded_graph_is_editable(graph: graph_toy.GraphToy, tmp_path: pathlib.Path) -> None:
+    path: pathlib.Path = tmp_path / ("graph" + storage.SUFFIX)
+    storage.save(graph, path)
+    loaded = graph_toy.GraphToy()
+    storage.load(loaded, path)
+
+    loaded.remove("A")
+    c, d = loaded.get("C"), loaded.get("D")
+    assert c is not None and d is not None
+    c.remove_next(c)
+
+    assert loaded.arcs.arcs == 1
+    assert d.get_next() == dict()
+
+
+@pytest.mark.parametrize("content", [
+    b"",
+    b"GRPY",
+    b"XXXX" + bytes(storage.HEADER.size),
+    storage.HEADER.pack(storage.MAGIC, storage.VERSION + 1, 0, 0, 0, 0),
+    storage.HEADER.pack(storage.MAGIC, storage.VERSION, 0, 3, 0, 0),
+])
+def test_invalid_file(content: bytes, tmp_path: pathlib.Path) -> None:
+    path: pathlib.Path = tmp_path / ("invalid" + storage.SUFFIX)
+    path.write_bytes(content)
+
+    with pytest.raises(ValueError):
+        storage.GraphFile(path)
+
+
+# Fields of the saved `graph` patched, with the little-endian value written: (byte offset, value).
+EDGES_START: int = storage.HEADER.size + 6 * storage.NODE.size
+NAME_OFFSET: Callable[[int], int] = lambda node: storage.HEADER.size + node * storage.NODE.size
+
+@pytest.mark.parametrize("offset, value", [
+    # End of the first edge, out of the nodes.
+    (EDGES_START + 4, 99),
+    # Origin of the last edge.
+    (EDGES_START + 4 * storage.EDGE.size, 6),
+    # Name of `B` out of the string table.
+    (NAME_OFFSET(1) + 4, 100),
+    # Name of `B` the one of `A`.
+    (NAME_OFFSET(1), 0),
+])
+def test_invalid_content_keeps_graph(
+    graph: graph_toy.GraphToy, tmp_path: pathlib.Path, offset: int, value: int,
+) -> None:
+    path: pathlib.Path = tmp_path / ("graph" + storage.SUFFIX)
+    storage.save(graph, path)
+    content: bytearray = bytearray(path.read_bytes())
+    content[offset:offset + 4] = value.to_bytes(4, "little")
+    path.write_bytes(content)
+
+    loaded = graph_toy.GraphToy()
+    loaded.add("X")
+    with pytest.raises(ValueError):
+        storage.load(loaded, path)
+
+    assert [node.get_name() for node in loaded.nodes()] == ["X"]
+    assert loaded.arcs.arcs == 0